@@ -0,0 +1,319 @@
+import heapq
+import sys
+import time
+from collections import deque
+from simulation import Simulation, TICK_MS
+
+UNREACHABLE = 1 << 30
+
+# Offsets of each move, in the order ties are broken
+MOVES = (('UP', 0, -1), ('DOWN', 0, 1), ('LEFT', -1, 0), ('RIGHT', 1, 0))
+OPPOSITES = {'UP': 'DOWN', 'DOWN': 'UP', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT'}
+
+def neighbor_table(width, height):
+    """Flat index of each cell's UP/DOWN/LEFT/RIGHT neighbour on a torus"""
+    table = []
+    for y in range(height):
+        for x in range(width):
+            table.append(tuple(((y + dy) % height) * width + (x + dx) % width
+                               for _, dx, dy in MOVES))
+    return table
+
+class DistanceMap:
+    """Shortest path lengths to one target cell, kept up to date as cells
+    become blocked or free instead of being recomputed from scratch"""
+    def __init__(self, neighbors, size):
+        self.neighbors = neighbors
+        self.size = size
+        self.blocked = bytearray(size)
+        self.dist = [UNREACHABLE] * size
+        self.target = None
+
+    def rebuild(self, target, blocked):
+        """Full BFS from the target around the blocked cells"""
+        self.target = target
+        self.blocked = bytearray(blocked)
+        dist = [UNREACHABLE] * self.size
+        if target is not None:
+            dist[target] = 0
+            queue = deque([target])
+            neighbors = self.neighbors
+            blocked = self.blocked
+            while queue:
+                cell = queue.popleft()
+                step = dist[cell] + 1
+                for nxt in neighbors[cell]:
+                    if step < dist[nxt] and not blocked[nxt]:
+                        dist[nxt] = step
+                        queue.append(nxt)
+        self.dist = dist
+
+    def unblock(self, cell):
+        """A cell became free: distances can only shrink, spread from it"""
+        self.blocked[cell] = 0
+        if self.target is None:
+            return
+        dist = self.dist
+        neighbors = self.neighbors
+        up, down, left, right = neighbors[cell]
+        best = min(dist[up], dist[down], dist[left], dist[right]) + 1
+        if cell == self.target:
+            best = 0
+        if best >= dist[cell] or best >= UNREACHABLE:
+            return
+        dist[cell] = best
+        queue = deque([cell])
+        blocked = self.blocked
+        while queue:
+            cur = queue.popleft()
+            step = dist[cur] + 1
+            for nxt in neighbors[cur]:
+                if step < dist[nxt] and not blocked[nxt]:
+                    dist[nxt] = step
+                    queue.append(nxt)
+
+    def block(self, cell):
+        """A cell became blocked: only cells whose every shortest path ran
+        through it are recomputed"""
+        self.blocked[cell] = 1
+        if cell == self.target:
+            self.rebuild(self.target, self.blocked)
+            return
+        dist = self.dist
+        if dist[cell] >= UNREACHABLE:
+            return
+        neighbors = self.neighbors
+        blocked = self.blocked
+
+        # Collect the cells that lost all their shortest-path parents
+        affected = {cell}
+        queue = [cell]
+        for cur in queue:
+            parent_dist = dist[cur]
+            child_dist = parent_dist + 1
+            for nxt in neighbors[cur]:
+                if dist[nxt] != child_dist or nxt in affected or blocked[nxt]:
+                    continue
+                for p in neighbors[nxt]:
+                    if dist[p] == parent_dist and p not in affected and not blocked[p]:
+                        break
+                else:
+                    affected.add(nxt)
+                    queue.append(nxt)
+
+        for a in affected:
+            dist[a] = UNREACHABLE
+
+        # Re-enter the affected region from its unaffected border
+        heap = []
+        for a in affected:
+            if blocked[a]:
+                continue
+            up, down, left, right = neighbors[a]
+            best = min(dist[up], dist[down], dist[left], dist[right]) + 1
+            if best < UNREACHABLE:
+                dist[a] = best
+                heap.append((best, a))
+        heapq.heapify(heap)
+        while heap:
+            d, cur = heapq.heappop(heap)
+            if d != dist[cur]:
+                continue
+            step = d + 1
+            for nxt in neighbors[cur]:
+                if step < dist[nxt] and not blocked[nxt]:
+                    dist[nxt] = step
+                    heapq.heappush(heap, (step, nxt))
+
+class BotController:
+    """Base for computer players; same interface as HeadController"""
+    def __init__(self, sim):
+        self.sim = sim
+        self.width = sim.occupancy.width
+        self.height = sim.occupancy.height
+        self.neighbors = neighbor_table(self.width, self.height)
+        self.decided_at = None
+        self.decision = "CENTER"
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def get_direction(self):
+        return self.current_direction
+
+    def is_calibration_complete(self):
+        return True
+
+    def is_ready(self):
+        return True
+
+    def reset_calibration(self):
+        self.decided_at = None
+
+    @property
+    def current_direction(self):
+        """Direction for the snake's next move (recomputed once per move)"""
+        sim = self.sim
+        key = (sim.snake, sim.last_move_tick, sim.snake.direction,
+               sim.food.position, sim.bonus_food_position)
+        if key != self.decided_at:
+            self.decided_at = key
+            self.decision = "CENTER" if sim.game_over else self.decide()
+        return self.decision
+
+    def _cell(self, pos):
+        return pos[1] * self.width + pos[0]
+
+    def decide(self):
+        raise NotImplementedError
+
+class Autopilot(BotController):
+    """Computer player steering along shortest paths to the food"""
+    def __init__(self, sim):
+        super().__init__(sim)
+        size = self.width * self.height
+        self.food_map = DistanceMap(self.neighbors, size)
+        self.bonus_map = DistanceMap(self.neighbors, size)
+
+        # What the maps were last synced against
+        self.snake = None
+        self.head = None
+        self.tail = None
+        self.length = 0
+
+    def reset_calibration(self):
+        super().reset_calibration()
+        self.snake = None
+
+    def _sync(self):
+        """Bring both distance maps up to date with the board"""
+        sim = self.sim
+        body = sim.snake.body
+        blocked = sim.occupancy.cells
+        food = self._cell(sim.food.position) if sim.food.position is not None else None
+        bonus = self._cell(sim.bonus_food_position) if sim.bonus_food_active else None
+
+        # Normal case: one move since last sync, head advanced by one cell
+        incremental = (sim.snake is self.snake and len(body) > 1 and
+                       body[1] == self.head and len(body) - self.length in (0, 1))
+        if sim.snake is self.snake and body[0] == self.head and len(body) == self.length:
+            changed = []
+        elif incremental:
+            changed = [(self._cell(body[0]), True)]
+            if len(body) == self.length and not blocked[self._cell(self.tail)]:
+                changed.append((self._cell(self.tail), False))
+        else:
+            changed = None
+
+        for distance_map, target in ((self.food_map, food), (self.bonus_map, bonus)):
+            if changed is None or distance_map.target != target:
+                distance_map.rebuild(target, blocked)
+                continue
+            for cell, now_blocked in changed:
+                if now_blocked:
+                    distance_map.block(cell)
+                else:
+                    distance_map.unblock(cell)
+
+        self.snake = sim.snake
+        self.head = body[0]
+        self.tail = body[-1]
+        self.length = len(body)
+
+    def _room(self, start, limit):
+        """Free cells reachable from start, counting no further than limit"""
+        seen = bytearray(self.sim.occupancy.cells)
+        seen[start] = 1
+        queue = [start]
+        neighbors = self.neighbors
+        for cur in queue:
+            if len(queue) >= limit:
+                break
+            for nxt in neighbors[cur]:
+                if not seen[nxt]:
+                    seen[nxt] = 1
+                    queue.append(nxt)
+        return len(queue)
+
+    def decide(self):
+        sim = self.sim
+        self._sync()
+
+        body = sim.snake.body
+        blocked = sim.occupancy.cells
+        head = self._cell(body[0])
+        tail = self._cell(body[-1])
+        tail_leaves = not sim.snake.new_block and len(body) > 1
+
+        # Prefer the bonus food when it can be reached before it expires
+        distance_map = self.food_map
+        if sim.bonus_food_active:
+            remaining = sim.bonus_food_duration - sim.ms_since(sim.bonus_food_spawn_tick)
+            steps = min(self.bonus_map.dist[n] for n in self.neighbors[head]) + 1
+            if steps * sim.move_delay < remaining:
+                distance_map = self.bonus_map
+        dist = distance_map.dist
+
+        candidates = []
+        reverse = OPPOSITES.get(sim.snake.direction)
+        for (name, _, _), nxt in zip(MOVES, self.neighbors[head]):
+            if name == reverse:
+                continue
+            if blocked[nxt] and not (nxt == tail and tail_leaves):
+                continue
+            keep_going = 0 if name == sim.snake.direction else 1
+            candidates.append((dist[nxt], keep_going, name, nxt))
+        if not candidates:
+            return sim.snake.direction
+        candidates.sort()
+
+        # Take the shortest path unless it walks into a pocket too small to
+        # live in. A cell the map reaches shares a region with the target;
+        # when the tail borders that region too, the snake can follow its
+        # own tail out of it, so the flood fill only runs otherwise.
+        tail_in_region = any(dist[n] < UNREACHABLE for n in self.neighbors[tail])
+        need = len(body) + 1
+        best_room = -1
+        fallback = candidates[0][2]
+        for _, _, name, nxt in candidates:
+            if tail_in_region and dist[nxt] < UNREACHABLE:
+                return name
+            room = self._room(nxt, need)
+            if room >= need:
+                return name
+            if room > best_room:
+                best_room = room
+                fallback = name
+        return fallback
+
+def play_headless(seed, max_ticks=200000):
+    """Play one game to the end with the autopilot, without rendering"""
+    sim = Simulation(seed=seed, verbose=False)
+    pilot = Autopilot(sim)
+    while not sim.game_over and sim.tick_count < max_ticks:
+        sim.set_input_direction(pilot.current_direction)
+        # Ticks between moves do nothing here, so go straight to the next timer
+        sim.skip_idle_ticks(max_ticks)
+        sim.step()
+    return sim
+
+def main(argv):
+    games = int(argv[0]) if argv else 100
+    start = time.perf_counter()
+    moves = 0
+    scores = []
+    for seed in range(games):
+        sim = play_headless(seed)
+        scores.append(sim.game.score)
+        moves += sim.tick_count * TICK_MS // sim.move_delay
+    elapsed = time.perf_counter() - start
+    print(f"{games} games in {elapsed:.2f}s ({games / elapsed:.1f} games/s, "
+          f"~{moves / elapsed:.0f} moves/s)")
+    print(f"Average score {sum(scores) / len(scores):.1f}, best {max(scores)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
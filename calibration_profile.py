@@ -0,0 +1,55 @@
+import json
+import os
+import time
+
+CALIBRATION_PATH = "calibration.json"
+
+def profile_key(camera_index, width, height, backend="iris"):
+    """Profiles are kept per camera, resolution and tracking backend (the
+    backends' tracking points differ); iris keys predate backends"""
+    key = f"camera{camera_index}:{width}x{height}"
+    return key if backend == "iris" else f"{key}:{backend}"
+
+def _load_all(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def load_profile(key, path=CALIBRATION_PATH):
+    """Saved calibration as a dict (center, threshold_x, threshold_y), or None"""
+    profile = _load_all(path).get(key)
+    if not profile or len(profile.get("center", ())) != 2:
+        return None
+    return profile
+
+def save_profile(key, center, threshold_x, threshold_y, path=CALIBRATION_PATH):
+    """Store a calibration; the file is replaced atomically"""
+    profiles = _load_all(path)
+    profiles[key] = {
+        "center": [float(center[0]), float(center[1])],
+        "threshold_x": threshold_x,
+        "threshold_y": threshold_y,
+        "saved_at": time.time(),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(tmp_path, path)
+
+# Classifier settings found by head_tuning.py, per tracking backend
+TUNING_PATH = "head_tuning.json"
+
+def load_tuning(backend, path=TUNING_PATH):
+    """Tuned settings for a backend as a dict, or None"""
+    return _load_all(path).get(backend)
+
+def save_tuning(backend, settings, path=TUNING_PATH):
+    """Store tuned settings for a backend; the file is replaced atomically"""
+    all_settings = _load_all(path)
+    all_settings[backend] = dict(settings, saved_at=time.time())
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(all_settings, f, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,174 @@
+import json
+import sys
+import time
+from collections import namedtuple
+import cv2
+
+CAMERA_CACHE_PATH = "camera_modes.json"
+
+# What we ask the driver for; buffer_size 1 keeps the driver from queueing
+# stale frames where the backend supports it
+CaptureMode = namedtuple("CaptureMode", "fourcc width height fps buffer_size")
+
+CANDIDATE_MODES = [
+    CaptureMode(fourcc, width, height, fps, 1)
+    for fourcc in ("MJPG", "YUYV")
+    for width, height in ((640, 480), (1280, 720), (320, 240))
+    for fps in (60, 30)
+]
+
+def _fourcc_name(code):
+    code = int(code)
+    name = "".join(chr((code >> 8 * i) & 0xFF) for i in range(4))
+    return name if name.isprintable() and name.strip() else "?"
+
+def _source(source):
+    """Camera index or video file path (from a command line string)"""
+    return int(source) if str(source).isdigit() else source
+
+def open_capture(source=0, mode=None):
+    """Open a camera (or video file) and ask for the given mode"""
+    cap = cv2.VideoCapture(_source(source))
+    if mode is not None and cap.isOpened():
+        # The pixel format has to be set before the size and rate
+        if len(mode.fourcc) == 4:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode.fourcc))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode.height)
+        cap.set(cv2.CAP_PROP_FPS, mode.fps)
+        if mode.buffer_size > 0:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, mode.buffer_size)
+    return cap
+
+def actual_mode(cap):
+    """The mode the driver actually accepted"""
+    return CaptureMode(_fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)),
+                       int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                       int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                       round(cap.get(cv2.CAP_PROP_FPS)),
+                       int(cap.get(cv2.CAP_PROP_BUFFERSIZE)))
+
+def measure(cap, frames=30, warmup=5, idle=0.25):
+    """Delivered frame rate and estimated frame latency (ms) of an open capture.
+
+    After the reader has been idle, frames the driver queued in the meantime
+    come back almost instantly; each of them adds a frame interval of
+    latency on top of the half interval a fresh frame is old on average."""
+    for _ in range(warmup):
+        if not cap.read()[0]:
+            return None
+    start = time.perf_counter()
+    for _ in range(frames):
+        if not cap.read()[0]:
+            return None
+    interval = (time.perf_counter() - start) / frames
+
+    time.sleep(idle)
+    buffered = 0
+    for _ in range(10):
+        start = time.perf_counter()
+        if not cap.read()[0]:
+            break
+        if time.perf_counter() - start > interval * 0.25:
+            break
+        buffered += 1
+    return 1 / interval, (buffered + 0.5) * interval * 1000
+
+def probe(source=0, width=640, height=480, modes=CANDIDATE_MODES, verbose=True):
+    """Try each candidate mode; returns [(mode, fps, latency_ms)] for the
+    distinct modes the camera accepted at or above the target resolution"""
+    results = []
+    seen = set()
+    for wanted in modes:
+        cap = open_capture(source, wanted)
+        if not cap.isOpened():
+            cap.release()
+            continue
+        got = actual_mode(cap)
+        # Drivers silently fall back to some other mode; measure each real one once
+        if got in seen or got.width < width or got.height < height:
+            cap.release()
+            continue
+        seen.add(got)
+        measured = measure(cap)
+        cap.release()
+        if measured is None:
+            continue
+        fps, latency = measured
+        results.append((got, fps, latency))
+        if verbose:
+            print(f"  {got.fourcc} {got.width}x{got.height} @{got.fps} buffer {got.buffer_size}: "
+                  f"{fps:.1f} fps delivered, ~{latency:.0f} ms latency")
+    return results
+
+def choose(results, min_fps):
+    """Lowest latency among modes fast enough; smaller frames break ties"""
+    fast = [r for r in results if r[1] >= min_fps] or results
+    if not fast:
+        return None
+    return min(fast, key=lambda r: (round(r[2]), r[0].width * r[0].height))[0]
+
+def _cache_key(source, width, height, min_fps):
+    return f"{source}:{width}x{height}@{min_fps}"
+
+def _load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def cached_mode(source=0, width=640, height=480, min_fps=24, path=CAMERA_CACHE_PATH):
+    """Previously negotiated mode, or None (never probes)"""
+    entry = _load_cache(path).get(_cache_key(source, width, height, min_fps))
+    return CaptureMode(*entry) if entry else None
+
+def negotiate(source=0, width=640, height=480, min_fps=24, path=CAMERA_CACHE_PATH,
+              verbose=True, refresh=False):
+    """Best capture mode for this camera, probed once and then cached"""
+    mode = None if refresh else cached_mode(source, width, height, min_fps, path)
+    if mode is not None:
+        return mode
+    if verbose:
+        print(f"Probing camera {source} modes...")
+    mode = choose(probe(source, width, height, verbose=verbose), min_fps)
+    if mode is not None:
+        cache = _load_cache(path)
+        cache[_cache_key(source, width, height, min_fps)] = list(mode)
+        try:
+            with open(path, "w") as f:
+                json.dump(cache, f, indent=2)
+        except OSError as e:
+            print(f"Could not cache camera mode: {e}")
+    return mode
+
+def open_camera(source=0, width=640, height=480, min_fps=24, probe_modes=True):
+    """Open a camera in its negotiated mode (just the cached one, or the
+    driver default, when probe_modes is False)"""
+    if probe_modes:
+        mode = negotiate(source, width, height, min_fps)
+    else:
+        mode = cached_mode(source, width, height, min_fps)
+    return open_capture(source, mode)
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Probe camera modes and pick the lowest-latency one")
+    parser.add_argument("--source", default="0", help="camera index or video file")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--min-fps", type=int, default=24)
+    parser.add_argument("--cache", default=CAMERA_CACHE_PATH)
+    parser.add_argument("--reprobe", action="store_true", help="ignore the cached choice")
+    args = parser.parse_args(argv)
+
+    mode = negotiate(_source(args.source), args.width, args.height, args.min_fps,
+                     args.cache, refresh=args.reprobe)
+    if mode is None:
+        print("No usable mode")
+        return 1
+    print(f"Chosen: {mode.fourcc} {mode.width}x{mode.height} @{mode.fps} buffer {mode.buffer_size}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,169 @@
+import math
+import random
+import pygame
+
+# Particle colors per game event
+PARTICLE_COLORS = {
+    'eat': (0, 255, 0),
+    'bonus': (255, 215, 0),
+    'hit': (255, 60, 0),
+}
+# Particles per burst
+BURST_SIZES = {'eat': 12, 'bonus': 40, 'hit': 60}
+
+PARTICLE_LIFE_MS = 600
+PARTICLE_FADE_STEPS = 8
+GRAVITY = 300  # pixels per second squared
+
+HIT_RING_FRAMES = 20
+HIT_RING_RADIUS = 20
+
+# Bonus food heartbeat: 1 + 0.3 * sin(ms * 0.01), sampled over one period
+PULSE_STEPS = 64
+PULSE_PERIOD_MS = 2 * math.pi / 0.01
+
+def bake_particle(color, radius=3, steps=PARTICLE_FADE_STEPS):
+    """Frames of one particle shrinking and fading out"""
+    frames = []
+    for i in range(steps):
+        fade = 1 - i / steps
+        surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(surface, (*color, int(255 * fade)), (radius, radius),
+                           max(1, round(radius * fade)))
+        frames.append(surface)
+    return frames
+
+def bake_hit_ring(frames=HIT_RING_FRAMES, radius=HIT_RING_RADIUS):
+    """Frames of the expanding, fading collision circle, all the same size"""
+    baked = []
+    for i in range(frames):
+        progress = i / frames
+        size = int(radius * progress)
+        surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        if size:
+            pygame.draw.circle(surface, (255, 0, 0, int(255 * (1 - progress))), (radius, radius), size)
+        baked.append(surface)
+    return baked
+
+class ParticlePool:
+    """A fixed number of particle slots, reused round-robin.
+
+    Particles move on a closed-form path from their start time, so there is
+    no per-frame update step, and when more are emitted than fit, the
+    oldest are replaced. Nothing is allocated after construction."""
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.x = [0.0] * capacity
+        self.y = [0.0] * capacity
+        self.vx = [0.0] * capacity
+        self.vy = [0.0] * capacity
+        self.start = [0] * capacity
+        self.life = [0] * capacity  # 0: free slot
+        self.frames = [None] * capacity
+        self.next = 0
+        self.last_end = 0  # when the last live particle dies
+
+    def emit(self, x, y, vx, vy, start_ms, life_ms, frames):
+        i = self.next
+        self.next = (i + 1) % self.capacity
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.start[i] = start_ms
+        self.life[i] = life_ms
+        self.frames[i] = frames
+        self.last_end = max(self.last_end, start_ms + life_ms)
+
+    def clear(self):
+        life = self.life
+        for i in range(self.capacity):
+            life[i] = 0
+        self.last_end = 0
+
+    def live(self, now_ms):
+        """Number of particles still alive"""
+        return sum(1 for start, life in zip(self.start, self.life) if life and start <= now_ms < start + life)
+
+    def draw(self, win, now_ms):
+        if now_ms >= self.last_end:
+            return
+        life = self.life
+        for i in range(self.capacity):
+            if not life[i]:
+                continue
+            age = now_ms - self.start[i]
+            if age >= life[i] or age < 0:
+                life[i] = 0
+                continue
+            frames = self.frames[i]
+            sprite = frames[age * len(frames) // life[i]]
+            t = age / 1000
+            half = sprite.get_width() // 2
+            win.blit(sprite, (self.x[i] + self.vx[i] * t - half,
+                              self.y[i] + (self.vy[i] + GRAVITY * t / 2) * t - half))
+
+class Effects:
+    """Particle bursts and pre-baked animations for game events.
+
+    Events (food eaten, bonus picked up, collision) are found by comparing
+    the game state with the previous frame, so the game itself is never
+    touched. Effect timing follows simulation time, and the bursts use
+    their own RNG, never the game's."""
+    def __init__(self, capacity=256, seed=0):
+        self.particles = ParticlePool(capacity)
+        self.rng = random.Random(seed)
+        self.sprites = {kind: bake_particle(color) for kind, color in PARTICLE_COLORS.items()}
+        self.hit_ring = bake_hit_ring()
+        self.pulse = [1 + 0.3 * math.sin(2 * math.pi * i / PULSE_STEPS) for i in range(PULSE_STEPS)]
+        self.round_start_tick = None
+        self.last_tick = 0
+        self.food_count = 0
+        self.bonus_position = None
+        self.hit_tick = None
+
+    def update(self, sim):
+        """Start effects for whatever happened since the last frame"""
+        now = sim.now_ms()
+        if sim.round_start_tick != self.round_start_tick or sim.tick_count < self.last_tick:
+            # New round, or the game was rewound: nothing to celebrate
+            self.particles.clear()
+            self.round_start_tick = sim.round_start_tick
+            self.food_count = sim.food_count
+            self.bonus_position = sim.bonus_food_position
+            self.hit_tick = sim.hit_effect_start_tick if sim.hit_effect_active else None
+        else:
+            if sim.food_count > self.food_count:
+                self.burst('eat', sim.snake.body[0], now)
+            if self.bonus_position is not None and not sim.bonus_food_active \
+                    and sim.snake.body[0] == self.bonus_position:
+                self.burst('bonus', self.bonus_position, now)
+            if sim.hit_effect_active and sim.hit_effect_start_tick != self.hit_tick:
+                self.hit_tick = sim.hit_effect_start_tick
+                self.burst('hit', sim.hit_effect_position, now)
+            self.food_count = sim.food_count
+            self.bonus_position = sim.bonus_food_position if sim.bonus_food_active else None
+        self.last_tick = sim.tick_count
+
+    def burst(self, kind, cell, now_ms):
+        """Particles flying out of the center of a cell"""
+        x, y = cell[0] * 20 + 10, cell[1] * 20 + 10
+        frames = self.sprites[kind]
+        rng = self.rng
+        for _ in range(BURST_SIZES[kind]):
+            angle = rng.uniform(0, 2 * math.pi)
+            speed = rng.uniform(40, 160)
+            life = int(PARTICLE_LIFE_MS * rng.uniform(0.6, 1.0))
+            self.particles.emit(x, y, speed * math.cos(angle), speed * math.sin(angle) - 60,
+                                now_ms, life, frames)
+
+    def draw_particles(self, win, now_ms):
+        self.particles.draw(win, now_ms)
+
+    def hit_frame(self, progress):
+        """Baked collision circle for a progress from 0 to 1"""
+        return self.hit_ring[min(int(progress * HIT_RING_FRAMES), HIT_RING_FRAMES - 1)]
+
+    def heartbeat(self, ms):
+        """Bonus food pulse factor at ms after it spawned"""
+        return self.pulse[int(ms * PULSE_STEPS / PULSE_PERIOD_MS) % PULSE_STEPS]
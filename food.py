@@ -1,26 +1,44 @@
 import random
-import pygame
+
+# Random picks before falling back to a scan of the free cells
+MAX_RANDOM_TRIES = 64
+
+def random_free_cell(rng, taken, walls=None):
+    """Random cell of the 25x25 grid not in taken and not a wall of the
+    level, or None if the board is full"""
+    for _ in range(MAX_RANDOM_TRIES):
+        cell = (rng.randint(0, 24), rng.randint(0, 24))
+        if cell not in taken and (walls is None or not walls.is_wall(cell)):
+            return cell
+    # Nearly full board: pick from what is left instead of looping forever
+    taken = set(taken)
+    free = [(x, y) for y in range(25) for x in range(25)
+            if (x, y) not in taken and (walls is None or not walls.is_wall((x, y)))]
+    return rng.choice(free) if free else None
 
 class Food:
-    def __init__(self, snake_body):
+    def __init__(self, snake_body, rng=None, walls=None):
+        # Seeded generator keeps spawns reproducible for replays
+        self.rng = rng if rng is not None else random.Random()
+        # Level whose walls food never spawns on
+        self.walls = walls
         self.spawn(snake_body)
         self.bonus_active = False
         self.bonus_position = None
 
     def spawn(self, snake_body):
-        # Updated for 25x25 grid instead of 30x30
-        self.position = (random.randint(0, 24), random.randint(0, 24))
-        while self.position in snake_body:
-            self.position = (random.randint(0, 24), random.randint(0, 24))
+        # Updated for 25x25 grid instead of 30x30; None once the snake fills it
+        self.position = random_free_cell(self.rng, snake_body, self.walls)
 
     def spawn_bonus(self, snake_body):
         # Updated for 25x25 grid instead of 30x30
-        self.bonus_position = (random.randint(0, 24), random.randint(0, 24))
-        while self.bonus_position in snake_body:
-            self.bonus_position = (random.randint(0, 24), random.randint(0, 24))
-        self.bonus_active = True
+        self.bonus_position = random_free_cell(self.rng, snake_body, self.walls)
+        self.bonus_active = self.bonus_position is not None
 
     def draw(self, win):
+        import pygame
+        if self.position is None:
+            return
         pygame.draw.rect(win, (255, 0, 0), (self.position[0] * 20, self.position[1] * 20, 20, 20))
         if self.bonus_active and self.bonus_position:
             pygame.draw.rect(win, (255, 255, 0), (self.bonus_position[0] * 20, self.bonus_position[1] * 20, 20, 20))
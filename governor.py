@@ -0,0 +1,115 @@
+import time
+from collections import deque
+
+# What each quality level turns off, cumulatively, cheapest loss first
+STAGES = (
+    "full quality",
+    "flat snake",
+    "render every other frame",
+    "half-resolution face model input",
+    "no head monitor",
+)
+
+class QualityGovernor:
+    """Sheds drawing and tracking work in stages when frames or face model
+    runs take longer than their budgets, and brings it back when there is
+    headroom again.
+
+    The game loop reports the work time of every frame (input, update and
+    drawing, not the wait for the next frame), the tracking loops report
+    each inference; both go into deques, whose appends are atomic, so the
+    tracking threads take no lock. Once a window the game loop weighs the
+    samples: a level is shed when more than late_share of the frames ran
+    over budget or the median inference did, and restored after
+    recover_windows calm windows in a row. Going back down soon after
+    going up doubles that wait, so a machine on the edge settles instead
+    of flapping. Input is read and the simulation advanced on every frame
+    at every level; only drawing and model input are reduced."""
+    def __init__(self, frame_budget_ms=1000 / 60, inference_budget_ms=30, window_ms=1000,
+                 late_share=0.1, headroom=0.6, recover_windows=3, max_level=len(STAGES) - 1):
+        self.frame_budget = frame_budget_ms / 1000
+        self.inference_budget = inference_budget_ms / 1000
+        self.window = window_ms / 1000
+        self.late_share = late_share
+        self.headroom = headroom
+        self.base_recover_windows = recover_windows
+        self.recover_windows = recover_windows
+        self.max_level = max_level
+        self.level = 0
+        self.frame_times = deque(maxlen=1024)
+        self.inference_times = deque(maxlen=256)
+        self.window_start = time.perf_counter()
+        self.calm_windows = 0
+        self.raised_at = None  # when the level last went back up
+        self.frame_number = 0
+
+    # Settings for the current level
+    @property
+    def flat_snake(self):
+        return self.level >= 1
+
+    @property
+    def render_every(self):
+        return 2 if self.level >= 2 else 1
+
+    @property
+    def inference_scale(self):
+        return 0.5 if self.level >= 3 else 1.0
+
+    @property
+    def show_monitor(self):
+        return self.level < 4
+
+    def should_draw(self):
+        """Whether this frame is drawn (call once per frame)"""
+        self.frame_number += 1
+        return self.frame_number % self.render_every == 0
+
+    def inference(self, seconds):
+        """Report one face model run (any thread)"""
+        self.inference_times.append(seconds)
+
+    def frame(self, seconds, now=None):
+        """Report one frame's work time (game thread); returns True when
+        the level changed"""
+        self.frame_times.append(seconds)
+        if now is None:
+            now = time.perf_counter()
+        if now - self.window_start < self.window:
+            return False
+        self.window_start = now
+        frames = list(self.frame_times)
+        inferences = sorted(self.inference_times)
+        self.frame_times.clear()
+        self.inference_times.clear()
+        inference = inferences[len(inferences) // 2] if inferences else 0.0
+        late = sum(1 for t in frames if t > self.frame_budget) / len(frames)
+
+        if (late > self.late_share or inference > self.inference_budget) and self.level < self.max_level:
+            if self.raised_at is not None and now - self.raised_at < 2 * self.recover_windows * self.window:
+                # Going up did not hold: wait longer before trying again
+                self.recover_windows = min(self.recover_windows * 2, 60)
+            self.raised_at = None
+            self.calm_windows = 0
+            return self._set(self.level + 1, f"{late:.0%} of frames late, inference {inference * 1000:.0f} ms")
+
+        calm = (max(frames) < self.frame_budget * self.headroom and
+                inference < self.inference_budget * self.headroom)
+        self.calm_windows = self.calm_windows + 1 if calm else 0
+        if self.calm_windows >= self.recover_windows and self.level > 0:
+            self.calm_windows = 0
+            self.raised_at = now
+            return self._set(self.level - 1, "headroom")
+        if self.raised_at is not None and now - self.raised_at >= 2 * self.recover_windows * self.window:
+            # Held long enough: the next problem starts from the short wait again
+            self.raised_at = None
+            self.recover_windows = self.base_recover_windows
+        return False
+
+    def _set(self, level, reason):
+        old = self.level
+        self.level = level
+        action = "Shedding" if level > old else "Restoring"
+        stage = STAGES[max(level, old)]
+        print(f"Quality governor: {action} '{stage}' ({reason}), level {level}")
+        return True
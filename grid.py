@@ -0,0 +1,74 @@
+class OccupancyGrid:
+    """Per-cell occupancy counts for a wrapping board, stored as a flat array.
+
+    Cells set in base (bytes, one per cell, such as a level's walls) start
+    out occupied and stay that way through rebuild()."""
+    def __init__(self, width=25, height=25, base=None):
+        self.width = width
+        self.height = height
+        self.base = base
+        self.cells = bytearray(base) if base is not None else bytearray(width * height)
+
+    def index(self, cell):
+        return cell[1] * self.width + cell[0]
+
+    def add(self, cell):
+        self.cells[cell[1] * self.width + cell[0]] += 1
+
+    def remove(self, cell):
+        self.cells[cell[1] * self.width + cell[0]] -= 1
+
+    def is_occupied(self, cell):
+        return self.cells[cell[1] * self.width + cell[0]] != 0
+
+    def rebuild(self, bodies):
+        """Recount every cell from a list of snake bodies"""
+        cells = bytearray(self.base) if self.base is not None else bytearray(self.width * self.height)
+        width = self.width
+        for body in bodies:
+            for x, y in body:
+                cells[y * width + x] += 1
+        self.cells = cells
+
+CHUNK_CELLS = 16
+
+class ChunkIndex:
+    """Cells bucketed by the square chunk they fall in, each with a value
+    (who or what is there). Everything inside a rectangle is found by
+    visiting only the chunks it overlaps, however big the board is."""
+    def __init__(self, chunk=CHUNK_CELLS):
+        self.chunk = chunk
+        self.chunks = {}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def key(self, cell):
+        return cell[0] // self.chunk, cell[1] // self.chunk
+
+    def add(self, cell, value):
+        key = (cell[0] // self.chunk, cell[1] // self.chunk)
+        bucket = self.chunks.get(key)
+        if bucket is None:
+            bucket = self.chunks[key] = {}
+        if cell not in bucket:
+            self.count += 1
+        bucket[cell] = value
+
+    def remove(self, cell):
+        key = (cell[0] // self.chunk, cell[1] // self.chunk)
+        bucket = self.chunks.get(key)
+        if bucket is not None and cell in bucket:
+            del bucket[cell]
+            self.count -= 1
+            if not bucket:
+                del self.chunks[key]
+
+    def get(self, cell):
+        bucket = self.chunks.get((cell[0] // self.chunk, cell[1] // self.chunk))
+        return bucket.get(cell) if bucket else None
+
+    def in_chunk(self, key):
+        """{cell: value} for one chunk (empty when nothing is there)"""
+        return self.chunks.get(key, {})
@@ -0,0 +1,162 @@
+import random
+import sys
+import time
+from array import array
+from collections import deque
+from functools import lru_cache
+from autopilot import BotController, MOVES, OPPOSITES, neighbor_table
+from simulation import Simulation
+
+def _cycle_cells(width, height):
+    """Cells of a Hamiltonian cycle on the width x height torus, in order"""
+    if height % width == 0:
+        # Rows walked rightwards, each shifted one column left; the shift
+        # adds up to a whole turn, so the last row wraps back to the start
+        return [((col - row) % width, row) for row in range(height) for col in range(width)]
+    if width % height == 0:
+        return [(y, x) for x, y in _cycle_cells(height, width)]
+    if height % 2 == 0 and width > 1:
+        # Boustrophedon over columns 1.. and back up column 0
+        cells = []
+        for row in range(height):
+            cols = range(1, width) if row % 2 == 0 else range(width - 1, 0, -1)
+            cells.extend((col, row) for col in cols)
+        cells.extend((0, row) for row in range(height - 1, -1, -1))
+        return cells
+    if width % 2 == 0 and height > 1:
+        return [(y, x) for x, y in _cycle_cells(height, width)]
+    raise ValueError(f"No Hamiltonian cycle construction for a {width}x{height} board")
+
+@lru_cache(maxsize=None)
+def hamiltonian_cycle(width, height):
+    """Flat successor array and cycle position of every cell, built once
+    per board geometry"""
+    cells = _cycle_cells(width, height)
+    size = width * height
+    successor = array('l', [0]) * size
+    order = array('l', [0]) * size
+    flat = [y * width + x for x, y in cells]
+    for position, cell in enumerate(flat):
+        order[cell] = position
+        successor[cell] = flat[(position + 1) % size]
+    return successor, order
+
+def choose_next(successor, order, neighbors, head, tail, target, blocked, reverse, growing=0):
+    """Next cell: the cycle successor, or a shortcut that does not overshoot
+    the target along the cycle and leaves the tail room to move.
+
+    The body always lies within the stretch of the cycle from the tail to
+    the head, and a shortcut only skips free cells ahead of the head. The
+    tail stands still while the snake grows, so a shortcut must also leave
+    more cells before the tail than the growth still to come (growing)
+    plus the food it may eat on landing; without that margin the head can
+    catch up with a tail that is not moving."""
+    size = len(order)
+    best = successor[head]
+    if target is None:
+        return best
+    here = order[head]
+    to_tail = (order[tail] - here) % size or size
+    # Shortcut landing spots must leave this many cells before the tail
+    to_tail -= growing + 1
+    to_target = (order[target] - here) % size
+    best_ahead = 1
+    for cell in neighbors[head]:
+        if cell == reverse or blocked[cell]:
+            continue
+        ahead = (order[cell] - here) % size
+        if best_ahead < ahead < to_tail and ahead <= to_target:
+            best = cell
+            best_ahead = ahead
+    return best
+
+class HamiltonianPilot(BotController):
+    """Computer player that can fill the whole board by following a
+    Hamiltonian cycle, cutting corners only where the tail keeps room to
+    move whatever the snake still has to grow"""
+    def __init__(self, sim):
+        super().__init__(sim)
+        self.successor, self.order = hamiltonian_cycle(self.width, self.height)
+
+    def decide(self):
+        sim = self.sim
+        body = sim.snake.body
+        head = self._cell(body[0])
+        tail = self._cell(body[-1])
+
+        # Chase whichever food comes first along the cycle
+        here = self.order[head]
+        size = len(self.order)
+        target = None
+        for pos in (sim.food.position, sim.bonus_food_position if sim.bonus_food_active else None):
+            if pos is None:
+                continue
+            cell = self._cell(pos)
+            if target is None or (self.order[cell] - here) % size < (self.order[target] - here) % size:
+                target = cell
+
+        reverse = None
+        if sim.snake.direction in OPPOSITES:
+            reverse = self.neighbors[head][[m[0] for m in MOVES].index(OPPOSITES[sim.snake.direction])]
+        nxt = choose_next(self.successor, self.order, self.neighbors, head, tail,
+                          target, sim.occupancy.cells, reverse, int(sim.snake.new_block))
+        return MOVES[self.neighbors[head].index(nxt)][0]
+
+def fill_board(seed=0):
+    """Play a 25x25 game until the snake covers every cell"""
+    sim = Simulation(seed=seed, verbose=False)
+    pilot = HamiltonianPilot(sim)
+    moves = 0
+    while not sim.game_over:
+        last_move = sim.last_move_tick
+        sim.set_input_direction(pilot.current_direction)
+        sim.step()
+        moves += sim.last_move_tick != last_move
+    return sim, moves
+
+def time_moves(width, height, moves=20000, seed=0):
+    """Average cost of one solver decision plus bookkeeping on a bare board"""
+    successor, order = hamiltonian_cycle(width, height)
+    neighbors = neighbor_table(width, height)
+    size = width * height
+    rng = random.Random(seed)
+    blocked = bytearray(size)
+    body = deque([0])
+    blocked[0] = 1
+    food = rng.randrange(1, size)
+    previous = None
+    start = time.perf_counter()
+    for _ in range(moves):
+        head = body[0]
+        nxt = choose_next(successor, order, neighbors, head, body[-1], food, blocked, previous)
+        if nxt == food:
+            food = rng.randrange(size)
+            while blocked[food] or food == nxt:
+                food = rng.randrange(size)
+        else:
+            blocked[body.pop()] = 0
+        body.appendleft(nxt)
+        blocked[nxt] = 1
+        previous = head
+    return (time.perf_counter() - start) / moves
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or [25, 50, 100, 250, 500]
+    print(f"{'board':>9} {'cycle build':>12} {'per move':>10}")
+    for n in sizes:
+        hamiltonian_cycle.cache_clear()
+        start = time.perf_counter()
+        hamiltonian_cycle(n, n)
+        build = time.perf_counter() - start
+        per_move = time_moves(n, n)
+        print(f"{n:>4}x{n:<4} {build * 1000:>9.1f} ms {per_move * 1e6:>7.2f} us")
+
+    start = time.perf_counter()
+    sim, moves = fill_board()
+    elapsed = time.perf_counter() - start
+    print(f"25x25 game filled {len(sim.snake.body)} cells in {moves} moves "
+          f"({elapsed:.2f}s, score {sim.game.score})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,236 @@
+import sys
+import time
+import cv2
+import numpy as np
+from preprocess import mirror_x
+
+# Iris landmark indices for MediaPipe face mesh (refined model only)
+LEFT_IRIS_IDX = [474, 475, 476, 477]
+RIGHT_IRIS_IDX = [469, 470, 471, 472]
+
+# Face mesh landmarks for head pose: nose tip, chin, outer eye corners
+# and mouth corners, left to right as seen in the (unmirrored) image
+POSE_LANDMARKS = [1, 152, 33, 263, 61, 291]
+
+# Matching points of a generic face model (y up, nose tip at the origin)
+FACE_MODEL = np.array([
+    (0.0, 0.0, 0.0),
+    (0.0, -330.0, -65.0),
+    (-225.0, 170.0, -135.0),
+    (225.0, 170.0, -135.0),
+    (-150.0, -150.0, -125.0),
+    (150.0, -150.0, -125.0),
+])
+
+class IrisMeshBackend:
+    """Average iris position from the refined face mesh (478 landmarks).
+    The most precise backend and the most expensive one."""
+    name = "iris"
+
+    def __init__(self):
+        self.model = None
+
+    def load(self):
+        import mediapipe as mp
+        self.model = mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=False,
+            refine_landmarks=True,
+            max_num_faces=1,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+    def locate(self, image, w, h):
+        """Tracking point in mirrored pixels and the points it came from,
+        or (None, ()) without a face"""
+        result = self.model.process(image)
+        if not result.multi_face_landmarks:
+            return None, ()
+        points = result.multi_face_landmarks[0].landmark
+        left = np.mean([(mirror_x(points[i].x) * w, points[i].y * h) for i in LEFT_IRIS_IDX], axis=0)
+        right = np.mean([(mirror_x(points[i].x) * w, points[i].y * h) for i in RIGHT_IRIS_IDX], axis=0)
+        return (left + right) / 2, (left, right)
+
+    def close(self):
+        if self.model is not None:
+            self.model.close()
+
+class PoseMeshBackend(IrisMeshBackend):
+    """Head pose from six stable landmarks of the plain face mesh (no iris
+    refinement), solved with cv2.solvePnP. The tracking point is the end of
+    a short axis out of the nose, so turning the head moves it like moving
+    the eyes moves the iris."""
+    name = "pose"
+    axis_length = 300  # face model units; the model face is 450 wide
+
+    def __init__(self):
+        super().__init__()
+        self.camera_matrix = None
+        self.rvec = None
+        self.tvec = None
+
+    def load(self):
+        import mediapipe as mp
+        self.model = mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=False,
+            refine_landmarks=False,
+            max_num_faces=1,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+    def locate(self, image, w, h):
+        result = self.model.process(image)
+        if not result.multi_face_landmarks:
+            self.rvec = None
+            return None, ()
+        points = result.multi_face_landmarks[0].landmark
+        # Solved on the unmirrored landmarks; only the results are mirrored
+        image_points = np.array([(points[i].x * w, points[i].y * h) for i in POSE_LANDMARKS])
+        if self.camera_matrix is None or self.camera_matrix[0, 2] != w / 2:
+            # No calibration data: focal length about the image width, no distortion
+            self.camera_matrix = np.array([[w, 0, w / 2], [0, w, h / 2], [0, 0, 1]], dtype=np.float64)
+            self.rvec = None
+        if self.rvec is None:
+            ok, self.rvec, self.tvec = cv2.solvePnP(FACE_MODEL, image_points, self.camera_matrix, None)
+        else:
+            # Last frame's pose is a good start and keeps the solution stable
+            ok, self.rvec, self.tvec = cv2.solvePnP(FACE_MODEL, image_points, self.camera_matrix, None,
+                                                    self.rvec, self.tvec, True)
+        if not ok:
+            self.rvec = None
+            return None, ()
+        tip, _ = cv2.projectPoints(np.array([(0.0, 0.0, float(self.axis_length))]),
+                                   self.rvec, self.tvec, self.camera_matrix, None)
+        x, y = tip[0, 0]
+        nose = image_points[0]
+        return np.array([w - x, y]), (np.array([w - nose[0], nose[1]]),)
+
+class FaceDetectionBackend(IrisMeshBackend):
+    """Midpoint of the eye keypoints from the short-range face detector.
+    No mesh at all, so by far the cheapest, but the keypoints are coarse."""
+    name = "detection"
+
+    def load(self):
+        import mediapipe as mp
+        self.model = mp.solutions.face_detection.FaceDetection(
+            model_selection=0,
+            min_detection_confidence=0.5
+        )
+
+    def locate(self, image, w, h):
+        result = self.model.process(image)
+        if not result.detections:
+            return None, ()
+        keypoints = result.detections[0].location_data.relative_keypoints
+        # Keypoints 0 and 1 are the right and left eye
+        eyes = [np.array([mirror_x(k.x) * w, k.y * h]) for k in keypoints[:2]]
+        return (eyes[0] + eyes[1]) / 2, eyes
+
+BACKENDS = {backend.name: backend for backend in (IrisMeshBackend, PoseMeshBackend, FaceDetectionBackend)}
+
+def create_backend(name):
+    """Backend instance by name (the model is built by load())"""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown head backend {name!r}, choose from {', '.join(BACKENDS)}") from None
+
+class _Direction:
+    """Same calibration and thresholds as HeadController, for the benchmark"""
+    def __init__(self, calibration_frames=30, threshold_x=12, threshold_y=10):
+        self.center = None
+        self.count = 0
+        self.calibration_frames = calibration_frames
+        self.threshold_x = threshold_x
+        self.threshold_y = threshold_y
+
+    def update(self, point):
+        """Direction for a tracking point, None while calibrating"""
+        from head_controller import direction_from_offset
+        if self.count < self.calibration_frames:
+            self.center = point if self.center is None else 0.9 * self.center + 0.1 * point
+            self.count += 1
+            return None
+        return direction_from_offset(point[0] - self.center[0], point[1] - self.center[1],
+                                     self.threshold_x, self.threshold_y)
+
+def benchmark(source, names=tuple(BACKENDS), frames=0, flip=False):
+    """Run every backend on the same frames of a video; prints CPU time per
+    frame and how often each backend picks the same direction as the first"""
+    from camera import open_capture
+    backends = [create_backend(name) for name in names]
+    for backend in backends:
+        backend.load()
+    trackers = [_Direction() for _ in backends]
+    cpu = [0.0] * len(backends)
+    wall = [0.0] * len(backends)
+    found = [0] * len(backends)
+    agree = [0] * len(backends)
+    compared = [0] * len(backends)
+
+    cap = open_capture(source)
+    if not cap.isOpened():
+        print(f"Cannot open {source}")
+        return None
+    rgb = None
+    count = 0
+    while not frames or count < frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if flip:
+            # Recordings of the monitor are mirrored; the backends expect camera frames
+            frame = cv2.flip(frame, 1)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+        h, w, _ = frame.shape
+        count += 1
+        directions = []
+        for i, backend in enumerate(backends):
+            start_cpu, start = time.process_time(), time.perf_counter()
+            point, _ = backend.locate(rgb, w, h)
+            cpu[i] += time.process_time() - start_cpu
+            wall[i] += time.perf_counter() - start
+            if point is None:
+                directions.append(None)
+                continue
+            found[i] += 1
+            directions.append(trackers[i].update(point))
+        for i, direction in enumerate(directions):
+            if direction is not None and directions[0] is not None:
+                compared[i] += 1
+                agree[i] += direction == directions[0]
+    cap.release()
+    for backend in backends:
+        backend.close()
+
+    if not count:
+        print("No frames read")
+        return None
+    print(f"{count} frames from {source}; agreement is with {names[0]}")
+    results = []
+    for i, name in enumerate(names):
+        agreement = agree[i] / compared[i] if compared[i] else 0.0
+        results.append((name, cpu[i] / count, wall[i] / count, found[i] / count, agreement))
+        print(f"  {name:<10} {cpu[i] / count * 1000:>6.1f} ms CPU/frame  {wall[i] / count * 1000:>6.1f} ms wall/frame  "
+              f"face in {found[i] / count:>4.0%}  same direction {agreement:>4.0%} of {compared[i]} frames")
+    return results
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare head-direction backends on a recorded video")
+    parser.add_argument("video", help="video file (or camera index)")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help="comma separated, the first is the reference for agreement")
+    parser.add_argument("--frames", type=int, default=0, help="stop after this many frames (0: whole video)")
+    parser.add_argument("--flip", action="store_true", help="unmirror a recording of the head monitor")
+    args = parser.parse_args(argv)
+    names = [name.strip() for name in args.backends.split(",") if name.strip()]
+    for name in names:
+        if name not in BACKENDS:
+            parser.error(f"unknown backend {name!r}, choose from {', '.join(BACKENDS)}")
+    video = int(args.video) if args.video.isdigit() else args.video
+    return 0 if benchmark(video, names, args.frames, args.flip) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,20 +1,39 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import threading
 import time
+from collections import deque
+from calibration_profile import (CALIBRATION_PATH, TUNING_PATH, load_profile, load_tuning, profile_key,
+                                 save_profile)
+from camera import open_camera
+from head_backends import create_backend
+from preprocess import FramePreprocessor
+
+def direction_from_offset(dx, dy, threshold_x, threshold_y):
+    """Direction for a displacement from the calibrated center"""
+    direction = "CENTER"
+    
+    # Use the larger movement to determine primary direction
+    if abs(dx) > abs(dy):
+        if dx > threshold_x:
+            direction = "RIGHT"
+        elif dx < -threshold_x:
+            direction = "LEFT"
+    else:
+        if dy > threshold_y:
+            direction = "DOWN"
+        elif dy < -threshold_y:
+            direction = "UP"
+    return direction
 
 class HeadController:
-    def __init__(self):
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False, 
-            refine_landmarks=True,
-            max_num_faces=1,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    def __init__(self, camera_index=0, profile_path=CALIBRATION_PATH, backend="iris", tuning_path=TUNING_PATH):
+        # MediaPipe is imported and the model built by start(), on the
+        # tracking thread, so creating a controller is instant. The backend
+        # (head_backends.BACKENDS) picks the model behind the tracking point.
+        self.backend = create_backend(backend)
         self.cap = None
+        self.preprocessor = FramePreprocessor()
         self.calibrated_center = None
         self.frame_count = 0
         self.calibration_frames = 30
@@ -23,28 +42,122 @@ class HeadController:
         self.running = False
         self.thread = None
         
-        # Iris landmark indices for MediaPipe face mesh
-        self.left_iris_idx = [474, 475, 476, 477]
-        self.right_iris_idx = [469, 470, 471, 472]
-        
         # Improved thresholds for better accuracy
         self.threshold_x = 12  # More sensitive for better responsiveness
         self.threshold_y = 10  # More sensitive for better responsiveness
         
+        # Weight of each new frame in the calibration average, and how many
+        # recent tracking points are averaged (1: no smoothing)
+        self.calibration_ema = 0.1
+        self.smoothing_frames = 1
+        self.recent_points = deque(maxlen=1)
+        
+        # Settings found by head_tuning.py for this backend replace the defaults
+        self.tuning = load_tuning(self.backend.name, tuning_path)
+        if self.tuning is not None:
+            self.apply_tuning(self.tuning)
+        
+        # Warm-up progress, shown by the start menu
+        self.warmup_frames = 5
+        self.warmup_steps = 0  # model loaded + camera opened + frames processed
+        self.status = "Not started"
+        self.error = None
+        
+        # metrics.LoopMetrics for the tracking thread, when metrics are served
+        self.metrics = None
+        # governor.QualityGovernor that sets the model input size, if any
+        self.governor = None
+        
+        # Saved calibration for this camera; a loaded one is refined while
+        # the player looks straight ahead, then saved again
+        self.camera_index = camera_index
+        self.profile_path = profile_path
+        self.profile_key = None
+        self.refine_frames = 300
+        self.refine_count = 0
+        
     def start(self):
-        """Start the eye tracking in a separate thread"""
+        """Start the eye tracking in a separate thread (returns at once;
+        loading and camera errors are reported through status and error)"""
         if self.running:
             return
             
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
-            raise RuntimeError("Cannot open camera")
-            
         self.running = True
-        self.thread = threading.Thread(target=self._track_eyes)
+        self.thread = threading.Thread(target=self._run)
         self.thread.daemon = True
         self.thread.start()
         
+    def _warm_up(self):
+        """Load the model, open the camera and push the first frames through
+        the model, whose first process() calls are far slower than the rest"""
+        self.status = "Loading face model"
+        self.backend.load()
+        self.warmup_steps = 1
+        
+        self.status = "Opening camera"
+        # Lowest-latency mode, probed on the first run and cached after that
+        self.cap = open_camera(self.camera_index)
+        if not self.cap.isOpened():
+            raise RuntimeError("Cannot open camera")
+        self.warmup_steps = 2
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.profile_key = profile_key(self.camera_index, width, height, self.backend.name)
+        self.load_calibration()
+        
+        self.status = "Warming up face tracking"
+        processed = 0
+        while self.running and processed < self.warmup_frames:
+            if not self.preprocessor.read(self.cap):
+                continue
+            self.backend.locate(self.preprocessor.model_input(), width, height)
+            processed += 1
+            self.warmup_steps = 2 + processed
+            
+    def _run(self):
+        try:
+            self._warm_up()
+        except Exception as e:
+            self.error = str(e)
+            self.status = f"Error: {e}"
+            self.running = False
+            return
+        self.status = "Ready" if self.is_calibrated else "Calibrating - look straight ahead"
+        self._track_eyes()
+        
+    def apply_tuning(self, settings):
+        """Use classifier settings from head_tuning.py"""
+        self.threshold_x = settings.get("threshold_x", self.threshold_x)
+        self.threshold_y = settings.get("threshold_y", self.threshold_y)
+        self.calibration_frames = settings.get("calibration_frames", self.calibration_frames)
+        self.calibration_ema = settings.get("calibration_ema", self.calibration_ema)
+        self.smoothing_frames = settings.get("smoothing_frames", self.smoothing_frames)
+        self.recent_points = deque(maxlen=self.smoothing_frames)
+        
+    def load_calibration(self):
+        """Apply the saved profile for this camera, if there is one"""
+        profile = load_profile(self.profile_key, self.profile_path)
+        if profile is None:
+            return False
+        self.calibrated_center = np.array(profile["center"], dtype=np.float32)
+        if self.tuning is None:
+            # Tuned thresholds win over the ones saved with the calibration
+            self.threshold_x = profile.get("threshold_x", self.threshold_x)
+            self.threshold_y = profile.get("threshold_y", self.threshold_y)
+        self.frame_count = self.calibration_frames
+        self.is_calibrated = True
+        self.refine_count = self.refine_frames
+        print(f"Loaded saved calibration for {self.profile_key}")
+        return True
+        
+    def save_calibration(self):
+        """Store the current calibration for this camera"""
+        try:
+            save_profile(self.profile_key, self.calibrated_center, self.threshold_x,
+                         self.threshold_y, self.profile_path)
+        except OSError as e:
+            print(f"Could not save calibration: {e}")
+        
     def stop(self):
         """Stop the eye tracking"""
         self.running = False
@@ -52,74 +165,71 @@ class HeadController:
             self.cap.release()
         if self.thread:
             self.thread.join()
+        self.backend.close()
             
-    def get_avg_iris_pos(self, landmarks, image_w, image_h, indices):
-        """Calculate average position of iris landmarks"""
-        coords = []
-        for i in indices:
-            pt = landmarks.landmark[i]
-            coords.append((int(pt.x * image_w), int(pt.y * image_h)))
-        coords = np.array(coords)
-        center = np.mean(coords, axis=0)
-        return center
-        
     def _track_eyes(self):
         """Main eye tracking loop"""
         while self.running:
-            ret, frame = self.cap.read()
-            if not ret:
+            metrics = self.metrics
+            governor = self.governor
+            if not self.preprocessor.read(self.cap):
+                if metrics is not None:
+                    metrics.read_failures.inc()
                 continue
                 
-            frame = cv2.flip(frame, 1)
-            h, w, _ = frame.shape
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = self.face_mesh.process(rgb)
+            # The frame is not flipped; landmark x coordinates are mirrored instead
+            h, w, _ = self.preprocessor.frame.shape
+            start = time.perf_counter()
+            scale = governor.inference_scale if governor is not None else 1.0
+            point, _ = self.backend.locate(self.preprocessor.model_input(scale), w, h)
+            inference = time.perf_counter() - start
+            if metrics is not None:
+                metrics.frame(inference)
+            if governor is not None:
+                governor.inference(inference)
             
-            if result.multi_face_landmarks:
-                landmarks = result.multi_face_landmarks[0]
-                
-                # Get iris positions
-                left_iris = self.get_avg_iris_pos(landmarks, w, h, self.left_iris_idx)
-                right_iris = self.get_avg_iris_pos(landmarks, w, h, self.right_iris_idx)
-                
-                # Calculate average iris position
-                avg_iris = (left_iris + right_iris) / 2
-                cx, cy = int(avg_iris[0]), int(avg_iris[1])
+            if point is not None:
+                # Average iris position, or the backend's equivalent point
+                self.recent_points.append(point)
+                if self.smoothing_frames > 1:
+                    point = np.mean(self.recent_points, axis=0)
+                cx, cy = int(point[0]), int(point[1])
                 
                 # Calibration phase
                 if not self.is_calibrated:
                     if self.calibrated_center is None:
                         self.calibrated_center = np.array([cx, cy], dtype=np.float32)
                     else:
-                        self.calibrated_center = 0.9 * self.calibrated_center + 0.1 * np.array([cx, cy], dtype=np.float32)
+                        ema = self.calibration_ema
+                        self.calibrated_center = (1 - ema) * self.calibrated_center + ema * np.array([cx, cy], dtype=np.float32)
                     
                     self.frame_count += 1
                     if self.frame_count >= self.calibration_frames:
                         self.is_calibrated = True
+                        self.status = "Ready"
                         print("Eye controller calibration complete!")
+                        self.save_calibration()
                 else:
                     # Calculate displacement from calibrated center
                     dx, dy = cx - self.calibrated_center[0], cy - self.calibrated_center[1]
                     
                     # Determine direction based on displacement with improved thresholds
-                    direction = "CENTER"
+                    direction = direction_from_offset(dx, dy, self.threshold_x, self.threshold_y)
                     
-                    # Use the larger movement to determine primary direction
-                    if abs(dx) > abs(dy):
-                        if dx > self.threshold_x:
-                            direction = "RIGHT"
-                        elif dx < -self.threshold_x:
-                            direction = "LEFT"
-                    else:
-                        if dy > self.threshold_y:
-                            direction = "DOWN"
-                        elif dy < -self.threshold_y:
-                            direction = "UP"
+                    # Refine a loaded calibration, only from frames where
+                    # the player is looking straight ahead
+                    if self.refine_count and direction == "CENTER":
+                        self.calibrated_center = 0.98 * self.calibrated_center + 0.02 * np.array([cx, cy], dtype=np.float32)
+                        self.refine_count -= 1
+                        if self.refine_count == 0:
+                            self.save_calibration()
                     
                     # Only update if direction changed
                     if direction != self.current_direction:
                         print(f"Eye direction changed: {self.current_direction} -> {direction} (dx={dx:.1f}, dy={dy:.1f})")
                         self.current_direction = direction
+                        if metrics is not None:
+                            metrics.direction_changed()
                     
             time.sleep(0.03)  # ~30 FPS
             
@@ -133,9 +243,21 @@ class HeadController:
         """Check if calibration is complete"""
         return self.is_calibrated
         
+    def is_ready(self):
+        """Model warm, camera running and calibrated"""
+        return self.warmup_steps == 2 + self.warmup_frames and self.is_calibrated
+        
+    def progress(self):
+        """Fraction of warm-up and calibration done (0 to 1)"""
+        total = 2 + self.warmup_frames + self.calibration_frames
+        return (self.warmup_steps + min(self.frame_count, self.calibration_frames)) / total
+        
     def reset_calibration(self):
         """Reset calibration"""
         self.calibrated_center = None
         self.frame_count = 0
         self.is_calibrated = False
+        self.refine_count = 0
         self.current_direction = "CENTER"
+        if self.running and self.warmup_steps == 2 + self.warmup_frames:
+            self.status = "Calibrating - look straight ahead"
@@ -0,0 +1,66 @@
+import threading
+import time
+import cv2
+import numpy as np
+
+def draw_overlay(image, overlay, scale=1.0):
+    """Draw tracking marks on an image; coordinates are in camera pixels
+    and scaled to the image.
+
+    overlay holds ('circle', (x, y), radius, color, thickness) and
+    ('text', text, (x, y), font_scale, color, thickness) entries."""
+    for mark in overlay:
+        if mark[0] == 'circle':
+            _, (x, y), radius, color, thickness = mark
+            if thickness > 0:
+                thickness = max(1, round(thickness * scale))
+            cv2.circle(image, (int(x * scale), int(y * scale)), max(1, round(radius * scale)),
+                       color, thickness)
+        else:
+            _, text, (x, y), font_scale, color, thickness = mark
+            cv2.putText(image, text, (int(x * scale), int(y * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                        font_scale * scale, color, max(1, round(thickness * scale)))
+
+class HeadMonitor:
+    """Small camera preview with the tracking overlay, shown inside the
+    game window.
+
+    The tracking thread publishes at most refresh_hz previews a second,
+    whatever the inference rate. Previews are double buffered; the game
+    thread blits the newest one through a Surface that wraps the buffer
+    (pygame.image.frombuffer), so nothing is copied per frame."""
+    def __init__(self, width=160, height=120, refresh_hz=10):
+        self.size = (width, height)
+        self.interval = 1 / refresh_hz
+        self.last_publish = 0
+        self.scratch = np.empty((height, width, 3), np.uint8)
+        self.buffers = [np.empty((height, width, 3), np.uint8) for _ in range(2)]
+        self.surfaces = [None, None]
+        self.front = None  # buffer holding the newest complete preview
+        self.lock = threading.Lock()
+
+    def publish(self, frame, overlay):
+        """Downscale, mirror and annotate a camera frame (tracking thread)"""
+        now = time.monotonic()
+        if now - self.last_publish < self.interval:
+            return
+        self.last_publish = now
+        # The game thread only reads the front buffer, so the other one is free
+        back = 1 if self.front == 0 else 0
+        cv2.resize(frame, self.size, dst=self.scratch, interpolation=cv2.INTER_AREA)
+        cv2.flip(self.scratch, 1, dst=self.buffers[back])
+        draw_overlay(self.buffers[back], overlay, self.size[0] / frame.shape[1])
+        with self.lock:
+            self.front = back
+
+    def draw(self, win, position):
+        """Blit the newest preview (game thread)"""
+        import pygame
+        with self.lock:
+            if self.front is None:
+                return
+            surface = self.surfaces[self.front]
+            if surface is None:
+                surface = pygame.image.frombuffer(self.buffers[self.front], self.size, 'BGR')
+                self.surfaces[self.front] = surface
+            win.blit(surface, position)
@@ -0,0 +1,302 @@
+import glob
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from calibration_profile import TUNING_PATH, save_tuning
+
+SESSION_DIR = "head_sessions"
+
+# Label codes in session files
+DIRECTIONS = ["CENTER", "UP", "DOWN", "LEFT", "RIGHT"]
+CENTER, UP, DOWN, LEFT, RIGHT = range(5)
+
+# What HeadController uses without tuning
+DEFAULT_SETTINGS = {"threshold_x": 12, "threshold_y": 10, "calibration_frames": 30,
+                    "calibration_ema": 0.1, "smoothing_frames": 1}
+
+# Settings swept by default; every threshold pair is evaluated at once
+THRESHOLDS = list(range(4, 32, 2))
+CALIBRATION_FRAMES = [10, 20, 30, 45, 60]
+CALIBRATION_EMAS = [0.05, 0.1, 0.2, 0.3]
+SMOOTHING_FRAMES = [1, 2, 3, 5]
+
+def record_session(out_dir=SESSION_DIR, backend_name="iris", camera_index=0, rounds=3, hold=2.0):
+    """Record tracking points while the player follows on-screen prompts.
+
+    Each frame is labeled with the prompt shown at the time, so a session
+    holds the direction the player meant next to what the tracker saw."""
+    import cv2
+    from camera import open_camera
+    from head_backends import create_backend
+    from preprocess import FramePreprocessor
+    backend = create_backend(backend_name)
+    backend.load()
+    cap = open_camera(camera_index)
+    if not cap.isOpened():
+        print("Cannot open camera")
+        return None
+
+    # Straight ahead first (calibration), then each direction once a round
+    # in random order, back to the center between them
+    prompts = [(CENTER, 4.0)]
+    for _ in range(rounds):
+        directions = [UP, DOWN, LEFT, RIGHT]
+        random.shuffle(directions)
+        for direction in directions:
+            prompts += [(direction, hold), (CENTER, hold)]
+    ends = list(itertools.accumulate(seconds for _, seconds in prompts))
+
+    preprocessor = FramePreprocessor()
+    times, points, labels = [], [], []
+    start = time.monotonic()
+    prompt = 0
+    completed = True
+    while True:
+        if not preprocessor.read(cap):
+            continue
+        now = time.monotonic() - start
+        while prompt < len(prompts) and now >= ends[prompt]:
+            prompt += 1
+        if prompt == len(prompts):
+            break
+        h, w, _ = preprocessor.frame.shape
+        point, _ = backend.locate(preprocessor.model_input(), w, h)
+        label = prompts[prompt][0]
+        times.append(now)
+        points.append((np.nan, np.nan) if point is None else point)
+        labels.append(label)
+
+        frame = preprocessor.mirrored()
+        text = "Look straight ahead" if label == CENTER else f"Turn {DIRECTIONS[label]}"
+        cv2.putText(frame, text, (30, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 255), 3)
+        if point is None:
+            cv2.putText(frame, "No face", (30, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        cv2.imshow("Head tuning session", frame)
+        if cv2.waitKey(1) & 0xFF == 27:  # ESC
+            completed = False
+            break
+    cap.release()
+    backend.close()
+    cv2.destroyAllWindows()
+    if not completed:
+        print("Session aborted, nothing saved")
+        return None
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, time.strftime(f"{backend.name}-%Y%m%d-%H%M%S.npz"))
+    np.savez_compressed(path, times=np.array(times), points=np.array(points, dtype=np.float32),
+                        labels=np.array(labels, dtype=np.int8), backend=backend.name,
+                        size=np.array([w, h]))
+    found = np.isfinite(points).all(axis=1).mean() if points else 0
+    print(f"Saved {len(times)} frames to {path} (face in {found:.0%})")
+    return path
+
+def session_paths(paths):
+    """Session files from a mix of files and directories"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found += sorted(glob.glob(os.path.join(path, "*.npz")))
+        else:
+            found.append(path)
+    return found
+
+def load_session(path):
+    """Frames with a face only: the controller does nothing without one"""
+    with np.load(path) as data:
+        points = data["points"].astype(np.float64)
+        found = np.isfinite(points).all(axis=1)
+        return {"path": path, "backend": str(data["backend"]), "times": data["times"][found],
+                "points": points[found], "labels": data["labels"][found].astype(np.int64)}
+
+def smooth(points, frames):
+    """Mean of the last `frames` points at every frame (fewer at the start)"""
+    if frames <= 1:
+        return points
+    sums = np.cumsum(np.vstack([np.zeros((1, 2)), points]), axis=0)
+    ends = np.arange(1, len(points) + 1)
+    starts = np.maximum(ends - frames, 0)
+    return (sums[ends] - sums[starts]) / (ends - starts)[:, None]
+
+def calibrated_center(points, frames, ema):
+    """Center after the calibration: the first point, then an EMA over the
+    next frames - 1, step by step in float32 as HeadController computes it"""
+    center = points[0].astype(np.float32)
+    for point in points[1:frames].astype(np.float32):
+        center = (1 - ema) * center + ema * point
+    return center
+
+def classify(dx, dy, threshold_x, threshold_y):
+    """direction_from_offset for every frame (columns) and every threshold
+    pair (rows) at once"""
+    tx = threshold_x[:, None]
+    ty = threshold_y[:, None]
+    horizontal = np.where(dx > tx, RIGHT, np.where(dx < -tx, LEFT, CENTER))
+    vertical = np.where(dy > ty, DOWN, np.where(dy < -ty, UP, CENTER))
+    return np.where(np.abs(dx) > np.abs(dy), horizontal, vertical)
+
+def evaluate(session, calibration_frames, calibration_ema, smoothing_frames, threshold_x, threshold_y):
+    """Correct frames, frames scored, summed latency (s) and misses per
+    threshold pair, plus the number of prompted moves.
+
+    Latency is the time from the first frame of a prompt to the first frame
+    classified as that direction; a miss counts as the whole prompt."""
+    # HeadController works on whole pixels: int() of the smoothed point
+    points = np.trunc(smooth(session["points"], smoothing_frames))
+    if len(points) <= calibration_frames:
+        return None
+    center = calibrated_center(points, calibration_frames, calibration_ema)
+    offsets = points[calibration_frames:].astype(np.float32) - center
+    labels = session["labels"][calibration_frames:]
+    times = session["times"][calibration_frames:]
+    predicted = classify(offsets[:, 0], offsets[:, 1], threshold_x, threshold_y)
+    correct = (predicted == labels).sum(axis=1)
+
+    pairs = len(threshold_x)
+    latency = np.zeros(pairs)
+    misses = np.zeros(pairs, dtype=np.int64)
+    changes = np.flatnonzero(np.diff(labels)) + 1
+    bounds = np.append(changes, len(labels))
+    moves = 0
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        label = labels[start]
+        if label == CENTER:
+            continue
+        moves += 1
+        hits = predicted[:, start:end] == label
+        hit = hits.any(axis=1)
+        first = np.where(hit, hits.argmax(axis=1), end - 1 - start)
+        latency += times[start + first] - times[start]
+        misses += ~hit
+    return correct, len(labels), latency, misses, moves
+
+_sessions = None
+
+def _load_sessions(paths):
+    global _sessions
+    _sessions = [load_session(path) for path in paths]
+
+def _evaluate_setting(setting, threshold_x, threshold_y):
+    """Totals over all sessions for one (calibration, smoothing) setting;
+    runs in a worker process"""
+    calibration_frames, calibration_ema, smoothing_frames = setting
+    pairs = len(threshold_x)
+    correct = np.zeros(pairs, dtype=np.int64)
+    latency = np.zeros(pairs)
+    misses = np.zeros(pairs, dtype=np.int64)
+    frames = moves = 0
+    for session in _sessions:
+        result = evaluate(session, calibration_frames, calibration_ema, smoothing_frames,
+                          threshold_x, threshold_y)
+        if result is None:
+            continue
+        correct += result[0]
+        frames += result[1]
+        latency += result[2]
+        misses += result[3]
+        moves += result[4]
+    return setting, correct, frames, latency, misses, moves
+
+def tune(paths, workers=None, latency_weight=0.1, thresholds=THRESHOLDS,
+         calibration_frames=CALIBRATION_FRAMES, calibration_emas=CALIBRATION_EMAS,
+         smoothing_frames=SMOOTHING_FRAMES, top=10):
+    """Sweep the settings over the sessions in parallel; returns the results
+    sorted best first as dicts. The score is accuracy minus latency_weight
+    per second of mean latency."""
+    threshold_x = np.repeat(thresholds, len(thresholds)).astype(np.float64)
+    threshold_y = np.tile(thresholds, len(thresholds)).astype(np.float64)
+    settings = list(itertools.product(calibration_frames, calibration_emas, smoothing_frames))
+    workers = workers or os.cpu_count() or 1
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_load_sessions, initargs=(paths,)) as pool:
+        futures = [pool.submit(_evaluate_setting, setting, threshold_x, threshold_y) for setting in settings]
+        for future in futures:
+            setting, correct, frames, latency, misses, moves = future.result()
+            if not frames or not moves:
+                continue
+            accuracy = correct / frames
+            mean_latency = latency / moves
+            score = accuracy - latency_weight * mean_latency
+            for i in range(len(threshold_x)):
+                results.append({
+                    "threshold_x": int(threshold_x[i]), "threshold_y": int(threshold_y[i]),
+                    "calibration_frames": setting[0], "calibration_ema": setting[1],
+                    "smoothing_frames": setting[2], "accuracy": float(accuracy[i]),
+                    "latency_ms": float(mean_latency[i] * 1000), "missed": int(misses[i]),
+                    "moves": moves, "score": float(score[i]),
+                })
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda r: r["score"], reverse=True)
+    print(f"{len(results)} settings over {len(paths)} sessions in {elapsed:.1f}s ({workers} processes)")
+    print_results(results[:top])
+    return results
+
+def print_results(results):
+    print(f"{'tx':>4} {'ty':>4} {'cal':>4} {'ema':>5} {'smooth':>6} {'accuracy':>9} {'latency':>9} {'missed':>7}")
+    for r in results:
+        print(f"{r['threshold_x']:>4} {r['threshold_y']:>4} {r['calibration_frames']:>4} "
+              f"{r['calibration_ema']:>5} {r['smoothing_frames']:>6} {r['accuracy']:>9.1%} "
+              f"{r['latency_ms']:>7.0f}ms {r['missed']:>3}/{r['moves']}")
+
+def _numbers(text, kind=int):
+    return [kind(value) for value in text.split(",")]
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Record labeled head tracking sessions and tune the "
+                                                 "direction classifier on them")
+    parser.add_argument("sessions", nargs="*", default=[SESSION_DIR], help="session files or directories")
+    parser.add_argument("--record", action="store_true", help="record a new session from the camera")
+    parser.add_argument("--backend", default="iris", help="tracking backend to record or tune")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--rounds", type=int, default=3, help="prompts per direction when recording")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--latency-weight", type=float, default=0.1,
+                        help="accuracy given up per second of mean latency")
+    parser.add_argument("--thresholds", type=_numbers, default=THRESHOLDS)
+    parser.add_argument("--calibration-frames", type=_numbers, default=CALIBRATION_FRAMES)
+    parser.add_argument("--calibration-ema", type=lambda text: _numbers(text, float), default=CALIBRATION_EMAS)
+    parser.add_argument("--smoothing", type=_numbers, default=SMOOTHING_FRAMES)
+    parser.add_argument("--out", default=TUNING_PATH, help="where the best settings are written")
+    parser.add_argument("--dry-run", action="store_true", help="report only, write nothing")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        return 0 if record_session(args.sessions[0], args.backend, args.camera, args.rounds) else 1
+
+    paths = []
+    for path in session_paths(args.sessions):
+        with np.load(path) as data:
+            if str(data["backend"]) == args.backend:
+                paths.append(path)
+    if not paths:
+        print(f"No {args.backend} sessions in {', '.join(args.sessions)}; record some with --record")
+        return 1
+    results = tune(paths, args.workers, args.latency_weight, args.thresholds, args.calibration_frames,
+                   args.calibration_ema, args.smoothing)
+    if not results:
+        print("Sessions too short to score")
+        return 1
+
+    # How the current settings do, for comparison
+    default = next((r for r in results
+                    if all(r[key] == value for key, value in DEFAULT_SETTINGS.items())), None)
+    if default is not None:
+        print("Current defaults:")
+        print_results([default])
+    if not args.dry_run:
+        best = results[0]
+        save_tuning(args.backend, {key: best[key] for key in DEFAULT_SETTINGS} |
+                    {"accuracy": best["accuracy"], "latency_ms": best["latency_ms"], "sessions": len(paths)},
+                    args.out)
+        print(f"Best settings for {args.backend} written to {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,170 @@
+import os
+import queue
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+LEADERBOARD_PATH = "leaderboard.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_score ON games (score DESC);
+CREATE INDEX IF NOT EXISTS games_by_mode_score ON games (mode, score DESC);
+CREATE INDEX IF NOT EXISTS games_by_player ON games (player, finished_at DESC);
+"""
+
+INSERT = ("INSERT INTO games (player, score, length, duration_ms, mode, finished_at) "
+          "VALUES (?, ?, ?, ?, ?, ?)")
+
+class Leaderboard:
+    """Finished games in SQLite, written in batches by a background thread.
+
+    record() only queues a row, so a game over never waits for the disk.
+    Queries run on the caller's own connection; WAL mode lets them read
+    while the writer commits."""
+    def __init__(self, path=LEADERBOARD_PATH, batch_size=256, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue()
+        self.reader = None
+        db = self._connect()
+        db.executescript(SCHEMA)
+        db.close()
+        self.thread = threading.Thread(target=self._write_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def record(self, player, score, length, duration_ms, mode):
+        """Queue one finished game"""
+        self.pending.put((player, score, length, duration_ms, mode, time.time()))
+
+    def _write_loop(self):
+        db = self._connect()
+        running = True
+        while running:
+            # Wait for a row, then collect more for up to flush_interval
+            rows = [self.pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size and rows[-1] is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    rows.append(self.pending.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if rows[-1] is None:
+                running = False
+                rows.pop()
+            try:
+                with db:
+                    db.executemany(INSERT, rows)
+            except sqlite3.Error as e:
+                print(f"Leaderboard write failed ({len(rows)} games lost): {e}")
+            for _ in range(len(rows) + (not running)):
+                self.pending.task_done()
+        db.close()
+
+    def flush(self):
+        """Wait until every queued game is on disk"""
+        self.pending.join()
+
+    def close(self):
+        """Write what is queued and stop the writer thread"""
+        self.pending.put(None)
+        self.thread.join()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def _query(self, sql, params):
+        if self.reader is None:
+            self.reader = sqlite3.connect(self.path)
+        return self.reader.execute(sql, params).fetchall()
+
+    def top(self, n=10, mode=None):
+        """Best n games as (player, score, length, duration_ms, mode, finished_at)"""
+        if mode is None:
+            return self._query("SELECT player, score, length, duration_ms, mode, finished_at "
+                               "FROM games ORDER BY score DESC LIMIT ?", (n,))
+        return self._query("SELECT player, score, length, duration_ms, mode, finished_at "
+                           "FROM games WHERE mode = ? ORDER BY score DESC LIMIT ?", (mode, n))
+
+    def history(self, player, n=20):
+        """A player's most recent n games, newest first"""
+        return self._query("SELECT player, score, length, duration_ms, mode, finished_at "
+                           "FROM games WHERE player = ? ORDER BY finished_at DESC LIMIT ?",
+                           (player, n))
+
+def print_games(rows):
+    for rank, (player, score, length, duration_ms, mode, finished_at) in enumerate(rows, 1):
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(finished_at))
+        print(f"{rank:>3}. {player:<16} {score:>5} pts  length {length:>4}  "
+              f"{duration_ms / 1000:>6.1f}s  {mode:<12} {when}")
+
+def benchmark(games):
+    """Time queued inserts and indexed queries on a throwaway database"""
+    with tempfile.TemporaryDirectory() as directory:
+        board = Leaderboard(os.path.join(directory, "bench.db"))
+        rng = random.Random(0)
+        players = [f"player{i}" for i in range(500)]
+        modes = ["head", "keyboard", "autopilot", "hamiltonian"]
+        start = time.perf_counter()
+        for _ in range(games):
+            board.record(rng.choice(players), rng.randrange(200), rng.randrange(1, 600),
+                         rng.randrange(1000, 600000), rng.choice(modes))
+        queued = time.perf_counter() - start
+        board.flush()
+        written = time.perf_counter() - start
+        print(f"{games} games: record() {queued / games * 1e6:.1f} us each, "
+              f"all on disk after {written:.2f}s")
+
+        for label, query in (("top 10", lambda: board.top(10)),
+                             ("top 10 for one mode", lambda: board.top(10, "head")),
+                             ("history of one player", lambda: board.history("player7"))):
+            start = time.perf_counter()
+            for _ in range(1000):
+                query()
+            print(f"{label}: {(time.perf_counter() - start) * 1000:.1f} us per query")
+        board.close()
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Show the snake leaderboard")
+    parser.add_argument("--db", default=LEADERBOARD_PATH)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--mode", help="only games played in this control mode")
+    parser.add_argument("--player", help="show this player's recent games instead")
+    parser.add_argument("--bench", type=int, metavar="GAMES", help="time inserts and queries on a scratch database")
+    args = parser.parse_args(argv)
+    if args.bench:
+        benchmark(args.bench)
+        return 0
+    board = Leaderboard(args.db)
+    if args.player:
+        print_games(board.history(args.player, args.top))
+    else:
+        print_games(board.top(args.top, args.mode))
+    board.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,165 @@
+import struct
+import sys
+import time
+import numpy as np
+from snake import DIRECTIONS, DIRECTION_CODES
+
+# Level file layout: a 64-byte header, then the wall grid packed eight
+# cells to a byte, row after row (most significant bit is the leftmost
+# cell), each row padded to whole bytes. The grid is never parsed: it is
+# memory-mapped and read in place.
+LEVEL_MAGIC = b'SNKLEVEL'
+LEVEL_VERSION = 1
+HEADER = struct.Struct('<8sHIIIIB32s5x')  # magic, version, width, height, spawn x, spawn y, direction, name
+
+# Set bits in every byte value
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+class Level:
+    """Walls and spawn point of a board, read straight from a level file.
+
+    is_wall() is a couple of integer operations on the mapped bytes, so
+    the game, the food spawner and the renderers can all ask the same
+    bitmap without building a set of cells."""
+    def __init__(self, width, height, bits, spawn=(0, 0), direction='RIGHT', name=""):
+        self.width = width
+        self.height = height
+        self.stride = (width + 7) // 8
+        # (height, stride) uint8 array: a memmap, or an array for generated levels
+        self.rows = bits.reshape(height, self.stride)
+        # Byte lookups through a memoryview give plain ints, much faster than numpy scalars
+        self.bits = memoryview(bits.reshape(-1))
+        self.spawn = spawn
+        self.direction = direction
+        self.name = name
+
+    def is_wall(self, cell):
+        x, y = cell
+        return self.bits[y * self.stride + (x >> 3)] >> (7 - (x & 7)) & 1 == 1
+
+    def walls_in(self, x, y, width, height):
+        """(height, width) bool array of the walls in a rectangle of the board"""
+        first, last = x // 8, (x + width + 7) // 8
+        block = np.unpackbits(self.rows[y:y + height, first:last], axis=1)
+        return block[:, x - first * 8:x - first * 8 + width].astype(bool)
+
+    def wall_cells(self, x, y, width, height):
+        """Wall cells in a rectangle of the board, for drawing"""
+        rows, columns = np.nonzero(self.walls_in(x, y, width, height))
+        return zip((columns + x).tolist(), (rows + y).tolist())
+
+    def wall_mask(self):
+        """One byte per cell, 1 for walls, row after row (an OccupancyGrid base)"""
+        return np.unpackbits(self.rows, axis=1)[:, :self.width].tobytes()
+
+    def wall_count(self):
+        # Row padding is always zero, so every set bit is a wall
+        return int(POPCOUNT[self.rows].sum(dtype=np.int64))
+
+    def __repr__(self):
+        return f"Level({self.name!r}, {self.width}x{self.height})"
+
+def load_level(path):
+    """Map a level file; only the header is read now, rows are paged in when used"""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a level file")
+    magic, version, width, height, x, y, direction, name = HEADER.unpack(header)
+    if magic != LEVEL_MAGIC or version != LEVEL_VERSION:
+        raise ValueError(f"{path} is not a version {LEVEL_VERSION} level file")
+    bits = np.memmap(path, np.uint8, 'r', HEADER.size, ((width + 7) // 8) * height)
+    return Level(width, height, bits, (x, y), DIRECTIONS[direction], name.rstrip(b'\0').decode())
+
+def save_level(path, walls, spawn=(0, 0), direction='RIGHT', name=""):
+    """Write a (height, width) bool array of walls as a level file"""
+    walls = np.asarray(walls, dtype=bool)
+    height, width = walls.shape
+    if walls[spawn[1], spawn[0]]:
+        raise ValueError(f"Spawn point {spawn} is inside a wall")
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(LEVEL_MAGIC, LEVEL_VERSION, width, height, spawn[0], spawn[1],
+                            DIRECTION_CODES[direction], name.encode()[:32]))
+        f.write(np.packbits(walls, axis=1).tobytes())
+    return path
+
+def parse_text(text):
+    """Hand-drawn level: '#' is a wall, 'S' the spawn point, anything else
+    free. Returns (walls, spawn)."""
+    lines = [line.rstrip("\n") for line in text.splitlines() if line.strip()]
+    width = max(len(line) for line in lines)
+    walls = np.zeros((len(lines), width), dtype=bool)
+    spawn = None
+    for y, line in enumerate(lines):
+        for x, char in enumerate(line):
+            if char == '#':
+                walls[y, x] = True
+            elif char == 'S':
+                spawn = (x, y)
+    if spawn is None:
+        free = np.argwhere(~walls)
+        if not len(free):
+            raise ValueError("Level has no free cell")
+        spawn = (int(free[0][1]), int(free[0][0]))
+    return walls, spawn
+
+def generate(width, height, seed=0, rooms=1.0, density=0.002):
+    """Procedural walls: hollow rooms (about rooms per 10,000 cells) with a
+    door in each side, plus scattered single blocks"""
+    if width < 12 or height < 12:
+        raise ValueError("Generated levels need at least 12x12 cells")
+    rng = np.random.default_rng(seed)
+    walls = np.zeros((height, width), dtype=bool)
+    for _ in range(max(1, int(width * height * rooms / 10000))):
+        w = rng.integers(6, min(20, width - 4))
+        h = rng.integers(6, min(20, height - 4))
+        x, y = rng.integers(0, width - w), rng.integers(0, height - h)
+        walls[y, x:x + w] = walls[y + h - 1, x:x + w] = True
+        walls[y:y + h, x] = walls[y:y + h, x + w - 1] = True
+        walls[y, x + w // 2] = walls[y + h - 1, x + w // 2] = False
+        walls[y + h // 2, x] = walls[y + h // 2, x + w - 1] = False
+    walls |= rng.random((height, width)) < density
+    # Keep the middle free for the spawn point
+    cx, cy = width // 2, height // 2
+    walls[max(0, cy - 2):cy + 3, max(0, cx - 2):cx + 3] = False
+    return walls, (cx, cy)
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Build, generate and inspect level files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    text = commands.add_parser("text", help="convert a hand-drawn text level")
+    text.add_argument("source")
+    text.add_argument("output")
+    text.add_argument("--name", default="")
+    generated = commands.add_parser("generate", help="procedurally generate a level")
+    generated.add_argument("output")
+    generated.add_argument("--size", type=int, default=1000, help="board width and height in cells")
+    generated.add_argument("--seed", type=int, default=0)
+    generated.add_argument("--density", type=float, default=0.002, help="share of cells that are single blocks")
+    generated.add_argument("--name", default="")
+    info = commands.add_parser("info", help="load a level and report its size and load time")
+    info.add_argument("level")
+    args = parser.parse_args(argv)
+
+    if args.command == "text":
+        with open(args.source) as f:
+            walls, spawn = parse_text(f.read())
+        print(f"Saved {save_level(args.output, walls, spawn, name=args.name)}")
+    elif args.command == "generate":
+        start = time.perf_counter()
+        walls, spawn = generate(args.size, args.size, args.seed, density=args.density)
+        save_level(args.output, walls, spawn, name=args.name or f"generated-{args.seed}")
+        print(f"Saved {args.output} ({args.size}x{args.size}) in {time.perf_counter() - start:.2f}s")
+    else:
+        start = time.perf_counter()
+        level = load_level(args.level)
+        loaded = time.perf_counter() - start
+        print(f"{level.name or args.level}: {level.width}x{level.height}, spawn {level.spawn} {level.direction}, "
+              f"loaded in {loaded * 1000:.2f} ms")
+        start = time.perf_counter()
+        print(f"{level.wall_count()} walls (counted in {(time.perf_counter() - start) * 1000:.0f} ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,18 +1,27 @@
 import pygame
-import cv2
 import sys
 import time
 import threading
-import numpy as np
-from snake import Snake
-from food import Food
-from game import Game
-from head_controller import HeadController
-import random
-import math
+from collections import deque
+from simulation import Simulation
+from autopilot import Autopilot
+from hamiltonian import HamiltonianPilot
+from replay import SessionRecorder, new_session_path
+from renderer import GameRenderer
+from leaderboard import Leaderboard
+# The vision stack (cv2, numpy, mediapipe) and the video encoder are only
+# imported by the code paths that use them, so other modes start quickly
 
-class SnakeGame:
-    def __init__(self):
+class SnakeGame(Simulation):
+    def __init__(self, seed=None, bot=None, record_video=False, record_camera=False, player_name="Player",
+                 monitor_hz=10, cv_window=False, head_backend="iris", level=None, metrics_port=None,
+                 governor=True):
+        super().__init__(seed=seed, level=level)
+        # Session logs do not name a level, so games on one are not recorded
+        self.recorder = SessionRecorder(self.seed) if level is None else None
+        self.leaderboard = Leaderboard()
+        self.player_name = player_name
+        self.control_mode = "head" if bot is None else bot.__name__.lower()
         pygame.init()
         self.width = 500  # Smaller square screen
         self.height = 700  # Reduced height
@@ -22,54 +31,92 @@ class SnakeGame:
         pygame.display.set_caption("Snake Game - Eye Controlled")
         self.clock = pygame.time.Clock()
         
-        # Game objects
-        self.snake = Snake()
-        self.food = Food(self.snake.body)
-        self.game = Game()
-        
-        # Eye controller
-        self.eye_controller = HeadController()
+        # Eye controller (or a computer player class for demo mode)
+        self.autopilot = bot is not None
+        if bot is not None:
+            self.eye_controller = bot(self)
+        else:
+            from head_controller import HeadController
+            self.eye_controller = HeadController(backend=head_backend)
+        self.head_backend = head_backend
         
         # Webcam window
         self.cap = None
         self.webcam_thread = None
         self.webcam_running = False
         
+        # Head monitor: a preview in the game window, optionally also the
+        # full-size OpenCV window
+        self.head_monitor = None
+        self.monitor_hz = monitor_hz
+        self.cv_window = cv_window
+        
         # Game state
         self.running = True
-        self.game_over = False
-        self.paused = False
         
         # Movement control - improved accuracy
         self.last_direction = "CENTER"
-        self.last_move_time = 0
-        self.move_delay = 200  # milliseconds - faster for better responsiveness
         self.auto_move_delay = 600  # milliseconds
         self.last_auto_move_time = 0
         self.auto_move_enabled = False
-        
-        # Bonus food system
-        self.bonus_food_active = False
-        self.bonus_food_position = None
-        self.bonus_food_spawn_time = 0
-        self.bonus_food_duration = 5000  # 5 seconds in milliseconds
-        self.food_count = 0
-        
-        # Hit effect
-        self.hit_effect_active = False
-        self.hit_effect_position = None
-        self.hit_effect_start_time = 0
-        self.hit_effect_duration = 1000  # 1 second
-        
-        # Colors
-        self.BLACK = (0, 0, 0)
-        self.WHITE = (255, 255, 255)
-        self.RED = (255, 0, 0)
-        self.GREEN = (0, 255, 0)
-        self.ORANGE = (255, 165, 0)
-        self.DARK_ORANGE = (255, 140, 0)
-        self.LIGHT_ORANGE = (255, 190, 0)
-        self.YELLOW = (255, 255, 0)
+        self.auto_move_timer = None
+        
+        # Debug: print the current states every second of game time
+        self.schedule(1000, self.print_states, repeat=True)
+        
+        # Drawing (shared with the test mode and offscreen capture)
+        self.renderer = GameRenderer(self.width, self.height)
+        
+        # Video recording (V toggles it; encoding runs on worker threads)
+        self.video = None
+        self.camera_video = None
+        self.record_video = record_video
+        self.record_camera = record_camera
+        self.video_fps = 30
+        self.last_video_frame = 0
+        
+        # Sheds drawing and tracking quality while frames run late
+        self.governor = None
+        if governor:
+            from governor import QualityGovernor
+            self.governor = QualityGovernor()
+            if not self.autopilot:
+                self.eye_controller.governor = self.governor
+        
+        # Performance counters served over HTTP for unattended kiosks
+        self.metrics = None
+        self.webcam_metrics = None
+        self.metrics_server = None
+        if metrics_port is not None:
+            self.setup_metrics(metrics_port)
+        
+    def setup_metrics(self, port):
+        """Count frames, ticks and tracking work, and serve the counts in
+        the Prometheus text format on localhost (from its own thread)"""
+        from metrics import GameMetrics, Gauge, LoopMetrics, MetricsServer, Registry
+        registry = Registry()
+        self.metrics = GameMetrics(registry)
+        controller = self.eye_controller
+        if not self.autopilot:
+            controller.metrics = LoopMetrics(registry, "tracker")
+            self.webcam_metrics = LoopMetrics(registry, "webcam")
+            registry.add(Gauge("snake_calibration_progress", "Head tracking warm-up and calibration done (0 to 1)",
+                               read=controller.progress))
+        registry.add(Gauge("snake_calibrated", "1 once head tracking is calibrated",
+                           read=lambda: int(controller.is_calibration_complete())))
+        registry.add(Gauge("snake_video_dropped_frames", "Frames the current game recording dropped",
+                           read=lambda: self._dropped_frames(self.video)))
+        registry.add(Gauge("snake_camera_video_dropped_frames", "Frames the current camera recording dropped",
+                           read=lambda: self._dropped_frames(self.camera_video)))
+        registry.add(Gauge("snake_score", "Score of the current game", read=lambda: self.game.score))
+        if self.governor is not None:
+            registry.add(Gauge("snake_quality_level", "Quality stages shed by the governor (0: full quality)",
+                               read=lambda: self.governor.level))
+        self.metrics_server = MetricsServer(registry, port)
+        
+    @staticmethod
+    def _dropped_frames(video):
+        return video.dropped if video is not None else 0
         
     def start_eye_tracking(self):
         """Start the eye tracking system"""
@@ -82,12 +129,11 @@ class SnakeGame:
         return True
         
     def start_webcam_window(self):
-        """Start webcam window in separate thread"""
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
-            print("Cannot open camera for webcam window")
-            return False
-            
+        """Start the head monitor in a separate thread (the camera is opened
+        there too, once the head tracker is ready, so the start menu stays
+        responsive)"""
+        from head_monitor import HeadMonitor
+        self.head_monitor = HeadMonitor(refresh_hz=self.monitor_hz)
         self.webcam_running = True
         self.webcam_thread = threading.Thread(target=self._webcam_loop)
         self.webcam_thread.daemon = True
@@ -96,74 +142,99 @@ class SnakeGame:
         
     def _webcam_loop(self):
         """Webcam display loop - also controls the snake"""
-        import mediapipe as mp
-        mp_face_mesh = mp.solutions.face_mesh
-        face_mesh = mp_face_mesh.FaceMesh(
-            static_image_mode=False, 
-            refine_landmarks=True,
-            max_num_faces=1,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        # Iris landmark indices
-        left_iris_idx = [474, 475, 476, 477]
-        right_iris_idx = [469, 470, 471, 472]
+        import cv2
+        import numpy as np
+        # Let the eye controller negotiate the camera first, then open it in
+        # the same capture mode
+        controller = self.eye_controller
+        while self.webcam_running and not controller.is_ready():
+            if controller.error:
+                return
+            time.sleep(0.05)
+        if not self.webcam_running:
+            return
+        from camera import open_camera
+        self.cap = open_camera(0, probe_modes=False)
+        if not self.cap.isOpened():
+            print("Cannot open camera for webcam window")
+            return
+            
+        from preprocess import FramePreprocessor
+        from head_backends import create_backend
+        from head_controller import direction_from_offset
+        from head_monitor import draw_overlay
+        # Same tracking model as the eye controller
+        backend = create_backend(self.head_backend)
+        backend.load()
         
         calibrated_center = None
         frame_count = 0
-        calibration_frames = 30
         is_calibrated = False
         
-        # Same thresholds as eye controller
-        threshold_x = 12
-        threshold_y = 10
-        
-        def get_avg_iris_pos(landmarks, image_w, image_h, indices):
-            coords = []
-            for i in indices:
-                pt = landmarks.landmark[i]
-                coords.append((int(pt.x * image_w), int(pt.y * image_h)))
-            coords = np.array(coords)
-            center = np.mean(coords, axis=0)
-            return center
-        
+        # Same thresholds, calibration and smoothing as the eye controller
+        threshold_x = controller.threshold_x
+        threshold_y = controller.threshold_y
+        calibration_frames = controller.calibration_frames
+        calibration_ema = controller.calibration_ema
+        recent_points = deque(maxlen=controller.smoothing_frames)
+        
+        # Start from the eye controller's saved calibration when there is one
+        from calibration_profile import load_profile, profile_key
+        profile = load_profile(profile_key(0, int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                                           int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), backend.name))
+        if profile is not None:
+            calibrated_center = np.array(profile["center"], dtype=np.float32)
+            if controller.tuning is None:
+                threshold_x = profile.get("threshold_x", threshold_x)
+                threshold_y = profile.get("threshold_y", threshold_y)
+            is_calibrated = True
+        
+        # Capture, model input and monitor image reuse the same buffers every frame
+        preprocessor = FramePreprocessor()
+        metrics = self.webcam_metrics
+        last_direction = "CENTER"
         while self.webcam_running:
-            ret, frame = self.cap.read()
-            if not ret:
+            if not preprocessor.read(self.cap):
+                if metrics is not None:
+                    metrics.read_failures.inc()
                 continue
                 
-            frame = cv2.flip(frame, 1)
-            h, w, _ = frame.shape
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = face_mesh.process(rgb)
-            
-            if result.multi_face_landmarks:
-                landmarks = result.multi_face_landmarks[0]
-                
-                # Get iris positions
-                left_iris = get_avg_iris_pos(landmarks, w, h, left_iris_idx)
-                right_iris = get_avg_iris_pos(landmarks, w, h, right_iris_idx)
-                
-                # Calculate average iris position
-                avg_iris = (left_iris + right_iris) / 2
-                cx, cy = int(avg_iris[0]), int(avg_iris[1])
+            h, w, _ = preprocessor.frame.shape
+            governor = self.governor
+            start = time.perf_counter()
+            scale = governor.inference_scale if governor is not None else 1.0
+            point, marks = backend.locate(preprocessor.model_input(scale), w, h)
+            inference = time.perf_counter() - start
+            if metrics is not None:
+                metrics.frame(inference)
+            if governor is not None:
+                governor.inference(inference)
+            
+            # Marks for the monitor, drawn only when a preview is shown
+            overlay = []
+            if point is not None:
+                # Average iris position, or the backend's equivalent point
+                recent_points.append(point)
+                if len(recent_points) > 1:
+                    point = np.mean(recent_points, axis=0)
+                cx, cy = int(point[0]), int(point[1])
                 
-                # Draw iris positions
-                cv2.circle(frame, tuple(np.int32(left_iris)), 3, (0, 255, 255), -1)
-                cv2.circle(frame, tuple(np.int32(right_iris)), 3, (0, 255, 255), -1)
-                cv2.circle(frame, (cx, cy), 5, (0, 255, 0), -1)
+                # Draw the points it came from (irises, eyes or nose)
+                for mark in marks:
+                    overlay.append(('circle', tuple(np.int32(mark)), 3, (0, 255, 255), -1))
+                overlay.append(('circle', (cx, cy), 5, (0, 255, 0), -1))
                 
                 # Calibration phase
                 if not is_calibrated:
                     if calibrated_center is None:
                         calibrated_center = np.array([cx, cy], dtype=np.float32)
                     else:
-                        calibrated_center = 0.9 * calibrated_center + 0.1 * np.array([cx, cy], dtype=np.float32)
+                        calibrated_center = ((1 - calibration_ema) * calibrated_center +
+                                             calibration_ema * np.array([cx, cy], dtype=np.float32))
                     
                     frame_count += 1
-                    cv2.putText(frame, f"Calibrating... {frame_count}/{calibration_frames}", 
-                               (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
+                    overlay.append(('text', f"Calibrating... {frame_count}/{calibration_frames}",
+                                    (30, 50), 1, (255, 255, 0), 2))
                     
                     if frame_count >= calibration_frames:
                         is_calibrated = True
@@ -173,39 +244,70 @@ class SnakeGame:
                     dx, dy = cx - calibrated_center[0], cy - calibrated_center[1]
                     
                     # Determine direction
-                    eye_direction = "CENTER"
-                    if abs(dx) > abs(dy):
-                        if dx > threshold_x:
-                            eye_direction = "RIGHT"
-                        elif dx < -threshold_x:
-                            eye_direction = "LEFT"
-                    else:
-                        if dy > threshold_y:
-                            eye_direction = "DOWN"
-                        elif dy < -threshold_y:
-                            eye_direction = "UP"
+                    eye_direction = direction_from_offset(dx, dy, threshold_x, threshold_y)
                     
                     # Update the eye controller's direction for the game
                     self.eye_controller.current_direction = eye_direction
+                    if metrics is not None and eye_direction != last_direction:
+                        metrics.direction_changed()
+                    last_direction = eye_direction
                     
                     # Draw direction and displacement
-                    cv2.putText(frame, f'Eye: {eye_direction}', (30, 50), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 0, 255), 3)
-                    cv2.putText(frame, f'dx: {dx:.1f}, dy: {dy:.1f}', (30, 100), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+                    overlay.append(('text', f'Eye: {eye_direction}', (30, 50), 1.2, (255, 0, 255), 3))
+                    overlay.append(('text', f'dx: {dx:.1f}, dy: {dy:.1f}', (30, 100), 0.8, (255, 255, 255), 2))
                     
                     # Draw calibrated center
-                    cv2.circle(frame, tuple(np.int32(calibrated_center)), 8, (255, 0, 0), 2)
-            
-            cv2.imshow("Head Movement Monitor", frame)
-            if cv2.waitKey(1) & 0xFF == 27:  # ESC
-                break
+                    overlay.append(('circle', tuple(np.int32(calibrated_center)), 8, (255, 0, 0), 2))
+            
+            # In-game preview, refreshed at its own (lower) rate
+            if self.head_monitor is not None and (governor is None or governor.show_monitor):
+                self.head_monitor.publish(preprocessor.frame, overlay)
+            
+            # Full-size annotated frames only for the OpenCV window or a recording
+            camera_video = self.camera_video
+            if self.cv_window or camera_video is not None:
+                frame = preprocessor.mirrored()
+                draw_overlay(frame, overlay)
+                if camera_video is not None:
+                    # The recorder keeps the frame; the display buffer is reused
+                    camera_video.add_frame(frame.copy())
+                if self.cv_window:
+                    cv2.imshow("Head Movement Monitor", frame)
+                    if cv2.waitKey(1) & 0xFF == 27:  # ESC
+                        break
                 
             time.sleep(0.03)  # ~30 FPS
         
         if self.cap:
             self.cap.release()
-        cv2.destroyAllWindows()
+        backend.close()
+        if self.cv_window:
+            cv2.destroyAllWindows()
+        
+    def stop_tracking(self):
+        """Stop the eye controller and the head monitor thread"""
+        self.eye_controller.stop()
+        self.webcam_running = False
+        if self.webcam_thread:
+            self.webcam_thread.join()
+        
+    def show_start_menu(self):
+        """Loading screen until the head tracker is ready; False if the
+        player quit or tracking failed to start"""
+        while not self.eye_controller.is_ready():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    return False
+            if self.eye_controller.error:
+                print(f"Error starting eye tracking: {self.eye_controller.error}")
+                return False
+            self.renderer.draw_start_menu(self.screen, "Snake Game", self.eye_controller.status,
+                                          self.eye_controller.progress())
+            pygame.display.flip()
+            self.clock.tick(30)
+        return True
         
     def handle_events(self):
         """Handle pygame events"""
@@ -216,7 +318,7 @@ class SnakeGame:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
                 elif event.key == pygame.K_SPACE:
-                    self.paused = not self.paused
+                    self.toggle_pause()
                 elif event.key == pygame.K_r and self.game_over:
                     self.reset_game()
                 elif event.key == pygame.K_c:
@@ -225,301 +327,100 @@ class SnakeGame:
                     print("Recalibrating eye tracking...")
                 elif event.key == pygame.K_a:
                     # Toggle auto-move
-                    self.auto_move_enabled = not self.auto_move_enabled
+                    self.set_auto_move(not self.auto_move_enabled)
                     print(f"Auto-move {'enabled' if self.auto_move_enabled else 'disabled'}")
+                elif event.key == pygame.K_v:
+                    self.toggle_video_recording()
+                    
+    def start_video_recording(self):
+        """Start recording the game window (and the head monitor if asked)"""
+        from video_recorder import VideoRecorder, new_recording_path
+        path = new_recording_path()
+        self.video = VideoRecorder(path, self.video_fps)
+        if self.record_camera and not self.autopilot:
+            self.camera_video = VideoRecorder(path[:-len(".mp4")] + "-camera.mp4", self.video_fps)
+        self.last_video_frame = 0
+        print(f"Recording video to {path}")
+        
+    def stop_video_recording(self):
+        """Stop recording and flush the video files"""
+        video, camera_video = self.video, self.camera_video
+        self.video = None
+        self.camera_video = None
+        if video:
+            video.stop()
+        if camera_video:
+            camera_video.stop()
+            
+    def toggle_video_recording(self):
+        """Start or stop recording"""
+        if self.video:
+            self.stop_video_recording()
+        else:
+            self.start_video_recording()
+            
+    def capture_video_frame(self):
+        """Queue the current window for the recorder at the video frame rate"""
+        now = pygame.time.get_ticks()
+        if now - self.last_video_frame >= 1000 / self.video_fps:
+            self.last_video_frame = now
+            self.video.add_surface(self.screen)
                     
     def get_direct_direction(self, eye_direction):
         """Convert eye direction to snake direction (direct control, no mirror)"""
         # Direct control - no mirror effect
         return eye_direction
             
+    def print_states(self, tick):
+        """Debug line with the eye and snake directions (timer callback)"""
+        if not self.paused and not self.game_over:
+            print(f"Eye: {self.eye_controller.current_direction}, Snake: {self.snake.direction}")
+            
+    def set_auto_move(self, enabled):
+        """Start or stop the auto-move timer"""
+        if self.auto_move_timer is not None:
+            self.auto_move_timer.cancel()
+            self.auto_move_timer = None
+        self.auto_move_enabled = enabled
+        if enabled:
+            self.auto_move_timer = self.schedule(self.auto_move_delay, self.auto_move, repeat=True)
+            
+    def auto_move(self, tick):
+        """Auto-move while there is no new eye input (timer callback)"""
+        if self.paused or self.game_over or self.snake.direction == "CENTER":
+            return
+        # Continue in current direction
+        self.last_auto_move_time = self.now_ms()
+            
     def handle_eye_controls(self):
         """Handle eye movement controls with step-by-step movement"""
-        current_time = pygame.time.get_ticks()
         eye_direction = self.eye_controller.current_direction  # Use the direction from webcam
         
         # Convert eye direction to snake direction (direct control)
         snake_direction = self.get_direct_direction(eye_direction)
         
-        # Debug: Print current states every second
-        if current_time % 1000 < 50:  # Print every second
-            print(f"Eye: {eye_direction}, Snake: {self.snake.direction}")
-        
-        # Handle direction changes
+        # Direction changes are applied by the simulation on its next tick
+        # (opposite directions pause the snake instead of reversing it)
+        self.set_input_direction(snake_direction)
         if snake_direction != self.snake.direction:
-            # Try to change direction (prevents opposite direction movement)
-            old_direction = self.snake.direction
-            if self.snake.change_direction(snake_direction):
-                self.last_direction = snake_direction
-                self.auto_move_enabled = False  # Disable auto-move when user gives input
-                print(f"Direction changed: {old_direction} -> {snake_direction}")
-            else:
-                # Direction change was blocked (opposite direction) - PAUSE THE SNAKE
-                print(f"Direction change blocked: {old_direction} -> {snake_direction} - PAUSING SNAKE")
-                # Set direction to CENTER to pause movement
-                self.snake.direction = "CENTER"
-                self.auto_move_enabled = False
+            self.last_direction = snake_direction
+            self.set_auto_move(False)  # Disable auto-move when user gives input
                 
         # Handle center position (stop movement)
-        if snake_direction == "CENTER":
-            self.auto_move_enabled = False
-            
-        # Auto-move if enabled and no recent eye input
-        elif self.auto_move_enabled and current_time - self.last_auto_move_time >= self.auto_move_delay:
-            # Continue in current direction
-            self.last_auto_move_time = current_time
+        if snake_direction == "CENTER" and self.auto_move_enabled:
+            self.set_auto_move(False)
             
-    def spawn_bonus_food(self):
-        """Spawn bonus food"""
-        self.bonus_food_position = (random.randint(0, 24), random.randint(0, 24))
-        while (self.bonus_food_position in self.snake.body or 
-               self.bonus_food_position == self.food.position):
-            self.bonus_food_position = (random.randint(0, 24), random.randint(0, 24))
-        self.bonus_food_active = True
-        self.bonus_food_spawn_time = pygame.time.get_ticks()
-        print("Bonus food spawned!")
-            
-    def update_game(self):
+    def update_game(self, elapsed_ms):
         """Update game state"""
-        if self.paused or self.game_over:
-            return
-            
-        current_time = pygame.time.get_ticks()
-        
-        # Check bonus food timeout
-        if (self.bonus_food_active and 
-            current_time - self.bonus_food_spawn_time > self.bonus_food_duration):
-            self.bonus_food_active = False
-            self.bonus_food_position = None
-            print("Bonus food expired!")
-        
-        # Handle eye controls
-        self.handle_eye_controls()
-        
-        # Move snake based on current direction
-        if self.snake.direction != "CENTER":
-            # Move snake at regular intervals
-            if current_time - self.last_move_time >= self.move_delay:
-                self.snake.move()
-                self.last_move_time = current_time
-            
-            # Handle boundary wrapping
-            head = self.snake.body[0]
-            x, y = head
-            
-            # Wrap horizontally (adjusted for smaller grid)
-            if x < 0:
-                x = 24
-            elif x >= 25:
-                x = 0
-                
-            # Wrap vertically (adjusted for smaller grid)
-            if y < 0:
-                y = 24
-            elif y >= 25:
-                y = 0
-                
-            # Update head position
-            self.snake.body[0] = (x, y)
-            
-            # Check collision with self only (no boundary collision)
-            if self.snake.check_self_collision():
-                self.game_over = True
-                # Create hit effect at collision point
-                self.hit_effect_active = True
-                self.hit_effect_position = (x, y)
-                self.hit_effect_start_time = current_time
-                print("Game Over! Snake hit itself!")
-                return
-            
-            # Check collision with regular food
-            if self.snake.body[0] == self.food.position:
-                self.snake.grow()
-                self.food.spawn(self.snake.body)
-                self.game.increase_score()
-                self.food_count += 1
-                print(f"Food eaten! Score: {self.game.score}, Snake length: {len(self.snake.body)}")
-                
-                # Spawn bonus food every 5 normal foods
-                if self.food_count % 5 == 0 and not self.bonus_food_active:
-                    self.spawn_bonus_food()
-            
-            # Check collision with bonus food
-            if (self.bonus_food_active and 
-                self.snake.body[0] == self.bonus_food_position):
-                # Add 5 segments to snake
-                for _ in range(5):
-                    self.snake.grow()
-                self.game.increase_score(5)  # 5 points for bonus food
-                self.bonus_food_active = False
-                self.bonus_food_position = None
-                print(f"Bonus food eaten! Score: {self.game.score}, Snake length: {len(self.snake.body)} (+5 segments)")
-            
-    def draw_textured_snake(self, win):
-        """Draw snake with texture, eyes, and tail"""
-        for i, segment in enumerate(self.snake.body):
-            x, y = segment[0] * 20 + 10, segment[1] * 20 + 10  # Center of cell
-            
-            # Head is slightly larger
-            radius = 12 if i == 0 else 8
-            
-            # Draw main segment
-            pygame.draw.circle(win, self.ORANGE, (x, y), radius)
-            
-            # Add texture pattern
-            if i == 0:  # Head
-                # Add eyes
-                self.draw_snake_eyes(win, x, y, self.snake.direction)
-                # Add head pattern
-                pygame.draw.circle(win, self.DARK_ORANGE, (x, y), radius - 2)
-                pygame.draw.circle(win, self.ORANGE, (x, y), radius - 4)
-            elif i == len(self.snake.body) - 1:  # Tail
-                # Draw tail
-                self.draw_snake_tail(win, x, y, self.snake.direction)
-            else:  # Body segments
-                # Add texture pattern
-                pygame.draw.circle(win, self.DARK_ORANGE, (x, y), radius - 2)
-                pygame.draw.circle(win, self.LIGHT_ORANGE, (x, y), radius - 4)
-                pygame.draw.circle(win, self.ORANGE, (x, y), radius - 6)
-                
-                # Add small texture dots
-                if i % 2 == 0:  # Alternate segments for texture
-                    pygame.draw.circle(win, self.DARK_ORANGE, (x - 2, y - 2), 1)
-                    pygame.draw.circle(win, self.DARK_ORANGE, (x + 2, y + 2), 1)
-            
-    def draw_snake_eyes(self, win, x, y, direction):
-        """Draw eyes on snake head"""
-        # Main eyes
-        if direction == 'RIGHT':
-            pygame.draw.circle(win, self.BLACK, (x + 4, y - 3), 2)
-            pygame.draw.circle(win, self.BLACK, (x + 4, y + 3), 2)
-            # Eye highlights
-            pygame.draw.circle(win, self.WHITE, (x + 5, y - 4), 1)
-            pygame.draw.circle(win, self.WHITE, (x + 5, y + 2), 1)
-        elif direction == 'LEFT':
-            pygame.draw.circle(win, self.BLACK, (x - 4, y - 3), 2)
-            pygame.draw.circle(win, self.BLACK, (x - 4, y + 3), 2)
-            # Eye highlights
-            pygame.draw.circle(win, self.WHITE, (x - 5, y - 4), 1)
-            pygame.draw.circle(win, self.WHITE, (x - 5, y + 2), 1)
-        elif direction == 'UP':
-            pygame.draw.circle(win, self.BLACK, (x - 3, y - 4), 2)
-            pygame.draw.circle(win, self.BLACK, (x + 3, y - 4), 2)
-            # Eye highlights
-            pygame.draw.circle(win, self.WHITE, (x - 4, y - 5), 1)
-            pygame.draw.circle(win, self.WHITE, (x + 2, y - 5), 1)
-        elif direction == 'DOWN':
-            pygame.draw.circle(win, self.BLACK, (x - 3, y + 4), 2)
-            pygame.draw.circle(win, self.BLACK, (x + 3, y + 4), 2)
-            # Eye highlights
-            pygame.draw.circle(win, self.WHITE, (x - 4, y + 3), 1)
-            pygame.draw.circle(win, self.WHITE, (x + 2, y + 3), 1)
-            
-    def draw_snake_tail(self, win, x, y, direction):
-        """Draw tail at the end of snake"""
-        # Draw tail segment
-        pygame.draw.circle(win, self.DARK_ORANGE, (x, y), 6)
-        pygame.draw.circle(win, self.ORANGE, (x, y), 4)
-        
-        # Draw tail tip based on direction
-        if direction == 'RIGHT':
-            pygame.draw.circle(win, self.DARK_ORANGE, (x + 6, y), 3)
-        elif direction == 'LEFT':
-            pygame.draw.circle(win, self.DARK_ORANGE, (x - 6, y), 3)
-        elif direction == 'UP':
-            pygame.draw.circle(win, self.DARK_ORANGE, (x, y - 6), 3)
-        elif direction == 'DOWN':
-            pygame.draw.circle(win, self.DARK_ORANGE, (x, y + 6), 3)
-            
-    def draw_round_food(self, win):
-        """Draw round food"""
-        x, y = self.food.position[0] * 20 + 10, self.food.position[1] * 20 + 10
-        pygame.draw.circle(win, self.GREEN, (x, y), 8)
-        
-    def draw_bonus_food(self, win):
-        """Draw bonus food with heartbeat effect"""
-        if self.bonus_food_active and self.bonus_food_position:
-            x, y = self.bonus_food_position[0] * 20 + 10, self.bonus_food_position[1] * 20 + 10
-            
-            # Heartbeat effect
-            current_time = pygame.time.get_ticks()
-            time_since_spawn = current_time - self.bonus_food_spawn_time
-            heartbeat = 1 + 0.3 * math.sin(time_since_spawn * 0.01)  # Pulsing effect
-            
-            # Calculate remaining time
-            remaining_time = max(0, self.bonus_food_duration - time_since_spawn)
-            time_ratio = remaining_time / self.bonus_food_duration
-            
-            # Size based on heartbeat and time remaining
-            base_size = 16
-            size = int(base_size * heartbeat * (0.5 + 0.5 * time_ratio))
-            
-            # Color intensity based on time remaining
-            color_intensity = int(255 * time_ratio)
-            bonus_color = (255, color_intensity, color_intensity)
-            
-            pygame.draw.circle(win, bonus_color, (x, y), size)
-            
-            # Draw time remaining indicator
-            if remaining_time < 2000:  # Last 2 seconds
-                font = pygame.font.SysFont('Arial', 12)
-                time_text = font.render(f"{remaining_time//1000}s", True, self.WHITE)
-                text_rect = time_text.get_rect(center=(x, y - 25))
-                win.blit(time_text, text_rect)
-            
-    def draw_hit_effect(self, win):
-        """Draw hit effect at collision point"""
-        if self.hit_effect_active and self.hit_effect_position:
-            current_time = pygame.time.get_ticks()
-            time_since_hit = current_time - self.hit_effect_start_time
-            
-            if time_since_hit < self.hit_effect_duration:
-                x, y = self.hit_effect_position[0] * 20 + 10, self.hit_effect_position[1] * 20 + 10
-                
-                # Expanding circle effect
-                progress = time_since_hit / self.hit_effect_duration
-                size = int(20 * progress)
-                alpha = int(255 * (1 - progress))
-                
-                # Create surface for alpha blending
-                effect_surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
-                pygame.draw.circle(effect_surface, (255, 0, 0, alpha), (size, size), size)
-                win.blit(effect_surface, (x - size, y - size))
-            else:
-                self.hit_effect_active = False
+        if not self.paused and not self.game_over:
+            # Handle eye controls
+            self.handle_eye_controls()
+        
+        # Run the simulation ticks covered by the last frame
+        self.advance(elapsed_ms)
             
     def draw(self):
         """Draw the game"""
-        self.screen.fill(self.BLACK)
-        
-        # Draw grid (adjusted for smaller size)
-        for x in range(0, 500, 20):
-            pygame.draw.line(self.screen, (40, 40, 40), (x, 0), (x, 500))
-        for y in range(0, 500, 20):
-            pygame.draw.line(self.screen, (40, 40, 40), (0, y), (500, y))
-        
-        # Draw snake (textured round with eyes and tail)
-        self.draw_textured_snake(self.screen)
-        
-        # Draw food (round)
-        self.draw_round_food(self.screen)
-        
-        # Draw bonus food with heartbeat
-        self.draw_bonus_food(self.screen)
-        
-        # Draw hit effect
-        self.draw_hit_effect(self.screen)
-        
-        # Draw score
-        font = pygame.font.SysFont('Arial', 30)
-        text = font.render(f"Score: {self.game.score}", True, self.WHITE)
-        self.screen.blit(text, (10, 10))
-        
-        # Draw instructions in separate area below game
-        instructions_area = pygame.Rect(0, 500, 500, 200)
-        pygame.draw.rect(self.screen, (40, 40, 40), instructions_area)
-        
-        font = pygame.font.SysFont('Arial', 16)
         instructions = [
             "Snake Game - Eye Controlled",
             "Move your head to control the snake",
@@ -534,63 +435,38 @@ class SnakeGame:
             "R: Restart (when game over)",
             "ESC: Quit"
         ]
-        
-        for i, text in enumerate(instructions):
-            text_surface = font.render(text, True, self.WHITE)
-            self.screen.blit(text_surface, (10, 510 + i * 20))
-            
-        # Draw pause status
-        if self.paused:
-            font = pygame.font.SysFont('Arial', 36)
-            text = font.render("PAUSED", True, self.YELLOW)
-            text_rect = text.get_rect(center=(self.width//2, self.height//2))
-            self.screen.blit(text, text_rect)
-            
-        # Draw game over screen
-        if self.game_over:
-            font_large = pygame.font.SysFont('Arial', 48)
-            font_small = pygame.font.SysFont('Arial', 24)
-            
-            game_over_text = font_large.render("GAME OVER", True, self.RED)
-            score_text = font_small.render(f"Final Score: {self.game.score}", True, self.WHITE)
-            restart_text = font_small.render("Press R to restart or ESC to quit", True, self.WHITE)
-            
-            game_over_rect = game_over_text.get_rect(center=(self.width//2, self.height//2 - 50))
-            score_rect = score_text.get_rect(center=(self.width//2, self.height//2))
-            restart_rect = restart_text.get_rect(center=(self.width//2, self.height//2 + 50))
-            
-            self.screen.blit(game_over_text, game_over_rect)
-            self.screen.blit(score_text, score_rect)
-            self.screen.blit(restart_text, restart_rect)
-            
+        self.renderer.draw(self.screen, self, instructions)
+        if self.head_monitor is not None and (self.governor is None or self.governor.show_monitor):
+            # Bottom-right corner of the instructions panel
+            self.head_monitor.draw(self.screen, (self.width - 170, 570))
         pygame.display.flip()
         
     def reset_game(self):
         """Reset the game to initial state"""
-        self.snake = Snake()
-        self.food = Food(self.snake.body)
-        self.game = Game()
-        self.game_over = False
-        self.paused = False
-        self.last_move_time = 0
+        super().reset_game()
         self.last_auto_move_time = 0
-        self.auto_move_enabled = False
+        self.set_auto_move(False)
         self.last_direction = "CENTER"
-        self.bonus_food_active = False
-        self.bonus_food_position = None
-        self.food_count = 0
-        self.hit_effect_active = False
         
     def run(self):
         """Main game loop"""
-        if not self.start_eye_tracking():
+        if self.autopilot:
+            print("Autopilot demo mode - no camera needed")
+        elif not self.start_eye_tracking():
             print("Failed to start eye tracking. Exiting...")
             return
             
-        if not self.start_webcam_window():
+        if not self.autopilot and not self.start_webcam_window():
             print("Failed to start webcam window. Exiting...")
             return
             
+        if not self.autopilot and not self.show_start_menu():
+            print("Eye tracking did not become ready. Exiting...")
+            self.stop_tracking()
+            self.leaderboard.close()
+            pygame.quit()
+            return
+            
         print("Snake Game Started!")
         print("Controls:")
         print("- Move your head to control the snake")
@@ -602,23 +478,102 @@ class SnakeGame:
         print("- SPACE: Pause/Resume")
         print("- C: Recalibrate eye tracking")
         print("- R: Restart (when game over)")
+        print("- V: Start/stop video recording")
         print("- ESC: Quit")
-        print("- Two windows: Game window + Head movement monitor")
+        print("- Head movement monitor: bottom right of the game window (--cv-window for a separate window)")
         
+        if self.record_video:
+            self.start_video_recording()
+            
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+            
+        governor = self.governor
+        elapsed = 0
         while self.running:
+            frame_start = time.perf_counter()
+            ticks = self.tick_count
+            # Input and game updates run every frame; only drawing is thinned out
             self.handle_events()
-            self.update_game()
-            self.draw()
-            self.clock.tick(60)  # 60 FPS
-            
+            self.update_game(elapsed)
+            drawn = governor is None or governor.should_draw()
+            if drawn:
+                self.draw()
+                if self.video:
+                    self.capture_video_frame()
+            work = time.perf_counter() - frame_start
+            if governor is not None and governor.frame(work):
+                self.renderer.flat_snake = governor.flat_snake
+            if self.metrics is not None:
+                self.metrics.frame(work, self.tick_count - ticks, drawn)
+            elapsed = self.clock.tick(60)  # 60 FPS
+            
+        if self.recorder is not None:
+            print(f"Session saved to {self.recorder.save(new_session_path(), self)}")
+        self.stop_video_recording()
+        self.leaderboard.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        
         # Cleanup
-        self.eye_controller.stop()
-        self.webcam_running = False
-        if self.webcam_thread:
-            self.webcam_thread.join()
+        self.stop_tracking()
         pygame.quit()
         sys.exit()
 
+def profile_startup(bot):
+    """Report what starting the game costs: imports, then setup up to the first frame"""
+    from startup_profile import PhaseTimer, import_times, print_import_times, save_run
+    modules = ["main"] if bot is not None else ["main", "head_controller"]
+    times = import_times(modules)
+    print_import_times(times)
+
+    timer = PhaseTimer()
+    game = SnakeGame(bot=bot)
+    timer.mark("SnakeGame() (pygame, window, controller, leaderboard)")
+    if bot is None:
+        game.start_eye_tracking()
+        timer.mark("eye tracking start")
+        game.show_start_menu()
+        timer.mark("tracker ready (model, camera, warm-up, calibration)")
+    game.draw()
+    timer.mark("first frame")
+    timer.report("Time to first frame")
+    save_run(bot.__name__.lower() if bot is not None else "head", times, timer)
+
+    game.eye_controller.stop()
+    game.leaderboard.close()
+    pygame.quit()
+    return 0
+
 if __name__ == "__main__":
-    game = SnakeGame()
+    bot = None
+    if "--autopilot" in sys.argv[1:]:
+        bot = Autopilot
+    elif "--hamiltonian" in sys.argv[1:]:
+        bot = HamiltonianPilot
+    if "--profile-startup" in sys.argv[1:]:
+        sys.exit(profile_startup(bot))
+    player_name = "Player"
+    if "--player" in sys.argv[1:-1]:
+        player_name = sys.argv[sys.argv.index("--player") + 1]
+    monitor_hz = 10
+    if "--monitor-hz" in sys.argv[1:-1]:
+        monitor_hz = float(sys.argv[sys.argv.index("--monitor-hz") + 1])
+    head_backend = "iris"
+    if "--backend" in sys.argv[1:-1]:
+        head_backend = sys.argv[sys.argv.index("--backend") + 1]
+    metrics_port = None
+    if "--metrics-port" in sys.argv[1:-1]:
+        metrics_port = int(sys.argv[sys.argv.index("--metrics-port") + 1])
+    level = None
+    if "--level" in sys.argv[1:-1]:
+        if bot is HamiltonianPilot:
+            sys.exit("--hamiltonian needs an empty board and cannot play a level")
+        from level import load_level
+        level = load_level(sys.argv[sys.argv.index("--level") + 1])
+    game = SnakeGame(bot=bot, record_video="--record-video" in sys.argv[1:],
+                     record_camera="--record-camera" in sys.argv[1:], player_name=player_name,
+                     monitor_hz=monitor_hz, cv_window="--cv-window" in sys.argv[1:],
+                     head_backend=head_backend, level=level, metrics_port=metrics_port,
+                     governor="--no-governor" not in sys.argv[1:])
     game.run()
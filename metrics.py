@@ -0,0 +1,265 @@
+import bisect
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Every metric is written by one thread only (the game loop or one tracking
+# loop) and read by the HTTP thread, so plain attribute updates are enough:
+# no locks on the game or tracker threads. A scrape can see a histogram
+# mid-update, which is off by one observation at most.
+
+FRAME_BUCKETS = (0.001, 0.002, 0.004, 0.008, 0.016, 0.033, 0.05, 0.1, 0.25)
+INFERENCE_BUCKETS = (0.0025, 0.005, 0.01, 0.02, 0.04, 0.08, 0.16)
+
+def _labels(labels, extra=None):
+    pairs = list(labels.items()) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """A count that only goes up"""
+    kind = "counter"
+
+    def __init__(self, name, help, **labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        return [(self.name, self.labels, self.value)]
+
+class Gauge:
+    """A value that goes up and down, set by its writer or read from a
+    function at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name, help, read=None, **labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.read = read
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self):
+        return [(self.name, self.labels, self.read() if self.read is not None else self.value)]
+
+class RateMeter(Gauge):
+    """Events per second over the last window, as a gauge.
+
+    The writer adds events; every window seconds it turns the count into
+    a rate. A scrape during a long pause sees the rate of the unfinished
+    window instead of a stale one."""
+    def __init__(self, name, help, window=1.0, **labels):
+        super().__init__(name, help, **labels)
+        self.window = window
+        self.start = time.perf_counter()
+        self.count = 0
+
+    def add(self, amount=1, now=None):
+        if now is None:
+            now = time.perf_counter()
+        self.count += amount
+        elapsed = now - self.start
+        if elapsed >= self.window:
+            self.value = self.count / elapsed
+            self.start = now
+            self.count = 0
+
+    def samples(self):
+        elapsed = time.perf_counter() - self.start
+        value = self.count / elapsed if elapsed >= 2 * self.window else self.value
+        return [(self.name, self.labels, value)]
+
+class Histogram:
+    """Observations counted into fixed buckets (upper bounds in seconds)"""
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=FRAME_BUCKETS, **labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        samples = []
+        total = 0
+        for bound, count in zip(self.bounds + [float("inf")], list(self.counts)):
+            total += count
+            samples.append((self.name + "_bucket", self.labels, total, ("le", _number(bound))))
+        samples.append((self.name + "_sum", self.labels, self.sum))
+        samples.append((self.name + "_count", self.labels, total))
+        return samples
+
+class Registry:
+    """Metrics to expose, rendered in the Prometheus text format"""
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        # Metrics of one name (with different labels) go together under one header
+        families = {}
+        for metric in list(self.metrics):
+            families.setdefault(metric.name, []).append(metric)
+        lines = []
+        for name, metrics in families.items():
+            lines.append(f"# HELP {name} {metrics[0].help}")
+            lines.append(f"# TYPE {name} {metrics[0].kind}")
+            for metric in metrics:
+                for sample in metric.samples():
+                    name, labels, value = sample[:3]
+                    extra = sample[3] if len(sample) > 3 else None
+                    lines.append(f"{name}{_labels(labels, extra)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+class LoopMetrics:
+    """Counters for one head tracking loop (the tracker thread or the
+    webcam loop), each written only by that loop"""
+    def __init__(self, registry, loop):
+        self.frames = registry.add(Counter(
+            "snake_tracker_frames_total", "Camera frames run through the face model", loop=loop))
+        self.fps = registry.add(RateMeter(
+            "snake_tracker_fps", "Camera frames tracked per second", loop=loop))
+        self.inference = registry.add(Histogram(
+            "snake_face_model_seconds", "Face model inference time per frame", INFERENCE_BUCKETS, loop=loop))
+        self.read_failures = registry.add(Counter(
+            "snake_camera_dropped_frames_total", "Camera reads that returned no frame", loop=loop))
+        self.direction_changes = registry.add(Counter(
+            "snake_direction_changes_total", "Changes of the tracked head direction", loop=loop))
+        self.direction_rate = registry.add(RateMeter(
+            "snake_direction_changes_per_second", "Changes of the tracked head direction per second",
+            window=5.0, loop=loop))
+
+    def frame(self, inference_seconds):
+        self.frames.inc()
+        self.fps.add()
+        self.inference.observe(inference_seconds)
+        # Keeps the change rate moving towards zero while the head is still
+        self.direction_rate.add(0)
+
+    def direction_changed(self):
+        self.direction_changes.inc()
+        self.direction_rate.add()
+
+class GameMetrics:
+    """Counters for the game loop, written only by the game thread"""
+    def __init__(self, registry):
+        self.frames = registry.add(Counter("snake_frames_total", "Frames drawn"))
+        self.fps = registry.add(RateMeter("snake_render_fps", "Frames drawn per second"))
+        self.frame_time = registry.add(Histogram(
+            "snake_frame_seconds", "Time to handle input, update and draw one frame (without the frame wait)"))
+        self.frames_skipped = registry.add(Counter(
+            "snake_frames_skipped_total", "Game loop iterations not drawn, to shed load"))
+        self.ticks = registry.add(Counter("snake_sim_ticks_total", "Simulation ticks run"))
+        self.tick_rate = registry.add(RateMeter("snake_sim_ticks_per_second", "Simulation ticks run per second"))
+
+    def frame(self, seconds, ticks, drawn=True):
+        now = time.perf_counter()
+        if drawn:
+            self.frames.inc()
+            self.fps.add(1, now)
+            self.frame_time.observe(seconds)
+        else:
+            self.frames_skipped.inc()
+            self.fps.add(0, now)
+        self.ticks.inc(ticks)
+        self.tick_rate.add(ticks, now)
+
+class MetricsServer:
+    """Serves a registry at http://host:port/metrics from a daemon thread"""
+    def __init__(self, registry, port=9108, host="127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # scrapes every few seconds would flood the console
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
+        print(f"Metrics at http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.thread.join()
+            self.httpd = None
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve the metrics of a headless autopilot game, for checking a scraper")
+    parser.add_argument("--port", type=int, default=9108)
+    parser.add_argument("--seconds", type=float, default=60, help="how long to run")
+    args = parser.parse_args(argv)
+
+    from autopilot import Autopilot
+    from simulation import Simulation
+    registry = Registry()
+    game = GameMetrics(registry)
+    sim = Simulation(seed=0, verbose=False)
+    pilot = Autopilot(sim)
+    registry.add(Gauge("snake_score", "Score of the current game", read=lambda: sim.game.score))
+    server = MetricsServer(registry, args.port).start()
+    end = time.perf_counter() + args.seconds
+    frame_ms = 1000 / 60
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        ticks = sim.tick_count
+        sim.set_input_direction(pilot.current_direction)
+        sim.advance(frame_ms)
+        if sim.game_over:
+            sim.reset_game()
+        game.frame(time.perf_counter() - start, sim.tick_count - ticks)
+        time.sleep(max(0.0, frame_ms / 1000 - (time.perf_counter() - start)))
+    server.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,196 @@
+import threading
+import time
+import numpy as np
+from camera import open_camera
+from preprocess import FramePreprocessor, mirror_x
+from head_backends import LEFT_IRIS_IDX, RIGHT_IRIS_IDX
+from head_controller import direction_from_offset
+
+class FaceTrack:
+    """One face followed across frames, with its own calibration"""
+    def __init__(self, track_id, position):
+        self.id = track_id
+        self.position = position
+        self.last_seen = 0
+        self.visible = False
+        self.calibrated_center = None
+        self.frame_count = 0
+        self.is_calibrated = False
+        self.direction = "CENTER"
+
+class MultiFaceTracker:
+    """Head tracking for several players sharing one camera.
+
+    Every frame goes through FaceMesh once, whatever the number of faces.
+    Faces are matched to existing tracks by nearest position, and each
+    track keeps a player slot until it has been out of view for longer
+    than occlusion_grace seconds."""
+    def __init__(self, max_faces=2, camera_index=0, occlusion_grace=1.5):
+        self.max_faces = max_faces
+        self.camera_index = camera_index
+        self.occlusion_grace = occlusion_grace
+        self.tracks = []
+        self.slots = [None] * max_faces  # player slot -> FaceTrack
+        self.next_id = 1
+        self.calibration_frames = 30
+        self.threshold_x = 12
+        self.threshold_y = 10
+        # Furthest a face may move between frames and keep its track,
+        # as a fraction of the frame width
+        self.max_jump = 0.15
+        self.cap = None
+        self.face_mesh = None
+        self.running = False
+        self.thread = None
+        self.status = "Not started"
+        self.error = None
+
+    def start(self):
+        """Start tracking in a separate thread"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop tracking"""
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        if self.cap:
+            self.cap.release()
+
+    def _run(self):
+        try:
+            self.status = "Loading face model"
+            import mediapipe as mp
+            self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+                static_image_mode=False,
+                refine_landmarks=True,
+                max_num_faces=self.max_faces,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+            self.status = "Opening camera"
+            self.cap = open_camera(self.camera_index)
+            if not self.cap.isOpened():
+                raise RuntimeError("Cannot open camera")
+        except Exception as e:
+            self.error = str(e)
+            self.status = f"Error: {e}"
+            self.running = False
+            return
+        self.status = "Tracking"
+
+        preprocessor = FramePreprocessor()
+        while self.running:
+            if not preprocessor.read(self.cap):
+                continue
+            h, w, _ = preprocessor.frame.shape
+            result = self.face_mesh.process(preprocessor.model_input())
+            positions = []
+            for landmarks in result.multi_face_landmarks or ():
+                points = landmarks.landmark
+                coords = np.array([(mirror_x(points[i].x) * w, points[i].y * h)
+                                   for i in LEFT_IRIS_IDX + RIGHT_IRIS_IDX])
+                cx, cy = coords.mean(axis=0)
+                positions.append((float(cx), float(cy)))
+            self.update(positions, w, time.monotonic())
+            time.sleep(0.03)  # ~30 FPS
+
+    def update(self, positions, frame_width, now):
+        """Assign this frame's face positions to tracks and update them"""
+        tracks = self.tracks
+        for track in tracks:
+            track.visible = False
+
+        # Closest pairs first; a handful of faces makes this trivially cheap
+        limit = (self.max_jump * frame_width) ** 2
+        pairs = sorted(((tx - px) ** 2 + (ty - py) ** 2, t, p)
+                       for t, (tx, ty) in enumerate(track.position for track in tracks)
+                       for p, (px, py) in enumerate(positions))
+        matched_tracks, matched_positions = set(), set()
+        for distance, t, p in pairs:
+            if distance > limit:
+                break
+            if t in matched_tracks or p in matched_positions:
+                continue
+            matched_tracks.add(t)
+            matched_positions.add(p)
+            self._update_track(tracks[t], positions[p], now)
+
+        for p, position in enumerate(positions):
+            if p in matched_positions:
+                continue
+            if len(tracks) < self.max_faces:
+                track = FaceTrack(self.next_id, position)
+                self.next_id += 1
+                tracks.append(track)
+                self.slots[self.slots.index(None)] = track
+            else:
+                # Every slot is taken, so this is a face that moved too far
+                # while hidden: give it the nearest unmatched track
+                hidden = [track for t, track in enumerate(tracks) if t not in matched_tracks]
+                if not hidden:
+                    continue
+                track = min(hidden, key=lambda track: (track.position[0] - position[0]) ** 2 +
+                                                      (track.position[1] - position[1]) ** 2)
+                matched_tracks.add(tracks.index(track))
+            self._update_track(track, position, now)
+
+        # Faces gone for longer than the grace period free their slot
+        for track in [track for track in tracks if now - track.last_seen > self.occlusion_grace]:
+            tracks.remove(track)
+            self.slots[self.slots.index(track)] = None
+            print(f"Face {track.id} lost")
+
+    def _update_track(self, track, position, now):
+        track.position = position
+        track.last_seen = now
+        track.visible = True
+        cx, cy = position
+        if not track.is_calibrated:
+            if track.calibrated_center is None:
+                track.calibrated_center = (cx, cy)
+            else:
+                x, y = track.calibrated_center
+                track.calibrated_center = (0.9 * x + 0.1 * cx, 0.9 * y + 0.1 * cy)
+            track.frame_count += 1
+            if track.frame_count >= self.calibration_frames:
+                track.is_calibrated = True
+                print(f"Face {track.id} calibrated")
+            return
+        dx = cx - track.calibrated_center[0]
+        dy = cy - track.calibrated_center[1]
+        track.direction = direction_from_offset(dx, dy, self.threshold_x, self.threshold_y)
+
+    def direction_for(self, slot):
+        """Direction of the face in a player slot: CENTER (stop) with no
+        calibrated face, None (keep going) while the face is briefly hidden"""
+        track = self.slots[slot]
+        if track is None or not track.is_calibrated:
+            return "CENTER"
+        if not track.visible:
+            return None
+        return track.direction
+
+    def describe(self, slot):
+        """Short status of a player slot for on-screen text"""
+        track = self.slots[slot]
+        if track is None:
+            return "no face"
+        if not track.is_calibrated:
+            return f"face {track.id} calibrating {track.frame_count}/{self.calibration_frames}"
+        return f"face {track.id} {track.direction if track.visible else 'hidden'}"
+
+class FaceController:
+    """Steers one snake from one player slot of a MultiFaceTracker"""
+    def __init__(self, tracker, slot):
+        self.tracker = tracker
+        self.slot = slot
+
+    @property
+    def current_direction(self):
+        return self.tracker.direction_for(self.slot)
@@ -0,0 +1,419 @@
+import random
+import sys
+import time
+from snake import Snake
+from game import Game
+from grid import CHUNK_CELLS, ChunkIndex, OccupancyGrid
+from simulation import steer_snake
+
+MOVES = {'UP': (0, -1), 'DOWN': (0, 1), 'LEFT': (-1, 0), 'RIGHT': (1, 0)}
+OPPOSITES = {'UP': 'DOWN', 'DOWN': 'UP', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT'}
+
+PLAYER_COLORS = [
+    (255, 165, 0), (0, 200, 255), (200, 0, 255), (255, 255, 0),
+    (0, 255, 120), (255, 80, 160), (160, 160, 255), (255, 255, 255),
+]
+
+class Player:
+    """One snake on the shared board and whatever steers it; id stays the
+    same for the player's whole time in the world"""
+    def __init__(self, player_id, name, snake, color):
+        self.id = player_id
+        self.name = name
+        self.snake = snake
+        self.color = color
+        self.controller = None
+        self.game = Game()
+        self.alive = True
+        self.left = False
+        self.deaths = 0
+
+class MultiSnakeSimulation:
+    """Several snakes on one wrapping board; each step moves every snake once.
+
+    All collision checks go through one shared OccupancyGrid that is only
+    touched where a head arrives, a tail leaves or a snake dies, so a step
+    costs O(number of snakes) however long the snakes are.
+
+    With chunk set, snake segments and food are also kept in ChunkIndex
+    buckets of that many cells, updated at the same places, so a view
+    can find what is on screen without walking every body.
+
+    A level (see level.py) sets the board size, and its walls are read
+    from the level's bitmap wherever a cell is checked."""
+    def __init__(self, width=25, height=25, seed=None, food_count=1, respawn=True, verbose=True, chunk=0,
+                 level=None):
+        if level is not None:
+            width, height = level.width, level.height
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.width = width
+        self.height = height
+        self.verbose = verbose
+        self.respawn = respawn
+        self.level = level
+        self.occupancy = OccupancyGrid(width, height)
+        self.segments = ChunkIndex(chunk) if chunk else None
+        self.food_index = ChunkIndex(chunk) if chunk else None
+        self.obstacles = ChunkIndex(chunk or CHUNK_CELLS)
+        self.players = []
+        self.next_player_id = 0
+        self.food = set()
+        self.tick_count = 0
+        for _ in range(food_count):
+            self.spawn_food()
+
+    def _say(self, message):
+        if self.verbose:
+            print(message)
+
+    def is_blocked(self, cell):
+        """Whether a snake, an obstacle or a wall is on the cell"""
+        return self.occupancy.is_occupied(cell) or (self.level is not None and self.level.is_wall(cell))
+
+    def random_free_cell(self):
+        """Random cell with no snake, wall or food on it (None if the board is full)"""
+        for _ in range(64):
+            cell = (self.rng.randrange(self.width), self.rng.randrange(self.height))
+            if not self.is_blocked(cell) and cell not in self.food:
+                return cell
+        free = [(x, y) for y in range(self.height) for x in range(self.width)
+                if not self.is_blocked((x, y)) and (x, y) not in self.food]
+        return self.rng.choice(free) if free else None
+
+    def spawn_food(self):
+        cell = self.random_free_cell()
+        if cell is not None:
+            self.food.add(cell)
+            if self.food_index is not None:
+                self.food_index.add(cell, True)
+
+    def add_obstacles(self, count):
+        """Scatter blocks that never move; running into one is a crash"""
+        for _ in range(count):
+            cell = self.random_free_cell()
+            if cell is None:
+                break
+            self.occupancy.add(cell)
+            self.obstacles.add(cell, True)
+
+    def add_player(self, name, controller=None):
+        """Put a new one-segment snake on a free cell"""
+        snake = Snake(verbose=False)
+        player_id = self.next_player_id
+        self.next_player_id += 1
+        player = Player(player_id, name, snake, PLAYER_COLORS[player_id % len(PLAYER_COLORS)])
+        player.controller = controller
+        self.players.append(player)
+        self._place(player)
+        return player
+
+    def remove_player(self, player):
+        """Take a player's snake off the board and the player out of the world"""
+        if player.alive:
+            for cell in player.snake.body:
+                self.occupancy.remove(cell)
+                if self.segments is not None:
+                    self.segments.remove(cell)
+        player.alive = False
+        player.controller = None
+        player.left = True
+        self.players.remove(player)
+
+    def _place(self, player):
+        cell = self.random_free_cell()
+        if cell is None:
+            player.alive = False
+            return
+        player.snake.body = [cell]
+        player.snake.direction = self.rng.choice(list(MOVES))
+        player.snake.new_block = False
+        player.alive = True
+        self.occupancy.add(cell)
+        if self.segments is not None:
+            self.segments.add(cell, player)
+
+    def _kill(self, player):
+        # The new head was never added to the grid; the rest of the body was
+        for cell in player.snake.body[1:]:
+            self.occupancy.remove(cell)
+            if self.segments is not None:
+                self.segments.remove(cell)
+        player.alive = False
+        player.deaths += 1
+        self._say(f"{player.name} crashed with length {len(player.snake.body) - 1}")
+
+    def step(self):
+        """Move every live snake one cell and resolve collisions"""
+        self.tick_count += 1
+        grid = self.occupancy
+        index = self.segments
+        level = self.level
+        width, height = self.width, self.height
+
+        moving = []
+        old_heads = {}
+        for player in self.players:
+            if not player.alive:
+                continue
+            snake = player.snake
+            if player.controller is not None:
+                direction = player.controller.current_direction
+                if direction is not None:
+                    steer_snake(snake, direction)
+            if snake.direction == "CENTER":
+                continue
+
+            tail = snake.body[-1]
+            growing = snake.new_block
+            old_heads[player] = snake.body[0]
+            snake.move()
+            x, y = snake.body[0]
+            snake.body[0] = (x % width, y % height)
+            # Tails leave before heads arrive, so following a tail is safe
+            if not growing:
+                grid.remove(tail)
+                if index is not None:
+                    index.remove(tail)
+            moving.append(player)
+
+        # Heads arriving on the same cell this step all crash
+        arrivals = {}
+        for player in moving:
+            head = player.snake.body[0]
+            arrivals[head] = arrivals.get(head, 0) + 1
+
+        # So do two heads swapping cells: one-cell snakes facing each other
+        # have both left their cells by now, so the grid does not see it
+        swapped = set()
+        left_from = {cell: player for player, cell in old_heads.items()}
+        for player in moving:
+            other = left_from.get(player.snake.body[0])
+            if other is not None and other is not player and other.snake.body[0] == old_heads[player]:
+                swapped.add(player)
+
+        # A list in player order, so respawns draw from the RNG in a fixed order
+        crashed = [player for player in moving
+                   if arrivals[player.snake.body[0]] > 1 or player in swapped
+                   or grid.is_occupied(player.snake.body[0])
+                   or (level is not None and level.is_wall(player.snake.body[0]))]
+        dead = set(crashed)
+        for player in moving:
+            if player not in dead:
+                grid.add(player.snake.body[0])
+                if index is not None:
+                    index.add(player.snake.body[0], player)
+        for player in crashed:
+            self._kill(player)
+
+        for player in moving:
+            if not player.alive:
+                continue
+            head = player.snake.body[0]
+            if head in self.food:
+                self.food.discard(head)
+                if self.food_index is not None:
+                    self.food_index.remove(head)
+                player.snake.grow()
+                player.game.increase_score()
+                self.spawn_food()
+
+        if self.respawn:
+            for player in crashed:
+                player.snake = Snake(verbose=False)
+                self._place(player)
+
+class GreedyBot:
+    """Cheap controller for crowded boards: step towards the nearest food
+    onto a free cell, never reversing"""
+    def __init__(self, world, player):
+        self.world = world
+        self.player = player
+        self.target = None
+
+    @property
+    def current_direction(self):
+        world = self.world
+        snake = self.player.snake
+        hx, hy = snake.body[0]
+        width, height = world.width, world.height
+        reverse = OPPOSITES.get(snake.direction)
+
+        # Pick a food once and keep chasing it until somebody eats it
+        if self.target not in world.food:
+            self.target = min(world.food, default=None,
+                              key=lambda food: _torus_distance((hx, hy), food, width, height))
+
+        best = None
+        for name, (dx, dy) in MOVES.items():
+            if name == reverse:
+                continue
+            cell = ((hx + dx) % width, (hy + dy) % height)
+            if world.is_blocked(cell):
+                continue
+            distance = 0
+            if self.target is not None:
+                distance = _torus_distance(cell, self.target, width, height)
+            score = (distance, name != snake.direction)
+            if best is None or score < best[0]:
+                best = (score, name)
+        return best[1] if best else snake.direction
+
+def _torus_distance(a, b, width, height):
+    dx = abs(a[0] - b[0])
+    dy = abs(a[1] - b[1])
+    return min(dx, width - dx) + min(dy, height - dy)
+
+class KeyboardController:
+    """Arrow-key input for a human player; each key press turns once"""
+    def __init__(self):
+        self.pressed = None
+
+    @property
+    def current_direction(self):
+        direction, self.pressed = self.pressed, None
+        return direction
+
+def build_world(bots, size, seed=None, human=False, verbose=True, chunk=0, food=None, obstacles=0, level=None):
+    if food is None:
+        food = max(1, bots)
+    world = MultiSnakeSimulation(size, size, seed=seed, food_count=food, verbose=verbose, chunk=chunk,
+                                 level=level)
+    world.add_obstacles(obstacles)
+    keyboard = None
+    if human:
+        keyboard = KeyboardController()
+        world.add_player("Player", keyboard)
+    for i in range(bots):
+        player = world.add_player(f"Bot {i + 1}")
+        player.controller = GreedyBot(world, player)
+    return world, keyboard
+
+def run_headless(bots, size, steps, seed=0, level=None):
+    world, _ = build_world(bots, size, seed=seed, verbose=False, level=level)
+    start = time.perf_counter()
+    for _ in range(steps):
+        world.step()
+    elapsed = time.perf_counter() - start
+    deaths = sum(p.deaths for p in world.players)
+    longest = max(len(p.snake.body) for p in world.players)
+    print(f"{bots} bots on {world.width}x{world.height}: {steps} steps in {elapsed:.2f}s "
+          f"({steps / elapsed:.0f} steps/s), {deaths} crashes, longest snake {longest}")
+
+def run_window(bots, size, human, faces=0, scroll=False, food=None, obstacles=0, level=None):
+    import pygame
+    if level is not None:
+        size = max(level.width, level.height)
+    # Boards too big to show whole get the scrolling, chunked view
+    scroll = scroll or size > 250
+    world, keyboard = build_world(bots, size, human=human, chunk=CHUNK_CELLS if scroll else 0,
+                                  food=food, obstacles=obstacles, level=level)
+    tracker = None
+    if faces:
+        # One camera and one FaceMesh pass per frame for every face player
+        from multi_face import FaceController, MultiFaceTracker
+        tracker = MultiFaceTracker(faces)
+        for slot in range(faces):
+            world.add_player(f"Face {slot + 1}", FaceController(tracker, slot))
+        tracker.start()
+    pygame.init()
+    if scroll:
+        from world_view import WorldView
+        view = WorldView(world, 800, 600)
+        board_width, board_height = view.width, view.height
+        followed = world.players[0]
+        view.camera.center_on(followed.snake.body[0])
+    else:
+        view = None
+        cell = max(2, 500 // size)
+        board_width, board_height = world.width * cell, world.height * cell
+    screen = pygame.display.set_mode((board_width, board_height + 50))
+    # Walls and obstacles never move: draw them once
+    board = None
+    if view is None and (level is not None or len(world.obstacles)):
+        board = pygame.Surface((board_width, board_height))
+        cells = list(world.obstacles.chunks.values())
+        if level is not None:
+            cells.append(level.wall_cells(0, 0, world.width, world.height))
+        for bucket in cells:
+            for x, y in bucket:
+                pygame.draw.rect(board, (110, 110, 110), (x * cell, y * cell, cell, cell))
+    pygame.display.set_caption("Snake Game - Multi-Snake")
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont('Arial', 16)
+    keys = {pygame.K_UP: 'UP', pygame.K_DOWN: 'DOWN', pygame.K_LEFT: 'LEFT', pygame.K_RIGHT: 'RIGHT'}
+    move_delay = 200 if human or faces else 50
+    last_move = 0
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif keyboard is not None and event.key in keys:
+                    keyboard.pressed = keys[event.key]
+
+        now = pygame.time.get_ticks()
+        if now - last_move >= move_delay:
+            world.step()
+            last_move = now
+
+        screen.fill((0, 0, 0))
+        if view is not None:
+            view.draw(screen, followed.snake.body[0] if followed.alive else None)
+        else:
+            if board is not None:
+                screen.blit(board, (0, 0))
+            for x, y in world.food:
+                pygame.draw.rect(screen, (0, 255, 0), (x * cell, y * cell, cell, cell))
+            for player in world.players:
+                if player.alive:
+                    for x, y in player.snake.body:
+                        pygame.draw.rect(screen, player.color, (x * cell, y * cell, cell, cell))
+        leader = max(world.players, key=lambda p: p.game.score)
+        status = f"Snakes: {len(world.players)}  Leader: {leader.name} ({leader.game.score})"
+        if view is not None:
+            status += f"  Following: {followed.name} at {followed.snake.body[0]}"
+        text = font.render(status, True, (255, 255, 255))
+        screen.blit(text, (10, board_height + 10))
+        if tracker is not None:
+            status = tracker.status if tracker.status != "Tracking" else \
+                "  ".join(f"P{slot + 1}: {tracker.describe(slot)}" for slot in range(faces))
+            text = font.render(status, True, (255, 255, 255))
+            screen.blit(text, (10, board_height + 26))
+        pygame.display.flip()
+        clock.tick(60)
+    if tracker is not None:
+        tracker.stop()
+    pygame.quit()
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Several snakes on one board")
+    parser.add_argument("--bots", type=int, default=8)
+    parser.add_argument("--size", type=int, default=50, help="board width and height in cells")
+    parser.add_argument("--player", action="store_true", help="add an arrow-key controlled snake")
+    parser.add_argument("--faces", type=int, default=0, help="add this many head-controlled snakes sharing one camera")
+    parser.add_argument("--headless", type=int, metavar="STEPS", help="run STEPS steps without a window and report speed")
+    parser.add_argument("--scroll", action="store_true",
+                        help="scrolling view that follows the first snake (always on above 250 cells)")
+    parser.add_argument("--food", type=int, default=None, help="food on the board (default: one per bot)")
+    parser.add_argument("--obstacles", type=int, default=0, help="scatter this many fixed blocks")
+    parser.add_argument("--level", help="play on a level file (sets the board size)")
+    args = parser.parse_args(argv)
+    level = None
+    if args.level:
+        from level import load_level
+        level = load_level(args.level)
+    if args.headless:
+        run_headless(args.bots, args.size, args.headless, level=level)
+    else:
+        run_window(args.bots, args.size, args.player, args.faces, args.scroll, args.food, args.obstacles, level)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
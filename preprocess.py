@@ -0,0 +1,125 @@
+import sys
+import time
+import tracemalloc
+import cv2
+import numpy as np
+
+class FramePreprocessor:
+    """Camera frames to face model input without per-frame allocations.
+
+    The capture, RGB and mirrored display images live in buffers that are
+    reused for every frame. The image is not flipped for the model; callers
+    mirror landmark x coordinates instead (mirror_x). The RGB buffer is
+    handed over read-only, which lets MediaPipe use it without copying."""
+    def __init__(self):
+        self.frame = None    # BGR, as captured (not mirrored)
+        self.rgb = None      # model input
+        self.small = None    # downscaled BGR, for a reduced model input
+        self.display = None  # mirrored BGR for on-screen drawing
+
+    def read(self, cap):
+        """Read the next frame into the capture buffer"""
+        ret, frame = cap.read(self.frame)
+        if ret:
+            self.frame = frame
+        return ret
+
+    def model_input(self, scale=1.0):
+        """Read-only RGB view of the current frame, shrunk by scale when it
+        is below 1. Landmarks are normalized, so callers keep converting
+        them with the full frame size."""
+        frame = self.frame
+        if scale < 1:
+            h, w, _ = frame.shape
+            size = (max(1, int(w * scale)), max(1, int(h * scale)))
+            if self.small is None or self.small.shape[:2] != (size[1], size[0]):
+                self.small = np.empty((size[1], size[0], 3), np.uint8)
+            cv2.resize(frame, size, dst=self.small, interpolation=cv2.INTER_AREA)
+            frame = self.small
+        if self.rgb is None or self.rgb.shape != frame.shape:
+            self.rgb = np.empty_like(frame)
+        self.rgb.flags.writeable = True
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        self.rgb.flags.writeable = False
+        return self.rgb
+
+    def mirrored(self):
+        """Mirror image of the current frame, for display only"""
+        frame = self.frame
+        if self.display is None or self.display.shape != frame.shape:
+            self.display = np.empty_like(frame)
+        cv2.flip(frame, 1, dst=self.display)
+        return self.display
+
+def mirror_x(x):
+    """Normalized landmark x on the mirrored (selfie) image"""
+    return 1.0 - x
+
+def _old_path(frame):
+    # What each tracking loop used to do per frame
+    flipped = cv2.flip(frame, 1)
+    return cv2.cvtColor(flipped, cv2.COLOR_BGR2RGB)
+
+def _measure(step, frames):
+    """Seconds and transiently allocated bytes per frame"""
+    step()  # buffers are allocated once, before measuring
+    tracemalloc.start()
+    allocated = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        step()
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    return elapsed / frames, allocated / frames
+
+class _FrameSource:
+    """Stand-in capture that hands out the same frame (no camera needed)"""
+    def __init__(self, frame):
+        self.source = frame
+
+    def read(self, image=None):
+        if image is None:
+            return True, self.source.copy()
+        image[...] = self.source
+        return True, image
+
+def benchmark(frames=300, width=640, height=480):
+    cap = _FrameSource(np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+    def before():
+        ret, frame = cap.read()
+        _old_path(frame)
+
+    prep = FramePreprocessor()
+
+    def after():
+        prep.read(cap)
+        prep.model_input()
+
+    def after_with_display():
+        after()
+        prep.mirrored()
+
+    print(f"{width}x{height} frames, {frames} per run")
+    for label, step in (("flip + cvtColor (before)", before),
+                        ("reused buffers (after)", after),
+                        ("reused buffers + display", after_with_display)):
+        seconds, allocated = _measure(step, frames)
+        print(f"  {label:<26} {seconds * 1e6:>8.0f} us/frame  {allocated / 1024:>8.0f} KiB allocated/frame "
+              f"({allocated * 30 / 2 ** 20:.1f} MiB/s at 30 fps)")
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare frame preprocessing cost and allocations")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args(argv)
+    benchmark(args.frames, args.width, args.height)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,346 @@
+import sys
+import time
+import pygame
+from effects import Effects
+
+class GameRenderer:
+    """Draws a game (any Simulation) onto a pygame Surface"""
+    def __init__(self, width=500, height=700):
+        self.width = width
+        self.height = height
+        self.fonts = {}
+        # Particles and baked animations, reused for every effect
+        self.effects = Effects()
+        self.countdown_text = {}
+        # Plain segments instead of the textured snake (set to shed load)
+        self.flat_snake = False
+        # Grid and walls are drawn once per level, then blitted every frame
+        self.board = None
+        self.board_level = None
+
+        # Colors
+        self.BLACK = (0, 0, 0)
+        self.WHITE = (255, 255, 255)
+        self.RED = (255, 0, 0)
+        self.GREEN = (0, 255, 0)
+        self.ORANGE = (255, 165, 0)
+        self.DARK_ORANGE = (255, 140, 0)
+        self.LIGHT_ORANGE = (255, 190, 0)
+        self.YELLOW = (255, 255, 0)
+
+    def font(self, size):
+        """Fonts are looked up once and reused every frame"""
+        if size not in self.fonts:
+            self.fonts[size] = pygame.font.SysFont('Arial', size)
+        return self.fonts[size]
+
+    def draw_textured_snake(self, win, sim):
+        """Draw snake with texture, eyes, and tail"""
+        for i, segment in enumerate(sim.snake.body):
+            x, y = segment[0] * 20 + 10, segment[1] * 20 + 10  # Center of cell
+
+            # Head is slightly larger
+            radius = 12 if i == 0 else 8
+
+            # Draw main segment
+            pygame.draw.circle(win, self.ORANGE, (x, y), radius)
+
+            # Add texture pattern
+            if i == 0:  # Head
+                # Add eyes
+                self.draw_snake_eyes(win, x, y, sim.snake.direction)
+                # Add head pattern
+                pygame.draw.circle(win, self.DARK_ORANGE, (x, y), radius - 2)
+                pygame.draw.circle(win, self.ORANGE, (x, y), radius - 4)
+            elif i == len(sim.snake.body) - 1:  # Tail
+                # Draw tail
+                self.draw_snake_tail(win, x, y, sim.snake.direction)
+            else:  # Body segments
+                # Add texture pattern
+                pygame.draw.circle(win, self.DARK_ORANGE, (x, y), radius - 2)
+                pygame.draw.circle(win, self.LIGHT_ORANGE, (x, y), radius - 4)
+                pygame.draw.circle(win, self.ORANGE, (x, y), radius - 6)
+
+                # Add small texture dots
+                if i % 2 == 0:  # Alternate segments for texture
+                    pygame.draw.circle(win, self.DARK_ORANGE, (x - 2, y - 2), 1)
+                    pygame.draw.circle(win, self.DARK_ORANGE, (x + 2, y + 2), 1)
+
+    def draw_flat_snake(self, win, sim):
+        """Draw snake as plain squares, one call per segment"""
+        for x, y in sim.snake.body[1:]:
+            pygame.draw.rect(win, self.ORANGE, (x * 20 + 2, y * 20 + 2, 16, 16))
+        x, y = sim.snake.body[0]
+        pygame.draw.rect(win, self.DARK_ORANGE, (x * 20, y * 20, 20, 20))
+
+    def draw_snake_eyes(self, win, x, y, direction):
+        """Draw eyes on snake head"""
+        # Main eyes
+        if direction == 'RIGHT':
+            pygame.draw.circle(win, self.BLACK, (x + 4, y - 3), 2)
+            pygame.draw.circle(win, self.BLACK, (x + 4, y + 3), 2)
+            # Eye highlights
+            pygame.draw.circle(win, self.WHITE, (x + 5, y - 4), 1)
+            pygame.draw.circle(win, self.WHITE, (x + 5, y + 2), 1)
+        elif direction == 'LEFT':
+            pygame.draw.circle(win, self.BLACK, (x - 4, y - 3), 2)
+            pygame.draw.circle(win, self.BLACK, (x - 4, y + 3), 2)
+            # Eye highlights
+            pygame.draw.circle(win, self.WHITE, (x - 5, y - 4), 1)
+            pygame.draw.circle(win, self.WHITE, (x - 5, y + 2), 1)
+        elif direction == 'UP':
+            pygame.draw.circle(win, self.BLACK, (x - 3, y - 4), 2)
+            pygame.draw.circle(win, self.BLACK, (x + 3, y - 4), 2)
+            # Eye highlights
+            pygame.draw.circle(win, self.WHITE, (x - 4, y - 5), 1)
+            pygame.draw.circle(win, self.WHITE, (x + 2, y - 5), 1)
+        elif direction == 'DOWN':
+            pygame.draw.circle(win, self.BLACK, (x - 3, y + 4), 2)
+            pygame.draw.circle(win, self.BLACK, (x + 3, y + 4), 2)
+            # Eye highlights
+            pygame.draw.circle(win, self.WHITE, (x - 4, y + 3), 1)
+            pygame.draw.circle(win, self.WHITE, (x + 2, y + 3), 1)
+
+    def draw_snake_tail(self, win, x, y, direction):
+        """Draw tail at the end of snake"""
+        # Draw tail segment
+        pygame.draw.circle(win, self.DARK_ORANGE, (x, y), 6)
+        pygame.draw.circle(win, self.ORANGE, (x, y), 4)
+
+        # Draw tail tip based on direction
+        if direction == 'RIGHT':
+            pygame.draw.circle(win, self.DARK_ORANGE, (x + 6, y), 3)
+        elif direction == 'LEFT':
+            pygame.draw.circle(win, self.DARK_ORANGE, (x - 6, y), 3)
+        elif direction == 'UP':
+            pygame.draw.circle(win, self.DARK_ORANGE, (x, y - 6), 3)
+        elif direction == 'DOWN':
+            pygame.draw.circle(win, self.DARK_ORANGE, (x, y + 6), 3)
+
+    def draw_round_food(self, win, sim):
+        """Draw round food"""
+        if sim.food.position is None:
+            return
+        x, y = sim.food.position[0] * 20 + 10, sim.food.position[1] * 20 + 10
+        pygame.draw.circle(win, self.GREEN, (x, y), 8)
+
+    def draw_bonus_food(self, win, sim):
+        """Draw bonus food with heartbeat effect"""
+        if sim.bonus_food_active and sim.bonus_food_position:
+            x, y = sim.bonus_food_position[0] * 20 + 10, sim.bonus_food_position[1] * 20 + 10
+
+            # Heartbeat effect (from a precomputed table)
+            time_since_spawn = sim.ms_since(sim.bonus_food_spawn_tick)
+            heartbeat = self.effects.heartbeat(time_since_spawn)
+
+            # Calculate remaining time
+            remaining_time = max(0, sim.bonus_food_duration - time_since_spawn)
+            time_ratio = remaining_time / sim.bonus_food_duration
+
+            # Size based on heartbeat and time remaining
+            base_size = 16
+            size = int(base_size * heartbeat * (0.5 + 0.5 * time_ratio))
+
+            # Color intensity based on time remaining
+            color_intensity = int(255 * time_ratio)
+            bonus_color = (255, color_intensity, color_intensity)
+
+            pygame.draw.circle(win, bonus_color, (x, y), size)
+
+            # Draw time remaining indicator
+            if remaining_time < 2000:  # Last 2 seconds
+                seconds = remaining_time // 1000
+                time_text = self.countdown_text.get(seconds)
+                if time_text is None:
+                    time_text = self.font(12).render(f"{seconds}s", True, self.WHITE)
+                    self.countdown_text[seconds] = time_text
+                text_rect = time_text.get_rect(center=(x, y - 25))
+                win.blit(time_text, text_rect)
+
+    def draw_hit_effect(self, win, sim):
+        """Draw hit effect at collision point"""
+        if sim.hit_effect_active and sim.hit_effect_position:
+            time_since_hit = sim.ms_since(sim.hit_effect_start_tick)
+
+            if time_since_hit < sim.hit_effect_duration:
+                x, y = sim.hit_effect_position[0] * 20 + 10, sim.hit_effect_position[1] * 20 + 10
+
+                # Expanding circle effect, one of the baked frames
+                frame = self.effects.hit_frame(time_since_hit / sim.hit_effect_duration)
+                half = frame.get_width() // 2
+                win.blit(frame, (x - half, y - half))
+            # Expired effects are just not drawn; rendering never changes the game
+
+    def board_layer(self, level):
+        """The empty board: grid lines and the level's walls"""
+        if self.board is None or level is not self.board_level:
+            board = pygame.Surface((500, 500))
+            board.fill(self.BLACK)
+            # Draw grid (adjusted for smaller size)
+            for x in range(0, 500, 20):
+                pygame.draw.line(board, (40, 40, 40), (x, 0), (x, 500))
+            for y in range(0, 500, 20):
+                pygame.draw.line(board, (40, 40, 40), (0, y), (500, y))
+            if level is not None:
+                for x, y in level.wall_cells(0, 0, level.width, level.height):
+                    pygame.draw.rect(board, (110, 110, 110), (x * 20 + 1, y * 20 + 1, 19, 19))
+            self.board = board
+            self.board_level = level
+        return self.board
+
+    def draw(self, win, sim, instructions=()):
+        """Draw the whole game screen, with the given lines in the panel below the board"""
+        win.fill(self.BLACK)
+        win.blit(self.board_layer(sim.level), (0, 0))
+
+        # Draw snake (textured round with eyes and tail)
+        if self.flat_snake:
+            self.draw_flat_snake(win, sim)
+        else:
+            self.draw_textured_snake(win, sim)
+
+        # Draw food (round)
+        self.draw_round_food(win, sim)
+
+        # Draw bonus food with heartbeat
+        self.draw_bonus_food(win, sim)
+
+        # Draw hit effect
+        self.draw_hit_effect(win, sim)
+
+        # Particle bursts for whatever happened since the last frame
+        self.effects.update(sim)
+        self.effects.draw_particles(win, sim.now_ms())
+
+        # Draw score
+        text = self.font(30).render(f"Score: {sim.game.score}", True, self.WHITE)
+        win.blit(text, (10, 10))
+
+        # Draw instructions in separate area below game
+        instructions_area = pygame.Rect(0, 500, 500, 200)
+        pygame.draw.rect(win, (40, 40, 40), instructions_area)
+
+        font = self.font(16)
+        for i, text in enumerate(instructions):
+            text_surface = font.render(text, True, self.WHITE)
+            win.blit(text_surface, (10, 510 + i * 20))
+
+        # Draw pause status
+        if sim.paused:
+            text = self.font(36).render("PAUSED", True, self.YELLOW)
+            text_rect = text.get_rect(center=(self.width//2, self.height//2))
+            win.blit(text, text_rect)
+
+        # Draw game over screen
+        if sim.game_over:
+            font_large = self.font(48)
+            font_small = self.font(24)
+
+            game_over_text = font_large.render("GAME OVER", True, self.RED)
+            score_text = font_small.render(f"Final Score: {sim.game.score}", True, self.WHITE)
+            restart_text = font_small.render("Press R to restart or ESC to quit", True, self.WHITE)
+
+            game_over_rect = game_over_text.get_rect(center=(self.width//2, self.height//2 - 50))
+            score_rect = score_text.get_rect(center=(self.width//2, self.height//2))
+            restart_rect = restart_text.get_rect(center=(self.width//2, self.height//2 + 50))
+
+            win.blit(game_over_text, game_over_rect)
+            win.blit(score_text, score_rect)
+            win.blit(restart_text, restart_rect)
+
+    def draw_start_menu(self, win, title, status, progress):
+        """Loading screen with a progress bar, shown while head tracking starts"""
+        win.fill(self.BLACK)
+        text = self.font(36).render(title, True, self.ORANGE)
+        win.blit(text, text.get_rect(center=(self.width//2, self.height//2 - 80)))
+
+        text = self.font(20).render(status, True, self.WHITE)
+        win.blit(text, text.get_rect(center=(self.width//2, self.height//2 - 20)))
+
+        bar = pygame.Rect(50, self.height//2 + 10, self.width - 100, 20)
+        pygame.draw.rect(win, (40, 40, 40), bar)
+        filled = bar.copy()
+        filled.width = int(bar.width * min(max(progress, 0), 1))
+        pygame.draw.rect(win, self.GREEN, filled)
+        pygame.draw.rect(win, self.WHITE, bar, 1)
+
+        text = self.font(16).render("Look straight at the camera - ESC to quit", True, self.WHITE)
+        win.blit(text, text.get_rect(center=(self.width//2, self.height//2 + 70)))
+
+def status_lines(sim):
+    """Panel text for renders that have no controls to explain"""
+    return [
+        f"Snake direction: {sim.snake.direction}",
+        f"Snake length: {len(sim.snake.body)}",
+        f"Score: {sim.game.score}",
+        f"Food count: {sim.food_count}",
+        f"Bonus food: {'Active' if sim.bonus_food_active else 'Inactive'}",
+        f"Tick: {sim.tick_count}",
+    ]
+
+class OffscreenRenderer:
+    """Renders a Simulation into an offscreen Surface, no window needed.
+
+    render() returns a (height, width, 3) uint8 NumPy array. The pixels are
+    copied into the same preallocated array every time, so nothing is
+    allocated per frame and the Surface is never left locked; copy the
+    array if a frame has to outlive the next render()."""
+    def __init__(self, sim, width=500, height=700):
+        import numpy as np
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self.sim = sim
+        self.renderer = GameRenderer(width, height)
+        self.surface = pygame.Surface((width, height), 0, 32)
+        self.pixels = np.empty((width, height, 3), np.uint8)
+        self.frame = self.pixels.transpose(1, 0, 2)
+
+    def render(self, instructions=None):
+        if instructions is None:
+            instructions = status_lines(self.sim)
+        self.renderer.draw(self.surface, self.sim, instructions)
+        # A pixels3d() view would lock the Surface for as long as any
+        # caller holds the array, and the next draw would then fail
+        pygame.pixelcopy.surface_to_array(self.pixels, self.surface, 'P')
+        return self.frame
+
+def benchmark(frames=600):
+    """Frames per second for 500x700 offscreen renders of one mid-game
+    state, and separately what the autopilot game costs per move"""
+    from autopilot import Autopilot
+    from simulation import Simulation
+
+    sim = Simulation(seed=0, verbose=False)
+    pilot = Autopilot(sim)
+    start = time.perf_counter()
+    for _ in range(frames):
+        for _ in range(sim.move_delay // 10):
+            sim.set_input_direction(pilot.current_direction)
+            sim.step()
+        if sim.game_over:
+            sim.reset_game()
+    elapsed = time.perf_counter() - start
+    print(f"Simulation and autopilot: {frames} moves in {elapsed:.2f}s ({frames / elapsed:.0f} moves/s)")
+
+    # Renders alone, of the state the game above ended in
+    offscreen = OffscreenRenderer(sim)
+    frame = offscreen.render()
+    checksum = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame = offscreen.render()
+        checksum += int(frame[250, 250, 0])
+    elapsed = time.perf_counter() - start
+    print(f"Rendering: {frames} frames of {frame.shape[1]}x{frame.shape[0]} in {elapsed:.2f}s "
+          f"({frames / elapsed:.0f} frames/s)")
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark offscreen rendering to NumPy frames")
+    parser.add_argument("--frames", type=int, default=600)
+    args = parser.parse_args(argv)
+    benchmark(args.frames)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,161 @@
+import os
+import struct
+import sys
+import time
+from snake import DIRECTIONS, DIRECTION_CODES
+from simulation import Simulation, TICK_MS
+
+# Session log layout: header, fixed-size events, then an end marker with the
+# final score and snake length so a replay can check it reproduced the session
+LOG_MAGIC = b'SNKL'
+LOG_VERSION = 1
+HEADER = struct.Struct('<4sHQH')  # magic, version, seed, tick length (ms)
+EVENT = struct.Struct('<IBB')     # tick, event kind, direction code
+RESULT = struct.Struct('<II')     # final score, final snake length
+
+EVENT_KINDS = ('end', 'hold', 'press', 'pause', 'restart')
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_KINDS)}
+
+SESSION_DIR = "sessions"
+
+class SessionRecorder:
+    """Collect the inputs of one session in memory"""
+    def __init__(self, seed):
+        self.seed = seed
+        self.events = bytearray()
+
+    def record(self, tick, kind, direction=None):
+        code = DIRECTION_CODES[direction] if direction is not None else 0
+        self.events += EVENT.pack(tick, EVENT_CODES[kind], code)
+
+    def save(self, path, sim):
+        """Write the log, ending at the simulation's current tick"""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(LOG_MAGIC, LOG_VERSION, self.seed, TICK_MS))
+            f.write(self.events)
+            f.write(EVENT.pack(sim.tick_count, EVENT_CODES['end'], 0))
+            f.write(RESULT.pack(sim.game.score, len(sim.snake.body)))
+        return path
+
+def new_session_path():
+    """Timestamped file name for a freshly recorded session"""
+    return os.path.join(SESSION_DIR, time.strftime("session-%Y%m%d-%H%M%S.snkl"))
+
+class SessionLog:
+    """A recorded session loaded from disk"""
+    def __init__(self, seed, events, end_tick, score, length):
+        self.seed = seed
+        self.events = events  # list of (tick, kind, direction)
+        self.end_tick = end_tick
+        self.score = score
+        self.length = length
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, seed, tick_ms = HEADER.unpack_from(data, 0)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ValueError(f"{path} is not a version {LOG_VERSION} session log")
+        if tick_ms != TICK_MS:
+            raise ValueError(f"{path} was recorded with {tick_ms} ms ticks, expected {TICK_MS}")
+
+        events = []
+        offset = HEADER.size
+        while True:
+            tick, kind, code = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            if EVENT_KINDS[kind] == 'end':
+                break
+            events.append((tick, EVENT_KINDS[kind], DIRECTIONS[code]))
+        score, length = RESULT.unpack_from(data, offset)
+        return cls(seed, events, tick, score, length)
+
+class ReplayCursor:
+    """Feed recorded events into a simulation as its ticks come due"""
+    def __init__(self, log):
+        self.events = log.events
+        self.index = 0
+
+    def apply(self, sim):
+        events = self.events
+        while self.index < len(events) and events[self.index][0] <= sim.tick_count:
+            _, kind, direction = events[self.index]
+            self.index += 1
+            if kind == 'hold':
+                sim.set_input_direction(direction)
+            elif kind == 'press':
+                sim.press_direction(direction)
+            elif kind == 'pause':
+                sim.toggle_pause()
+            elif kind == 'restart':
+                sim.reset_game()
+
+def replay_headless(log):
+    """Run a recorded session through the rules as fast as possible"""
+    sim = Simulation(seed=log.seed, verbose=False)
+    cursor = ReplayCursor(log)
+    while sim.tick_count < log.end_tick:
+        cursor.apply(sim)
+        sim.step()
+    return sim
+
+def replay_realtime(log):
+    """Play a recorded session back on screen at normal speed"""
+    import pygame
+    from test_snake_movement import SnakeMovementTest
+
+    class ReplayViewer(SnakeMovementTest):
+        def __init__(self):
+            super().__init__(seed=log.seed, record=False)
+            pygame.display.set_caption("Snake Game - Replay")
+            self.cursor = ReplayCursor(log)
+
+        def handle_events(self):
+            # Only quitting is accepted; all game input comes from the log
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    self.running = False
+
+        def step(self):
+            self.cursor.apply(self)
+            super().step()
+            if self.tick_count >= log.end_tick:
+                self.running = False
+
+    viewer = ReplayViewer()
+    viewer.run()
+
+def main(argv):
+    if not argv:
+        print("Usage: python replay.py [--headless] SESSION.snkl [SESSION.snkl ...]")
+        return 1
+    headless = "--headless" in argv
+    paths = [arg for arg in argv if arg != "--headless"]
+
+    if not headless:
+        replay_realtime(SessionLog.load(paths[0]))
+        return 0
+
+    mismatches = 0
+    start = time.perf_counter()
+    for path in paths:
+        log = SessionLog.load(path)
+        sim = replay_headless(log)
+        length = len(sim.snake.body)
+        match = sim.game.score == log.score and length == log.length
+        if not match:
+            mismatches += 1
+        print(f"{path}: score {sim.game.score} (recorded {log.score}), "
+              f"length {length} (recorded {log.length}) {'OK' if match else 'MISMATCH'}")
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {len(paths)} session(s) in {elapsed:.3f}s, {mismatches} mismatch(es)")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,60 @@
+import heapq
+import itertools
+
+class Timer:
+    """Handle for a scheduled callback; cancel() before it fires to drop it"""
+    __slots__ = ("due", "interval", "callback", "cancelled")
+
+    def __init__(self, due, interval, callback):
+        self.due = due
+        self.interval = interval
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class TickScheduler:
+    """Callbacks due at simulation ticks, kept in a heap.
+
+    A tick with nothing due costs one comparison, however many timers are
+    waiting. Timers due on the same tick fire in the order they were
+    scheduled. Cancelled timers stay in the heap until they come up."""
+    def __init__(self):
+        self.heap = []
+        self.order = itertools.count()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def at(self, tick, callback, interval=0):
+        """Call callback(tick) at the given tick, then every interval ticks
+        if interval is set"""
+        timer = Timer(tick, interval, callback)
+        heapq.heappush(self.heap, (tick, next(self.order), timer))
+        return timer
+
+    def due(self, tick):
+        """Whether anything is due at tick (cheap enough to call every tick)"""
+        heap = self.heap
+        return heap and heap[0][0] <= tick
+
+    def next_due(self):
+        """Tick of the earliest timer, or None when nothing is scheduled
+        (a cancelled timer still counts until it comes up)"""
+        return self.heap[0][0] if self.heap else None
+
+    def run_due(self, tick):
+        """Fire every timer due at or before tick"""
+        heap = self.heap
+        while heap and heap[0][0] <= tick:
+            _, _, timer = heapq.heappop(heap)
+            if timer.cancelled:
+                continue
+            if timer.interval:
+                timer.due += timer.interval
+                heapq.heappush(heap, (timer.due, next(self.order), timer))
+            timer.callback(tick)
+
+    def clear(self):
+        self.heap.clear()
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import sys
+from multiplayer import MOVES, GreedyBot, KeyboardController, MultiSnakeSimulation
+
+# Messages waiting for one client; a client that falls further behind is
+# switched to a single full-state resync instead of buffering more
+CLIENT_QUEUE_SIZE = 64
+
+def _encode(message):
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+class DeltaTracker:
+    """Turns consecutive world states into small per-tick deltas"""
+    def __init__(self, world):
+        self.world = world
+        self.seen = {}  # Player.id -> (snake object, head, length, score)
+        self.food = set()
+
+    def full_state(self):
+        """Everything a new (or resyncing) client needs"""
+        world = self.world
+        return {
+            't': 'full', 'tick': world.tick_count, 'w': world.width, 'h': world.height,
+            'snakes': [[p.id, p.name, p.game.score, p.snake.body] for p in world.players if p.alive],
+            'food': sorted(world.food),
+        }
+
+    def delta(self):
+        """Changes since the previous call: head added and tail cells removed
+        per snake, spawns, deaths (and players who left), food moved and
+        scores changed"""
+        world = self.world
+        moved, spawned, dead, scores = [], [], [], []
+        present = set()
+        for player in world.players:
+            i = player.id
+            present.add(i)
+            before = self.seen.get(i)
+            if not player.alive:
+                if before is not None:
+                    dead.append(i)
+                    del self.seen[i]
+                continue
+            snake = player.snake
+            body = snake.body
+            now = (snake, body[0], len(body), player.game.score)
+            if before is None or before[0] is not snake:
+                spawned.append([i, player.name, body])
+            elif before[1] != body[0]:
+                # One head cell in; the tail shrinks unless the snake grew
+                moved.append([i, body[0][0], body[0][1], before[2] + 1 - len(body)])
+            if before is not None and before[3] != player.game.score:
+                scores.append([i, player.game.score])
+            self.seen[i] = now
+        for i in [i for i in self.seen if i not in present]:
+            dead.append(i)
+            del self.seen[i]
+
+        food = world.food
+        message = {'t': 'd', 'tick': world.tick_count}
+        if moved:
+            message['m'] = moved
+        if spawned:
+            message['sp'] = spawned
+        if dead:
+            message['x'] = dead
+        if scores:
+            message['sc'] = scores
+        if food != self.food:
+            message['f+'] = sorted(food - self.food)
+            message['f-'] = sorted(self.food - food)
+            self.food = set(food)
+        return message
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.queue = asyncio.Queue(CLIENT_QUEUE_SIZE)
+        self.needs_resync = True
+        self.player = None
+        self.resyncs = 0
+
+class GameServer:
+    """Authoritative simulation broadcasting deltas to every client"""
+    def __init__(self, world, move_delay=200):
+        self.world = world
+        self.move_delay = move_delay
+        self.tracker = DeltaTracker(world)
+        self.tracker.delta()
+        self.clients = set()
+
+    def broadcast(self, payload):
+        for client in self.clients:
+            if not client.needs_resync:
+                self.send(client, payload)
+
+    def send(self, client, payload):
+        """Queue an encoded message for one client"""
+        try:
+            client.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Too slow: forget its backlog and send one full state later
+            client.needs_resync = True
+            client.resyncs += 1
+            while not client.queue.empty():
+                client.queue.get_nowait()
+            client.queue.put_nowait(None)
+
+    async def tick_loop(self):
+        while True:
+            self.world.step()
+            # Encoded once, shared by every client queue
+            self.broadcast(_encode(self.tracker.delta()))
+            await asyncio.sleep(self.move_delay / 1000)
+
+    async def _send_loop(self, client):
+        while True:
+            if client.needs_resync:
+                client.needs_resync = False
+                client.writer.write(_encode(self.tracker.full_state()))
+            payload = await client.queue.get()
+            if payload is not None:
+                client.writer.write(payload)
+            await client.writer.drain()
+
+    async def handle_client(self, reader, writer):
+        client = Client(reader, writer)
+        self.clients.add(client)
+        sender = asyncio.ensure_future(self._send_loop(client))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(request, dict):
+                    continue
+                if 'join' in request and client.player is None:
+                    client.player = self.world.add_player(str(request['join'])[:20], KeyboardController())
+                    self.send(client, _encode({'t': 'you', 'id': client.player.id}))
+                elif request.get('dir') in MOVES and client.player is not None:
+                    client.player.controller.pressed = request['dir']
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            if client.player is not None:
+                self.world.remove_player(client.player)
+            writer.close()
+
+async def serve(host, port, world, move_delay):
+    game_server = GameServer(world, move_delay)
+    server = await asyncio.start_server(game_server.handle_client, host, port)
+    print(f"Snake server listening on {host}:{port}")
+    async with server:
+        await asyncio.gather(server.serve_forever(), game_server.tick_loop())
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Authoritative snake server for players and spectators")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--size", type=int, default=25, help="board width and height in cells")
+    parser.add_argument("--bots", type=int, default=4)
+    parser.add_argument("--move-delay", type=int, default=200, help="milliseconds per step")
+    args = parser.parse_args(argv)
+
+    world = MultiSnakeSimulation(args.size, args.size, food_count=max(1, args.bots), verbose=False)
+    for i in range(args.bots):
+        player = world.add_player(f"Bot {i + 1}")
+        player.controller = GreedyBot(world, player)
+    try:
+        asyncio.run(serve(args.host, args.port, world, args.move_delay))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiplayer import GreedyBot, MultiSnakeSimulation
+from server import GameServer
+
+class LoopbackClient:
+    """Spectator (or player) that rebuilds the board from the server's deltas"""
+    def __init__(self, player=False):
+        self.player = player
+        self.snakes = {}
+        self.food = set()
+        self.messages = 0
+        self.bytes = 0
+        self.fulls = 0
+
+    def apply(self, message):
+        kind = message['t']
+        if kind == 'full':
+            self.fulls += 1
+            self.snakes = {i: [tuple(c) for c in body] for i, _, _, body in message['snakes']}
+            self.food = {tuple(c) for c in message['food']}
+        elif kind == 'd':
+            for i, x, y, removed in message.get('m', ()):
+                body = self.snakes[i]
+                body.insert(0, (x, y))
+                if removed:
+                    del body[-removed:]
+            for i, _, body in message.get('sp', ()):
+                self.snakes[i] = [tuple(c) for c in body]
+            for i in message.get('x', ()):
+                self.snakes.pop(i, None)
+            self.food -= {tuple(c) for c in message.get('f-', ())}
+            self.food |= {tuple(c) for c in message.get('f+', ())}
+
+    async def run(self, host, port, idle_timeout):
+        """Read until the server has been quiet for idle_timeout seconds"""
+        reader, writer = await asyncio.open_connection(host, port)
+        if self.player:
+            writer.write(b'{"join":"load"}\n')
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    break
+                self.messages += 1
+                self.bytes += len(line)
+                self.apply(json.loads(line))
+                if self.player and random.random() < 0.2:
+                    direction = random.choice(['UP', 'DOWN', 'LEFT', 'RIGHT'])
+                    writer.write(json.dumps({'dir': direction}).encode() + b'\n')
+        finally:
+            writer.close()
+
+def run_client_batch(port, count, players, idle_timeout):
+    """One worker process driving a batch of loopback clients"""
+    async def batch():
+        clients = [LoopbackClient(player=i < players) for i in range(count)]
+        await asyncio.gather(*(c.run('127.0.0.1', port, idle_timeout) for c in clients))
+        return [(c.messages, c.bytes, c.fulls, sorted((i, b) for i, b in c.snakes.items()), sorted(c.food))
+                for c in clients]
+    return asyncio.run(batch())
+
+async def load_test(clients, players, seconds, move_delay, size, bots, port, workers):
+    world = MultiSnakeSimulation(size, size, seed=1, food_count=max(1, bots), verbose=False)
+    for i in range(bots):
+        player = world.add_player(f"Bot {i + 1}")
+        player.controller = GreedyBot(world, player)
+    game_server = GameServer(world, move_delay)
+    server = await asyncio.start_server(game_server.handle_client, '127.0.0.1', port)
+
+    # Clients live in worker processes so they do not compete with the server loop
+    loop = asyncio.get_running_loop()
+    idle_timeout = 2.0
+    with ProcessPoolExecutor(workers) as pool:
+        batches = []
+        for w in range(workers):
+            count = clients // workers + (w < clients % workers)
+            batch_players = players // workers + (w < players % workers)
+            batches.append(loop.run_in_executor(pool, run_client_batch, port, count, batch_players, idle_timeout))
+        ticker = asyncio.ensure_future(game_server.tick_loop())
+        start = time.perf_counter()
+        await asyncio.sleep(seconds)
+        ticker.cancel()
+        elapsed = time.perf_counter() - start
+        # Clients disconnect once the stream goes quiet; players leave the world then,
+        # so capture the final state first
+        expected = sorted((p.id, list(p.snake.body)) for p in world.players
+                          if p.alive and p.name != "load")
+        bots = {p.id for p in world.players if p.name != "load"}
+        expected_food = sorted(world.food)
+        results = [r for batch in await asyncio.gather(*batches) for r in batch]
+    server.close()
+    await server.wait_closed()
+
+    messages = sum(r[0] for r in results)
+    total_bytes = sum(r[1] for r in results)
+    resyncs = sum(r[2] - 1 for r in results if r[2])
+    # Players' own snakes vanish from the server as they disconnect, so only
+    # bot snakes and food are compared
+    in_sync = sum(1 for r in results
+                  if [s for s in r[3] if s[0] in bots] == expected
+                  and r[4] == expected_food)
+    print(f"{clients} clients ({players} playing) in {workers} processes, "
+          f"{world.tick_count} ticks in {elapsed:.1f}s")
+    print(f"{messages} messages ({messages / elapsed:.0f}/s), {total_bytes / 1024:.0f} KiB, "
+          f"{total_bytes / max(messages, 1):.0f} bytes per message")
+    print(f"{resyncs} slow-client resyncs, {in_sync}/{clients} clients match the server state")
+    return 0 if in_sync == clients else 1
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Load test the snake server over loopback")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--move-delay", type=int, default=50, help="milliseconds per step")
+    parser.add_argument("--size", type=int, default=50)
+    parser.add_argument("--bots", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+    return asyncio.run(load_test(args.clients, args.players, args.seconds, args.move_delay,
+                                 args.size, args.bots, args.port, args.workers))
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,352 @@
+import random
+from snake import Snake
+from food import Food, random_free_cell
+from game import Game
+from grid import OccupancyGrid
+from scheduler import TickScheduler
+from snapshot import save_state, load_state
+
+# All game logic advances in fixed ticks of this length, never wall time
+TICK_MS = 10
+# Upper bound on ticks run in one advance() call after a long stall
+MAX_CATCHUP_TICKS = 25
+
+def steer_snake(snake, direction):
+    """Turn a snake, pausing it when the turn would reverse it.
+    Returns False when the turn was blocked."""
+    if direction == snake.direction:
+        return True
+    if snake.change_direction(direction):
+        return True
+    snake.direction = "CENTER"
+    return False
+
+class Simulation:
+    """Game rules shared by every mode, driven by simulation ticks"""
+    def __init__(self, seed=None, verbose=True, level=None):
+        # One seed determines every food and bonus spawn of the session
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.verbose = verbose
+        self.recorder = None
+
+        # Walls and spawn point of a 25x25 level (see level.py), or None
+        if level is not None and (level.width, level.height) != (25, 25):
+            raise ValueError(f"{level} does not fit the 25x25 board")
+        self.level = level
+
+        # Finished games go to the leaderboard, when one is attached
+        self.leaderboard = None
+        self.player_name = "Player"
+        self.control_mode = "keyboard"
+
+        self.tick_count = 0
+        self.pending_ms = 0
+        self.input_direction = None
+        self.queued_directions = []
+
+        # Timing (milliseconds, converted to ticks when compared)
+        self.move_delay = 200
+        self.bonus_food_duration = 5000  # 5 seconds
+        self.hit_effect_duration = 1000  # 1 second
+
+        # Cells covered by the snake, kept in step with every move; walls
+        # are marked too, so computer players steer around them
+        self.occupancy = OccupancyGrid(25, 25, level.wall_mask() if level is not None else None)
+
+        # Timed events fire from here instead of being polled every tick;
+        # the round's own timers are replaced by every new round
+        self.timers = TickScheduler()
+        self.move_timer = None
+        self.bonus_timer = None
+        self.hit_effect_timer = None
+
+        self._new_round()
+
+    def _new_round(self):
+        """Create fresh game objects for a new round"""
+        self.snake = Snake(verbose=self.verbose)
+        if self.level is not None:
+            self.snake.body = [self.level.spawn]
+            self.snake.direction = self.level.direction
+        self.food = Food(self.snake.body, rng=self.rng, walls=self.level)
+        self.game = Game()
+        self.occupancy.rebuild([self.snake.body])
+        self.game_over = False
+        self.paused = False
+        self.last_move_tick = self.tick_count
+        self.round_start_tick = self.tick_count
+        self.queued_directions = []
+        self._cancel_round_timers()
+        self._schedule_move()
+
+        # Bonus food system
+        self.bonus_food_active = False
+        self.bonus_food_position = None
+        self.bonus_food_spawn_tick = 0
+        self.food_count = 0
+
+        # Hit effect
+        self.hit_effect_active = False
+        self.hit_effect_position = None
+        self.hit_effect_start_tick = 0
+
+    def _cancel_round_timers(self):
+        for timer in (self.move_timer, self.bonus_timer, self.hit_effect_timer):
+            if timer is not None:
+                timer.cancel()
+        self.move_timer = self.bonus_timer = self.hit_effect_timer = None
+
+    def _schedule_move(self):
+        """The snake may move again move_delay after its last move"""
+        if self.move_timer is not None:
+            self.move_timer.cancel()
+        self.move_ready = False
+        self.move_timer = self.timers.at(self.last_move_tick + self.ticks_for(self.move_delay),
+                                         self._move_due)
+
+    def _move_due(self, tick):
+        self.move_ready = True
+
+    def _bonus_expiry_tick(self):
+        # Expires once more than bonus_food_duration has passed
+        return self.bonus_food_spawn_tick + self.ticks_for(self.bonus_food_duration) + 1
+
+    def _expire_bonus_food(self, tick):
+        self.bonus_timer = None
+        # Bonus time only runs out while the game is running: toggle_pause()
+        # schedules it again on resume, a new round drops it
+        if self.paused or self.game_over:
+            return
+        self.bonus_food_active = False
+        self.bonus_food_position = None
+        self._say("Bonus food expired!")
+
+    def _end_hit_effect(self, tick):
+        self.hit_effect_timer = None
+        self.hit_effect_active = False
+
+    def _schedule_round_timers(self):
+        """Recreate the round's timers from its state (after a restore)"""
+        self._cancel_round_timers()
+        self._schedule_move()
+        if self.bonus_food_active:
+            self.bonus_timer = self.timers.at(self._bonus_expiry_tick(), self._expire_bonus_food)
+        if self.hit_effect_active:
+            self.hit_effect_timer = self.timers.at(
+                self.hit_effect_start_tick + self.ticks_for(self.hit_effect_duration),
+                self._end_hit_effect)
+
+    def _say(self, message):
+        if self.verbose:
+            print(message)
+
+    def _record(self, kind, direction=None):
+        if self.recorder is not None:
+            self.recorder.record(self.tick_count, kind, direction)
+
+    def _end_round(self, message):
+        """Finish the round and queue its result for the leaderboard"""
+        self.game_over = True
+        self._say(message)
+        if self.leaderboard is not None:
+            self.leaderboard.record(self.player_name, self.game.score, len(self.snake.body),
+                                    self.ms_since(self.round_start_tick), self.control_mode)
+
+    def _crash(self, cell, message):
+        # Create hit effect at collision point
+        self.hit_effect_active = True
+        self.hit_effect_position = cell
+        self.hit_effect_start_tick = self.tick_count
+        self.hit_effect_timer = self.timers.at(
+            self.tick_count + self.ticks_for(self.hit_effect_duration), self._end_hit_effect)
+        self._end_round(message)
+
+    def now_ms(self):
+        """Simulation time in milliseconds"""
+        return self.tick_count * TICK_MS
+
+    def ms_since(self, tick):
+        """Milliseconds of simulation time elapsed since the given tick"""
+        return (self.tick_count - tick) * TICK_MS
+
+    def ticks_for(self, ms):
+        """Whole ticks covering a duration in milliseconds"""
+        return -(-ms // TICK_MS)
+
+    def schedule(self, delay_ms, callback, repeat=False):
+        """Call callback(tick) after delay_ms of simulation time (and every
+        delay_ms after that when repeat is set); returns the Timer"""
+        ticks = self.ticks_for(delay_ms)
+        return self.timers.at(self.tick_count + ticks, callback, ticks if repeat else 0)
+
+    def snapshot(self):
+        """Full game state as a compact binary buffer"""
+        return save_state(self)
+
+    def restore(self, data):
+        """Return to a state captured by snapshot()"""
+        load_state(self, data)
+        self.occupancy.rebuild([self.snake.body])
+        self._schedule_round_timers()
+
+    def reset_game(self):
+        """Start a new round (recorded as a restart)"""
+        self._record('restart')
+        self._new_round()
+
+    def toggle_pause(self):
+        """Pause or resume the game (recorded)"""
+        self._record('pause')
+        self.paused = not self.paused
+        # The bonus expiry waits out the pause instead of polling through it
+        if self.paused:
+            if self.bonus_timer is not None:
+                self.bonus_timer.cancel()
+                self.bonus_timer = None
+        elif self.bonus_food_active and not self.game_over and self.bonus_timer is None:
+            # What is left of the bonus time, or the next tick if it ran out
+            self.bonus_timer = self.timers.at(max(self._bonus_expiry_tick(), self.tick_count + 1),
+                                              self._expire_bonus_food)
+
+    def set_input_direction(self, direction):
+        """Set a held input (head tracking), applied on every tick"""
+        if direction != self.input_direction:
+            self._record('hold', direction)
+            self.input_direction = direction
+
+    def press_direction(self, direction):
+        """Queue a one-shot input (key press), applied on the next tick"""
+        self._record('press', direction)
+        self.queued_directions.append(direction)
+
+    def steer(self, direction):
+        """Turn the snake, pausing it when the turn would reverse it"""
+        if direction == self.snake.direction:
+            return
+        old_direction = self.snake.direction
+        if steer_snake(self.snake, direction):
+            self._say(f"Direction changed: {old_direction} -> {direction}")
+        else:
+            # Direction change was blocked (opposite direction) - PAUSE THE SNAKE
+            self._say(f"Direction change blocked: {old_direction} -> {direction} - PAUSING SNAKE")
+
+    def spawn_bonus_food(self):
+        """Spawn bonus food"""
+        self.bonus_food_position = random_free_cell(
+            self.rng, self.snake.body + [self.food.position], self.level)
+        if self.bonus_food_position is None:
+            return
+        self.bonus_food_active = True
+        self.bonus_food_spawn_tick = self.tick_count
+        self.bonus_timer = self.timers.at(self._bonus_expiry_tick(), self._expire_bonus_food)
+        self._say("Bonus food spawned!")
+
+    def advance(self, elapsed_ms):
+        """Run as many whole ticks as fit in the elapsed wall time"""
+        self.pending_ms += elapsed_ms
+        steps = 0
+        while self.pending_ms >= TICK_MS:
+            if steps >= MAX_CATCHUP_TICKS:
+                # Drop the backlog instead of spiralling after a stall
+                self.pending_ms = 0
+                break
+            self.pending_ms -= TICK_MS
+            self.step()
+            steps += 1
+
+    def skip_idle_ticks(self, limit):
+        """Jump over the ticks before the next due timer when none of them
+        can change anything: no input is queued and either the game is
+        paused or over, or the snake waits for its move timer and the held
+        input is the current direction. Stops short of tick limit; returns
+        the number of ticks skipped. For headless runs, where nothing else
+        happens between ticks."""
+        if self.queued_directions:
+            return 0
+        if not (self.paused or self.game_over) and (
+                self.move_ready or self.input_direction not in (None, self.snake.direction)):
+            return 0
+        due = self.timers.next_due()
+        target = limit - 1 if due is None else min(due, limit) - 1
+        skipped = max(0, target - self.tick_count)
+        self.tick_count += skipped
+        return skipped
+
+    def step(self):
+        """Advance the game by exactly one tick"""
+        self.tick_count += 1
+        if self.timers.due(self.tick_count):
+            self.timers.run_due(self.tick_count)
+        if self.paused or self.game_over:
+            self.queued_directions = []
+            return
+
+        # Apply inputs in the order they arrived
+        for direction in self.queued_directions:
+            self.steer(direction)
+        self.queued_directions = []
+        if self.input_direction is not None:
+            self.steer(self.input_direction)
+
+        # Move snake at regular intervals
+        if self.snake.direction == "CENTER":
+            return
+        if not self.move_ready:
+            return
+        tail = self.snake.body[-1]
+        growing = self.snake.new_block
+        self.snake.move()
+        self.last_move_tick = self.tick_count
+        self._schedule_move()
+
+        # Handle boundary wrapping on the 25x25 grid
+        x, y = self.snake.body[0]
+        x %= 25
+        y %= 25
+        self.snake.body[0] = (x, y)
+
+        # Update only the cells that changed: the tail leaves, the head enters
+        if not growing:
+            self.occupancy.remove(tail)
+
+        # Check collision with the level's walls and with self (the board wraps)
+        if self.level is not None and self.level.is_wall((x, y)):
+            self._crash((x, y), "Game Over! Snake hit a wall!")
+            return
+        if self.occupancy.is_occupied((x, y)):
+            self._crash((x, y), "Game Over! Snake hit itself!")
+            return
+        self.occupancy.add((x, y))
+
+        # Check collision with regular food
+        if self.snake.body[0] == self.food.position:
+            self.snake.grow()
+            self.food.spawn(self.snake.body)
+            self.game.increase_score()
+            self.food_count += 1
+            self._say(f"Food eaten! Score: {self.game.score}, Snake length: {len(self.snake.body)}")
+
+            # No free cell left for new food: the snake has filled the board
+            if self.food.position is None:
+                self._end_round("Board full! The snake fills every cell!")
+                return
+
+            # Spawn bonus food every 5 normal foods
+            if self.food_count % 5 == 0 and not self.bonus_food_active:
+                self.spawn_bonus_food()
+
+        # Check collision with bonus food
+        if (self.bonus_food_active and
+                self.snake.body[0] == self.bonus_food_position):
+            # Add 5 segments to snake
+            for _ in range(5):
+                self.snake.grow()
+            self.game.increase_score(5)  # 5 points for bonus food
+            self.bonus_timer.cancel()
+            self.bonus_timer = None
+            self.bonus_food_active = False
+            self.bonus_food_position = None
+            self._say(f"Bonus food eaten! Score: {self.game.score}, Snake length: {len(self.snake.body)} (+5 segments)")
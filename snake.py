@@ -1,10 +1,13 @@
-import pygame
+# Stable numbering of directions, used by recorded session logs
+DIRECTIONS = ('CENTER', 'UP', 'DOWN', 'LEFT', 'RIGHT')
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
 
 class Snake:
-    def __init__(self):
+    def __init__(self, verbose=True):
         self.body = [(10, 10)]
         self.direction = 'RIGHT'
         self.new_block = False
+        self.verbose = verbose
 
     def move(self):
         x, y = self.body[0]
@@ -32,6 +35,7 @@ class Snake:
         self.new_block = True
 
     def draw(self, win):
+        import pygame
         for segment in self.body:
             pygame.draw.rect(win, (0, 255, 0), (segment[0] * 20, segment[1] * 20, 20, 20))
 
@@ -48,7 +52,8 @@ class Snake:
         # Check if the new direction is opposite to current direction
         if direction in opposites and opposites[direction] == self.direction:
             # Don't allow opposite direction movement
-            print(f"Cannot move in opposite direction: {self.direction} -> {direction}")
+            if self.verbose:
+                print(f"Cannot move in opposite direction: {self.direction} -> {direction}")
             return False
         else:
             # Allow the direction change
@@ -0,0 +1,117 @@
+import struct
+from snake import DIRECTIONS, DIRECTION_CODES
+
+# Snapshot layout: fixed header and state block, the Mersenne Twister state,
+# then the variable-length snake body and queued key presses
+SNAPSHOT_MAGIC = b'SNKS'
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct('<4sH')
+STATE = struct.Struct(
+    '<'
+    'II'      # tick_count, round_start_tick
+    'IIIII'   # last_move_tick, score, food_count, bonus spawn tick, hit effect tick
+    'HBBB'    # pending_ms, flags, snake direction, input direction
+    'HHHHHH'  # food, bonus food and hit effect positions
+    'IH'      # snake length, queued key presses
+)
+RNG_STATE = struct.Struct('<625IBd')  # twister words, has gauss_next, gauss_next
+
+NO_DIRECTION = 0xFF
+NO_POSITION = 0xFFFF
+
+FLAG_PAUSED = 1
+FLAG_GAME_OVER = 2
+FLAG_BONUS_ACTIVE = 4
+FLAG_HIT_EFFECT = 8
+FLAG_NEW_BLOCK = 16
+
+def _position(pos):
+    return pos if pos is not None else (NO_POSITION, NO_POSITION)
+
+def _unposition(x, y):
+    return None if x == NO_POSITION else (x, y)
+
+def save_state(sim):
+    """Pack the full game state of a Simulation into bytes"""
+    flags = 0
+    if sim.paused:
+        flags |= FLAG_PAUSED
+    if sim.game_over:
+        flags |= FLAG_GAME_OVER
+    if sim.bonus_food_active:
+        flags |= FLAG_BONUS_ACTIVE
+    if sim.hit_effect_active:
+        flags |= FLAG_HIT_EFFECT
+    if sim.snake.new_block:
+        flags |= FLAG_NEW_BLOCK
+
+    input_code = NO_DIRECTION
+    if sim.input_direction is not None:
+        input_code = DIRECTION_CODES[sim.input_direction]
+
+    body = sim.snake.body
+    queued = sim.queued_directions
+    version, words, gauss_next = sim.rng.getstate()
+
+    parts = [
+        HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION),
+        STATE.pack(
+            sim.tick_count, sim.round_start_tick, sim.last_move_tick, sim.game.score, sim.food_count,
+            sim.bonus_food_spawn_tick, sim.hit_effect_start_tick,
+            sim.pending_ms, flags, DIRECTION_CODES[sim.snake.direction], input_code,
+            *_position(sim.food.position),
+            *_position(sim.bonus_food_position),
+            *_position(sim.hit_effect_position),
+            len(body), len(queued),
+        ),
+        RNG_STATE.pack(*words, gauss_next is not None, gauss_next or 0.0),
+        struct.pack(f'<{2 * len(body)}H', *[c for segment in body for c in segment]),
+        bytes(DIRECTION_CODES[d] for d in queued),
+    ]
+    return b''.join(parts)
+
+def load_state(sim, data):
+    """Restore a Simulation in place from bytes made by save_state"""
+    magic, version = HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"Not a version {SNAPSHOT_VERSION} game snapshot")
+    offset = HEADER.size
+
+    (tick_count, round_start_tick, last_move_tick, score, food_count, bonus_spawn_tick, hit_tick,
+     pending_ms, flags, direction, input_code,
+     food_x, food_y, bonus_x, bonus_y, hit_x, hit_y,
+     length, queued_count) = STATE.unpack_from(data, offset)
+    offset += STATE.size
+
+    rng_state = RNG_STATE.unpack_from(data, offset)
+    offset += RNG_STATE.size
+    gauss_next = rng_state[626] if rng_state[625] else None
+    sim.rng.setstate((3, rng_state[:625], gauss_next))
+
+    coords = struct.unpack_from(f'<{2 * length}H', data, offset)
+    offset += 4 * length
+    queued = data[offset:offset + queued_count]
+
+    sim.tick_count = tick_count
+    sim.round_start_tick = round_start_tick
+    sim.last_move_tick = last_move_tick
+    sim.pending_ms = pending_ms
+    sim.paused = bool(flags & FLAG_PAUSED)
+    sim.game_over = bool(flags & FLAG_GAME_OVER)
+    sim.input_direction = None if input_code == NO_DIRECTION else DIRECTIONS[input_code]
+    sim.queued_directions = [DIRECTIONS[code] for code in queued]
+
+    sim.snake.body = list(zip(coords[0::2], coords[1::2]))
+    sim.snake.direction = DIRECTIONS[direction]
+    sim.snake.new_block = bool(flags & FLAG_NEW_BLOCK)
+    sim.food.position = _unposition(food_x, food_y)
+    sim.game.score = score
+    sim.food_count = food_count
+
+    sim.bonus_food_active = bool(flags & FLAG_BONUS_ACTIVE)
+    sim.bonus_food_position = _unposition(bonus_x, bonus_y)
+    sim.bonus_food_spawn_tick = bonus_spawn_tick
+
+    sim.hit_effect_active = bool(flags & FLAG_HIT_EFFECT)
+    sim.hit_effect_position = _unposition(hit_x, hit_y)
+    sim.hit_effect_start_tick = hit_tick
@@ -0,0 +1,178 @@
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from autopilot import Autopilot
+from leaderboard import Leaderboard
+from simulation import Simulation, TICK_MS
+
+TICKS_PER_HOUR = 3600 * 1000 // TICK_MS
+
+Sample = namedtuple("Sample", "hours games traced rss objects threads tick_us max_tick_us")
+
+def rss_bytes():
+    """Resident memory of this process (the peak where /proc is missing)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+class SoakTest:
+    """Many hours of simulated play, headless and as fast as possible.
+
+    The autopilot plays game after game (restarting through reset_game),
+    so snakes get long, bonus food is spawned every bonus_every_ms, and
+    finished games go to a throwaway leaderboard. Memory, object counts,
+    threads and time per tick are sampled at even intervals."""
+    def __init__(self, hours=12, samples=24, seed=0, bonus_every_ms=3000, render_every=0,
+                 head_camera=None):
+        self.hours = hours
+        self.sample_count = samples
+        self.seed = seed
+        self.bonus_every_ms = bonus_every_ms
+        self.render_every = render_every
+        self.head_camera = head_camera
+        self.samples = []
+        self.games = 0
+
+    def _spawn_bonus(self, tick):
+        sim = self.sim
+        if not sim.bonus_food_active and not sim.game_over:
+            sim.spawn_bonus_food()
+
+    def run(self):
+        ticks = int(self.hours * TICKS_PER_HOUR)
+        interval = max(1, ticks // self.sample_count)
+        folder = tempfile.mkdtemp(prefix="soak-")
+        tracemalloc.start()
+
+        sim = self.sim = Simulation(seed=self.seed, verbose=False)
+        sim.control_mode = "soak"
+        sim.leaderboard = Leaderboard(os.path.join(folder, "soak.db"))
+        sim.schedule(self.bonus_every_ms, self._spawn_bonus, repeat=True)
+        pilot = Autopilot(sim)
+        offscreen = None
+        if self.render_every:
+            from renderer import OffscreenRenderer
+            offscreen = OffscreenRenderer(sim)
+        head = None
+        if self.head_camera is not None:
+            # The vision thread runs alongside; its allocations are traced too
+            from head_controller import HeadController
+            head = HeadController(self.head_camera, profile_path=os.path.join(folder, "calibration.json"))
+            head.start()
+
+        print(f"Soak: {self.hours:g} hours of game time, a sample every {interval * TICK_MS / 60000:.0f} minutes")
+        print(f"{'hours':>6} {'games':>6} {'traced':>10} {'rss':>9} {'objects':>8} {'threads':>7} "
+              f"{'us/tick':>8} {'max us':>8}")
+        clock = time.perf_counter
+        tick_time = 0.0
+        max_tick = 0.0
+        for done in range(1, ticks + 1):
+            start = clock()
+            sim.set_input_direction(pilot.current_direction)
+            sim.step()
+            if sim.game_over:
+                self.games += 1
+                sim.reset_game()
+                if head is not None:
+                    head.reset_calibration()
+            elapsed = clock() - start
+            tick_time += elapsed
+            if elapsed > max_tick:
+                max_tick = elapsed
+            if offscreen is not None and done % self.render_every == 0:
+                offscreen.render()
+            if done % interval == 0:
+                self._sample(done, tick_time / interval, max_tick)
+                tick_time = 0.0
+                max_tick = 0.0
+
+        if head is not None:
+            head.stop()
+        sim.leaderboard.close()
+        shutil.rmtree(folder, ignore_errors=True)
+        tracemalloc.stop()
+        return self.samples
+
+    def _sample(self, done, tick_seconds, max_tick_seconds):
+        gc.collect()
+        sample = Sample(done / TICKS_PER_HOUR, self.games, tracemalloc.get_traced_memory()[0], rss_bytes(),
+                        len(gc.get_objects()), threading.active_count(), tick_seconds * 1e6,
+                        max_tick_seconds * 1e6)
+        self.samples.append(sample)
+        print(f"{sample.hours:>6.1f} {sample.games:>6} {sample.traced / 1024:>8.0f}KB {sample.rss / 2 ** 20:>7.1f}MB "
+              f"{sample.objects:>8} {sample.threads:>7} {sample.tick_us:>8.2f} {sample.max_tick_us:>8.0f}")
+        return sample
+
+def check(samples, warmup=0.25, max_traced_growth_kb=256, max_rss_growth_mb=16, max_object_growth=2000,
+          max_drift=1.5):
+    """Failures, comparing the first and last third of the samples taken
+    after the warm-up fraction (medians, so a single odd sample is ignored)"""
+    steady = samples[int(len(samples) * warmup):]
+    if len(steady) < 3:
+        return ["Too few samples to judge; run longer or take more samples"]
+    third = len(steady) // 3
+    early, late = steady[:third], steady[-third:]
+
+    def growth(field):
+        return _median([getattr(s, field) for s in late]) - _median([getattr(s, field) for s in early])
+
+    failures = []
+    if growth("traced") > max_traced_growth_kb * 1024:
+        failures.append(f"Traced memory grew by {growth('traced') / 1024:.0f} KB")
+    if growth("rss") > max_rss_growth_mb * 2 ** 20:
+        failures.append(f"RSS grew by {growth('rss') / 2 ** 20:.1f} MB")
+    if growth("objects") > max_object_growth:
+        failures.append(f"Live objects grew by {growth('objects')}")
+    if growth("threads") > 0:
+        failures.append(f"Thread count grew by {growth('threads')}")
+    early_tick = _median([s.tick_us for s in early])
+    late_tick = _median([s.tick_us for s in late])
+    if late_tick > early_tick * max_drift:
+        failures.append(f"Time per tick drifted from {early_tick:.2f} to {late_tick:.2f} us")
+    return failures
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Headless long-session memory and performance soak test")
+    parser.add_argument("--hours", type=float, default=12, help="game time to simulate")
+    parser.add_argument("--samples", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bonus-every", type=int, default=3000, help="milliseconds between bonus spawns")
+    parser.add_argument("--render-every", type=int, default=0,
+                        help="also render offscreen every N ticks (needs pygame)")
+    parser.add_argument("--head", type=int, default=None, metavar="CAMERA",
+                        help="run head tracking on this camera alongside")
+    parser.add_argument("--max-growth-kb", type=int, default=256, help="allowed traced memory growth")
+    parser.add_argument("--max-rss-growth-mb", type=int, default=16)
+    parser.add_argument("--max-object-growth", type=int, default=2000)
+    parser.add_argument("--max-drift", type=float, default=1.5, help="allowed ratio of late to early tick time")
+    args = parser.parse_args(argv)
+
+    soak = SoakTest(args.hours, args.samples, args.seed, args.bonus_every, args.render_every, args.head)
+    start = time.perf_counter()
+    samples = soak.run()
+    print(f"{soak.games} games in {time.perf_counter() - start:.0f}s")
+    failures = check(samples, max_traced_growth_kb=args.max_growth_kb, max_rss_growth_mb=args.max_rss_growth_mb,
+                     max_object_growth=args.max_object_growth, max_drift=args.max_drift)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("PASS: no growth in memory, objects or threads and no drift in tick time")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Every --profile-startup run is appended here, one JSON object per line
+STARTUP_LOG_PATH = "startup_profile.jsonl"
+
+def import_times(modules):
+    """Import cost of each module as (name, self ms, cumulative ms, depth),
+    measured in a fresh interpreter with -X importtime"""
+    code = "; ".join(f"import {name}" for name in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times.append((name.strip(), int(own) / 1000, int(cumulative) / 1000, depth))
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1])
+    return times
+
+def print_import_times(times, limit=15):
+    """Slowest top-level imports (each includes what it pulled in)"""
+    top = sorted((t for t in times if t[3] == 0), key=lambda t: -t[2])
+    total = sum(t[2] for t in top)
+    print(f"Imports: {total:.1f} ms")
+    for name, _, cumulative, _ in top[:limit]:
+        print(f"  {cumulative:>8.1f} ms  {name}")
+
+class PhaseTimer:
+    """Wall time of consecutive startup phases"""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self, title):
+        print(f"{title}: {(self.last - self.start) * 1000:.1f} ms")
+        for name, seconds in self.phases:
+            print(f"  {seconds * 1000:>8.1f} ms  {name}")
+
+def last_run(mode, path=STARTUP_LOG_PATH):
+    """The most recent saved run of the same mode, or None"""
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path) as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except ValueError:
+                continue
+            if run.get("mode") == mode:
+                previous = run
+    return previous
+
+def save_run(mode, times, timer, path=STARTUP_LOG_PATH):
+    """Append one run (import and phase times in ms) to the log and print
+    how its totals compare with the previous run of the same mode"""
+    top = [t for t in times if t[3] == 0]
+    run = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mode": mode,
+        "python": sys.version.split()[0],
+        "imports_ms": round(sum(t[2] for t in top), 1),
+        "imports": {name: round(cumulative, 1) for name, _, cumulative, _ in top},
+        "first_frame_ms": round((timer.last - timer.start) * 1000, 1),
+        "phases": {name: round(seconds * 1000, 1) for name, seconds in timer.phases},
+    }
+    previous = last_run(mode, path)
+    with open(path, "a") as f:
+        f.write(json.dumps(run) + "\n")
+    print(f"Saved to {path}")
+    if previous is not None:
+        print(f"Since {previous['time']}: imports {run['imports_ms'] - previous['imports_ms']:+.1f} ms, "
+              f"first frame {run['first_frame_ms'] - previous['first_frame_ms']:+.1f} ms")
+    return run
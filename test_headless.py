@@ -0,0 +1,481 @@
+import os
+import random
+import asyncio
+import importlib
+import json
+import sys
+import tempfile
+import time
+import unittest
+from autopilot import DistanceMap, neighbor_table
+from governor import QualityGovernor
+from grid import OccupancyGrid
+from hamiltonian import fill_board
+from leaderboard import Leaderboard
+from metrics import Counter, Histogram, RateMeter, Registry
+from multiplayer import GreedyBot, MultiSnakeSimulation
+from replay import SessionLog, SessionRecorder, replay_headless
+from scheduler import TickScheduler
+from server import CLIENT_QUEUE_SIZE, DeltaTracker, GameServer
+from server_loadtest import LoopbackClient
+from simulation import Simulation
+
+# Headless checks of the game logic; no window or camera needed.
+# Run with python test_headless.py (or pytest test_headless.py).
+
+BOARD_CELLS = 25 * 25
+
+def optional(name):
+    """Import a module that needs pygame or NumPy, skipping the test without them"""
+    try:
+        return importlib.import_module(name)
+    except ImportError as error:
+        raise unittest.SkipTest(str(error))
+
+class RandomPlayer:
+    """Seeded stand-in for a player: holds a random direction for a while,
+    now and then presses a key or pauses, and restarts after a crash"""
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.held = "RIGHT"
+
+    def play(self, sim, ticks):
+        rng = self.rng
+        for _ in range(ticks):
+            if sim.game_over:
+                sim.reset_game()
+            roll = rng.random()
+            if roll < 0.03:
+                self.held = rng.choice(("UP", "DOWN", "LEFT", "RIGHT"))
+            elif roll < 0.035:
+                sim.press_direction(rng.choice(("UP", "DOWN", "LEFT", "RIGHT")))
+            elif roll < 0.037:
+                sim.toggle_pause()
+            sim.set_input_direction(self.held)
+            sim.step()
+
+def test_replay_matches_recording():
+    with tempfile.TemporaryDirectory() as folder:
+        for seed in range(20):
+            sim = Simulation(seed=seed, verbose=False)
+            sim.recorder = SessionRecorder(seed)
+            RandomPlayer(seed).play(sim, 15000)
+            log = SessionLog.load(sim.recorder.save(os.path.join(folder, f"{seed}.snkl"), sim))
+            replayed = replay_headless(log)
+            assert replayed.tick_count == sim.tick_count, f"seed {seed}: tick count"
+            assert replayed.game.score == sim.game.score == log.score, f"seed {seed}: score"
+            assert replayed.snake.body == sim.snake.body, f"seed {seed}: body"
+            assert len(replayed.snake.body) == log.length, f"seed {seed}: length"
+
+def test_snapshot_round_trip():
+    sim = Simulation(seed=5, verbose=False)
+    RandomPlayer(5).play(sim, 12000)
+    # A later round, so its start tick is not the restoring game's
+    sim.reset_game()
+    RandomPlayer(6).play(sim, 300)
+    data = sim.snapshot()
+
+    other = Simulation(seed=99, verbose=False)
+    other.restore(data)
+    assert other.snapshot() == data
+    assert other.round_start_tick == sim.round_start_tick
+    assert other.occupancy.cells == sim.occupancy.cells
+
+    # Both continue identically, including food spawns from the restored RNG
+    RandomPlayer(7).play(sim, 5000)
+    RandomPlayer(7).play(other, 5000)
+    assert other.snapshot() == sim.snapshot()
+
+def test_occupancy_grid():
+    grid = OccupancyGrid(4, 3)
+    grid.add((1, 2))
+    grid.add((1, 2))
+    grid.remove((1, 2))
+    assert grid.is_occupied((1, 2))
+    grid.remove((1, 2))
+    assert not grid.is_occupied((1, 2))
+    assert grid.index((3, 2)) == 11
+
+    grid.rebuild([[(2, 2), (3, 2)], [(3, 2)]])
+    assert grid.cells[grid.index((3, 2))] == 2
+    assert sum(grid.cells) == 3
+
+def test_tick_scheduler_order():
+    timers = TickScheduler()
+    fired = []
+    timers.at(5, lambda tick: fired.append(("b", tick)))
+    timers.at(3, lambda tick: fired.append(("a", tick)))
+    timers.at(5, lambda tick: fired.append(("c", tick)))
+    timers.at(4, lambda tick: fired.append(("x", tick))).cancel()
+    timers.at(2, lambda tick: fired.append(("r", tick)), interval=2)
+    assert timers.next_due() == 2
+    assert not timers.due(1)
+    for tick in range(1, 7):
+        if timers.due(tick):
+            timers.run_due(tick)
+    # Earlier ticks first, same-tick timers in the order they were scheduled
+    assert fired == [("r", 2), ("a", 3), ("r", 4), ("b", 5), ("c", 5), ("r", 6)]
+    assert timers.next_due() == 8
+
+def test_bonus_time_waits_out_a_pause():
+    sim = Simulation(seed=1, verbose=False)
+    sim.spawn_bonus_food()
+    bonus_ticks = sim.ticks_for(sim.bonus_food_duration)
+    for _ in range(100):
+        sim.step()
+    sim.toggle_pause()
+    # Nothing polls through the pause, so it can be skipped whole
+    assert sim.bonus_timer is None
+    paused_at = sim.tick_count
+    steps = 0
+    while sim.tick_count < paused_at + 10000:
+        sim.skip_idle_ticks(paused_at + 10000)
+        sim.step()
+        steps += 1
+    assert steps < 5 and sim.bonus_food_active
+
+    # The bonus ran out during the pause and goes on the first tick after it
+    sim.toggle_pause()
+    sim.step()
+    assert not sim.bonus_food_active
+    assert sim.tick_count > sim.bonus_food_spawn_tick + bonus_ticks
+
+    # A short pause leaves the deadline where it was
+    sim = Simulation(seed=1, verbose=False)
+    sim.spawn_bonus_food()
+    sim.toggle_pause()
+    for _ in range(10):
+        sim.step()
+    sim.toggle_pause()
+    assert sim.bonus_timer.due == sim.bonus_food_spawn_tick + bonus_ticks + 1
+
+def test_distance_map_matches_rebuild():
+    # Random blocks and unblocks, the target among them, on a small torus
+    # and a long thin one where paths wrap around
+    for width, height in ((7, 6), (12, 3)):
+        size = width * height
+        neighbors = neighbor_table(width, height)
+        rng = random.Random(width)
+        for run in range(20):
+            blocked = bytearray(rng.random() < 0.3 for _ in range(size))
+            target = rng.randrange(size)
+            blocked[target] = 0
+            incremental = DistanceMap(neighbors, size)
+            incremental.rebuild(target, blocked)
+            full = DistanceMap(neighbors, size)
+            for step in range(200):
+                cell = rng.randrange(size)
+                if blocked[cell]:
+                    blocked[cell] = 0
+                    incremental.unblock(cell)
+                else:
+                    blocked[cell] = 1
+                    incremental.block(cell)
+                full.rebuild(target, blocked)
+                assert incremental.dist == full.dist, f"{width}x{height} run {run} step {step}"
+
+def multi_snake_world(*snakes):
+    """Board with one player per (body, direction), nothing else on it"""
+    world = MultiSnakeSimulation(10, 10, seed=0, food_count=0, respawn=False, verbose=False)
+    for number, (body, direction) in enumerate(snakes):
+        player = world.add_player(f"p{number}")
+        for cell in player.snake.body:
+            world.occupancy.remove(cell)
+        player.snake.body = list(body)
+        player.snake.direction = direction
+        for cell in body:
+            world.occupancy.add(cell)
+    return world
+
+def test_multi_snake_collisions():
+    # Head to head: one-cell snakes facing each other swap cells
+    world = multi_snake_world(([(3, 3)], "RIGHT"), ([(4, 3)], "LEFT"))
+    world.step()
+    assert [player.alive for player in world.players] == [False, False]
+
+    # Both heads arrive on the same cell
+    world = multi_snake_world(([(3, 3)], "RIGHT"), ([(5, 3)], "LEFT"))
+    world.step()
+    assert [player.alive for player in world.players] == [False, False]
+
+    # A head runs into the middle of another snake, which keeps going
+    world = multi_snake_world(([(3, 3)], "RIGHT"), ([(4, 2), (4, 3), (4, 4)], "UP"))
+    world.step()
+    assert [player.alive for player in world.players] == [False, True]
+    assert world.players[1].snake.body == [(4, 1), (4, 2), (4, 3)]
+
+    # Following another snake's tail is safe: it leaves as the head arrives
+    world = multi_snake_world(([(3, 3)], "RIGHT"), ([(5, 3), (4, 3)], "RIGHT"))
+    world.step()
+    assert [player.alive for player in world.players] == [True, True]
+    assert world.players[0].snake.body == [(4, 3)]
+    assert sum(world.occupancy.cells) == 3
+
+def bot_world(bots, size=20, seed=3):
+    world = MultiSnakeSimulation(size, size, seed=seed, food_count=bots, verbose=False)
+    for number in range(bots):
+        player = world.add_player(f"Bot {number + 1}")
+        player.controller = GreedyBot(world, player)
+    return world
+
+def server_view(world):
+    return sorted((p.id, list(p.snake.body)) for p in world.players if p.alive), sorted(world.food)
+
+def client_view(client):
+    return sorted(client.snakes.items()), sorted(client.food)
+
+def test_deltas_rebuild_the_world():
+    world = bot_world(6)
+    tracker = DeltaTracker(world)
+    client = LoopbackClient()
+    client.apply(tracker.full_state())
+    tracker.delta()
+    for step in range(300):
+        world.step()
+        if step == 100:
+            world.remove_player(world.players[2])
+        if step == 150:
+            late = world.add_player("Late")
+            late.controller = GreedyBot(world, late)
+        client.apply(json.loads(json.dumps(tracker.delta())))
+        assert client_view(client) == server_view(world), f"step {step}"
+    assert [p.id for p in world.players] == [0, 1, 3, 4, 5, 6]
+
+class FakeWriter:
+    """Collects what the server writes to one client"""
+    def __init__(self):
+        self.lines = []
+
+    def write(self, data):
+        self.lines.extend(data.decode().splitlines())
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_server_resync_and_bad_requests():
+    async def session():
+        world = bot_world(4)
+        server = GameServer(world)
+        reader = asyncio.StreamReader()
+        writer = FakeWriter()
+        handler = asyncio.ensure_future(server.handle_client(reader, writer))
+        # Lines that are valid JSON but not requests are ignored
+        reader.feed_data(b'1\n[]\n"join"\nnot json\n{"join": "me"}\n')
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        (client,) = server.clients
+        assert client.player is not None and client.player in world.players
+
+        # A client that stops reading falls behind, drops its backlog and
+        # gets one full state that matches the world again
+        for _ in range(CLIENT_QUEUE_SIZE + 10):
+            world.step()
+            server.broadcast(b'{}\n')
+        assert client.needs_resync and client.resyncs == 1 and client.queue.qsize() == 1
+        writer.lines.clear()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        viewer = LoopbackClient()
+        for line in writer.lines:
+            viewer.apply(json.loads(line))
+        assert viewer.fulls == 1 and client_view(viewer) == server_view(world)
+
+        # Leaving takes the player out of the world
+        reader.feed_eof()
+        await handler
+        assert client.player not in world.players and not server.clients
+    asyncio.run(session())
+
+def test_leaderboard_batches_and_top():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "board.db")
+        board = Leaderboard(path, batch_size=4, flush_interval=0.05)
+        for score in (5, 40, 12, 40, 3, 27, 18, 9, 33, 1):
+            board.record(f"p{score}", score, score + 3, 1000 * score, "head" if score % 3 else "autopilot")
+        # Ten games arrive in batches of at most four; flush waits for all of them
+        board.flush()
+        assert [row[1] for row in board.top(4)] == [40, 40, 33, 27]
+        assert [row[1] for row in board.top(3, "autopilot")] == [33, 27, 18]
+        assert board.top(2, "keyboard") == []
+        assert [row[:5] for row in board.history("p12")] == [("p12", 12, 15, 12000, "autopilot")]
+
+        # close() writes what is still queued
+        board.record("late", 99, 10, 500, "keyboard")
+        board.close()
+        board = Leaderboard(path)
+        assert len(board.top(100)) == 11 and board.top(1)[0][:2] == ("late", 99)
+        board.close()
+
+def test_level_file_round_trip():
+    level_file = optional("level")
+    load_level, parse_text, save_level = level_file.load_level, level_file.parse_text, level_file.save_level
+    # 13 cells wide, so rows end in a padded byte
+    walls, spawn = parse_text("""
+#############
+#....S......#
+#..##....#..#
+#...........#
+######.######
+""")
+    with tempfile.TemporaryDirectory() as folder:
+        path = save_level(os.path.join(folder, "test.lvl"), walls, spawn, "UP", "box")
+        level = load_level(path)
+        assert (level.width, level.height, level.spawn, level.direction, level.name) == (13, 5, (5, 1), "UP", "box")
+        for y in range(5):
+            for x in range(13):
+                assert level.is_wall((x, y)) == walls[y, x], f"cell {(x, y)}"
+        assert (level.walls_in(2, 1, 9, 3) == walls[1:4, 2:11]).all()
+        assert level.wall_count() == walls.sum()
+
+        # The wall mask is the base of an occupancy grid
+        grid = OccupancyGrid(13, 5, level.wall_mask())
+        grid.rebuild([[(1, 1), (2, 1)]])
+        assert grid.is_occupied((0, 0)) and grid.is_occupied((2, 1)) and not grid.is_occupied((6, 4))
+
+        with open(os.path.join(folder, "junk"), "wb") as f:
+            f.write(b"not a level" * 10)
+        for bad in (lambda: load_level(os.path.join(folder, "junk")),
+                    lambda: save_level(os.path.join(folder, "walled.lvl"), walls, (0, 0))):
+            try:
+                bad()
+                raise AssertionError("no ValueError")
+            except ValueError:
+                pass
+        del level
+
+class FakeSprite:
+    def get_width(self):
+        return 4
+
+class FakeWindow:
+    """Counts the sprites drawn onto it"""
+    def __init__(self):
+        self.blits = 0
+
+    def blit(self, sprite, position):
+        self.blits += 1
+
+def test_particle_pool_reuses_slots():
+    pool = optional("effects").ParticlePool(capacity=4)
+    frames = [FakeSprite()] * 3
+    for number in range(6):
+        pool.emit(float(number), 0.0, 10.0, -10.0, 100, 200, frames)
+    # Six particles in four slots: the two oldest were replaced
+    assert len(pool.x) == len(pool.life) == 4
+    assert pool.x == [4.0, 5.0, 2.0, 3.0] and pool.next == 2
+    assert pool.live(99) == 0 and pool.live(150) == 4 and pool.live(300) == 0
+
+    window = FakeWindow()
+    pool.draw(window, 150)
+    assert window.blits == 4
+    pool.draw(window, 300)
+    assert window.blits == 4
+    # A new particle's draw frees the slots of the ones that died
+    pool.emit(0.0, 0.0, 0.0, 0.0, 400, 50, frames)
+    pool.draw(window, 420)
+    assert window.blits == 5 and pool.life.count(0) == 3
+    pool.clear()
+    assert pool.live(420) == 0
+
+def test_metrics_text_format():
+    registry = Registry()
+    histogram = registry.add(Histogram("frame_seconds", "Frame time", (0.01, 0.1), loop="game"))
+    for value in (0.005, 0.01, 0.05, 0.5, 2.0):
+        histogram.observe(value)
+    registry.add(Counter("frames_total", "Frames drawn")).inc(3)
+    lines = registry.render().splitlines()
+    # Buckets count everything up to their bound, +Inf all observations
+    assert lines == [
+        "# HELP frame_seconds Frame time",
+        "# TYPE frame_seconds histogram",
+        'frame_seconds_bucket{loop="game",le="0.01"} 2',
+        'frame_seconds_bucket{loop="game",le="0.1"} 3',
+        'frame_seconds_bucket{loop="game",le="+Inf"} 5',
+        'frame_seconds_sum{loop="game"} 2.565',
+        'frame_seconds_count{loop="game"} 5',
+        "# HELP frames_total Frames drawn",
+        "# TYPE frames_total counter",
+        "frames_total 3",
+    ], lines
+
+def test_rate_meter_windows():
+    meter = RateMeter("fps", "Frames per second", window=1.0)
+    meter.start = 10.0
+    for step in range(30):
+        meter.add(1, 10.0 + step / 30)
+    # Nothing is reported until a window has passed
+    assert meter.value == 0 and meter.count == 30
+    meter.add(1, 11.0)
+    assert meter.value == 31 and meter.count == 0 and meter.start == 11.0
+    # The next window has its own rate
+    meter.add(5, 11.5)
+    meter.add(5, 13.5)
+    assert meter.value == 10 / 2.5
+
+    # A scrape long after the last window sees the unfinished one
+    meter.start = time.perf_counter() - 4.0
+    meter.count = 8
+    (sample,) = meter.samples()
+    assert 1.9 < sample[2] <= 2.0
+
+def test_quality_governor_sheds_and_restores():
+    LATE, CALM = 0.03, 0.001
+    governor = QualityGovernor(recover_windows=3)
+    governor.window_start = 0.0
+    clock = [0.0]
+
+    def windows(count, seconds):
+        """One frame per one-second window; the levels after each"""
+        levels = []
+        for _ in range(count):
+            clock[0] += 1.0
+            governor.frame(seconds, now=clock[0])
+            levels.append(governor.level)
+        return levels
+
+    # Frames within a window only count when it ends
+    assert not governor.frame(LATE, now=0.5) and governor.level == 0
+    assert windows(2, LATE) == [1, 2]
+    assert governor.flat_snake and governor.render_every == 2 and governor.show_monitor
+    # Back up one level after three calm windows in a row
+    assert windows(3, CALM) == [2, 2, 1]
+    # Late again right after going up: the wait doubles
+    assert windows(1, LATE) == [2] and governor.recover_windows == 6
+    assert windows(6, CALM) == [2, 2, 2, 2, 2, 1]
+    # A restore that holds resets the wait
+    assert windows(18, CALM)[-1] == 0 and governor.recover_windows == 3
+
+    # A slow face model sheds too, up to the last stage only
+    for _ in range(6):
+        for _ in range(3):
+            governor.inference(0.05)
+        windows(1, CALM)
+    assert governor.level == governor.max_level and not governor.show_monitor
+    assert governor.inference_scale == 0.5
+
+def test_hamiltonian_fills_board():
+    for seed in range(8):
+        sim, moves = fill_board(seed)
+        assert len(sim.snake.body) == BOARD_CELLS, f"seed {seed}: stopped at length {len(sim.snake.body)}"
+
+def main(argv):
+    tests = [(name, test) for name, test in globals().items() if name.startswith("test_") and callable(test)]
+    failed = skipped = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"ok      {name}")
+        except AssertionError as error:
+            failed += 1
+            print(f"FAILED  {name}: {error}")
+        except unittest.SkipTest as error:
+            skipped += 1
+            print(f"skipped {name}: {error}")
+    print(f"{len(tests) - failed - skipped} passed, {failed} failed, {skipped} skipped")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,75 @@
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+RECORDING_DIR = "recordings"
+
+# Frames waiting for the encoder; when it falls further behind new frames
+# are dropped (and counted) instead of stalling the caller
+FRAME_QUEUE_SIZE = 32
+
+def new_recording_path(suffix=""):
+    """Timestamped file name in the recordings directory"""
+    os.makedirs(RECORDING_DIR, exist_ok=True)
+    return os.path.join(RECORDING_DIR, time.strftime("%Y%m%d-%H%M%S") + suffix + ".mp4")
+
+class VideoRecorder:
+    """Encodes frames to a video file on a worker thread.
+
+    add_frame() only puts the frame on a bounded queue, so the game loop
+    never waits for the encoder. cv2 releases the GIL while it encodes, so
+    a thread is enough to keep encoding off the render thread."""
+    def __init__(self, path, fps=30, queue_size=FRAME_QUEUE_SIZE):
+        self.path = path
+        self.fps = fps
+        self.frames = queue.Queue(queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.writer = None
+        self.thread = threading.Thread(target=self._encode_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def add_frame(self, frame, rgb=False):
+        """Queue a (height, width, 3) uint8 frame; BGR unless rgb is set.
+        The caller must not modify the frame afterwards."""
+        try:
+            self.frames.put_nowait((frame, rgb))
+        except queue.Full:
+            self.dropped += 1
+
+    def add_surface(self, surface):
+        """Queue a copy of a pygame Surface (e.g. the game window)"""
+        import pygame
+        width, height = surface.get_size()
+        # One flat copy on the game thread; reshaping and colour conversion
+        # happen on the worker
+        data = pygame.image.tobytes(surface, 'RGB')
+        self.add_frame(np.frombuffer(data, np.uint8).reshape(height, width, 3), rgb=True)
+
+    def _encode_loop(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                break
+            frame, rgb = item
+            if rgb:
+                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+            if self.writer is None:
+                height, width = frame.shape[:2]
+                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                self.writer = cv2.VideoWriter(self.path, fourcc, self.fps, (width, height))
+            self.writer.write(frame)
+            self.written += 1
+        if self.writer is not None:
+            self.writer.release()
+
+    def stop(self):
+        """Finish encoding what is queued and close the file"""
+        self.frames.put(None)
+        self.thread.join()
+        print(f"Video saved to {self.path}: {self.written} frames written, {self.dropped} dropped")
+        return self.path
@@ -0,0 +1,226 @@
+import sys
+import time
+from collections import OrderedDict
+import pygame
+
+CELL = 20
+BACKGROUND = (0, 0, 0)
+GRID_COLOR = (25, 25, 25)
+OBSTACLE_COLOR = (110, 110, 110)
+FOOD_COLOR = (0, 255, 0)
+HEAD_COLOR = (255, 255, 255)
+
+def _spans(start, length, size):
+    """Split the range [start, start + length) of an unwrapped axis into
+    pieces inside the world: (world start, screen offset, length)"""
+    offset = 0
+    start %= size
+    while offset < length:
+        piece = min(length - offset, size - start)
+        yield start, offset, piece
+        offset += piece
+        start = 0
+
+class Camera:
+    """Viewport on a wrapping world, in cells, that follows a target.
+
+    The center eases towards the target along the shortest way around
+    the world, so the view does not jump when the target wraps."""
+    def __init__(self, world_width, world_height, view_width, view_height, cell=CELL, ease=0.3):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.view_width = view_width
+        self.view_height = view_height
+        self.cell = cell
+        self.ease = ease
+        self.x = world_width / 2
+        self.y = world_height / 2
+
+    def center_on(self, cell):
+        self.x = cell[0] + 0.5
+        self.y = cell[1] + 0.5
+
+    def follow(self, cell):
+        tx, ty = cell[0] + 0.5, cell[1] + 0.5
+        dx = (tx - self.x + self.world_width / 2) % self.world_width - self.world_width / 2
+        dy = (ty - self.y + self.world_height / 2) % self.world_height - self.world_height / 2
+        self.x = (self.x + dx * self.ease) % self.world_width
+        self.y = (self.y + dy * self.ease) % self.world_height
+
+    def origin(self):
+        """World pixel at the top-left corner of the view (not wrapped)"""
+        return (round(self.x * self.cell - self.view_width / 2),
+                round(self.y * self.cell - self.view_height / 2))
+
+class ChunkCache:
+    """Pre-drawn static chunk surfaces, least recently used dropped first"""
+    def __init__(self, draw, capacity=48):
+        self.draw = draw
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def get(self, key):
+        surfaces = self.surfaces
+        surface = surfaces.get(key)
+        if surface is not None:
+            surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = surfaces[key] = self.draw(key)
+        if len(surfaces) > self.capacity:
+            surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+class WorldView:
+    """Scrolling, chunked view of a big MultiSnakeSimulation.
+
+    The world is cut into square chunks (the chunk size of its indexes).
+    Grid lines, obstacles and walls never change, so each chunk is drawn once
+    into a surface and kept in an LRU cache. Snakes and food are looked up
+    per visible chunk in the world's ChunkIndex buckets, so a frame costs
+    what is on screen, not the size of the world or the length of the
+    snakes. The world must be built with chunk set."""
+    def __init__(self, world, width=800, height=600, cell=CELL, cache_size=48):
+        if world.segments is None:
+            raise ValueError("WorldView needs a world built with chunk set")
+        self.world = world
+        self.width = width
+        self.height = height
+        self.cell = cell
+        self.chunk = world.segments.chunk
+        self.camera = Camera(world.width, world.height, width, height, cell)
+        self.cache = ChunkCache(self.draw_chunk, cache_size)
+        self.visible = 0  # segments and food drawn in the last frame
+
+    def draw_chunk(self, key):
+        """Static surface of one chunk: background, grid lines, obstacles, walls"""
+        cell, chunk = self.cell, self.chunk
+        x0, y0 = key[0] * chunk, key[1] * chunk
+        cells_x = min(chunk, self.world.width - x0)
+        cells_y = min(chunk, self.world.height - y0)
+        surface = pygame.Surface((cells_x * cell, cells_y * cell))
+        surface.fill(BACKGROUND)
+        if cell >= 6:
+            for i in range(cells_x):
+                pygame.draw.line(surface, GRID_COLOR, (i * cell, 0), (i * cell, cells_y * cell - 1))
+            for i in range(cells_y):
+                pygame.draw.line(surface, GRID_COLOR, (0, i * cell), (cells_x * cell - 1, i * cell))
+        for x, y in self.world.obstacles.in_chunk(key):
+            pygame.draw.rect(surface, OBSTACLE_COLOR, ((x - x0) * cell, (y - y0) * cell, cell, cell))
+        if self.world.level is not None:
+            # Straight from the level's bitmap, only this chunk's rows and bytes
+            for x, y in self.world.level.wall_cells(x0, y0, cells_x, cells_y):
+                pygame.draw.rect(surface, OBSTACLE_COLOR, ((x - x0) * cell, (y - y0) * cell, cell, cell))
+        return surface
+
+    def _visible_chunks(self):
+        """(chunk key, screen x, screen y) for every chunk in view; a chunk
+        can show up more than once when the world is smaller than the view"""
+        cell, chunk = self.cell, self.chunk
+        left, top = self.camera.origin()
+        # Whole cells covering the view, then split where the world wraps
+        first_x, first_y = left // cell, top // cell
+        across = (left + self.width - 1) // cell - first_x + 1
+        down = (top + self.height - 1) // cell - first_y + 1
+        shift_x = first_x * cell - left
+        shift_y = first_y * cell - top
+        visible = []
+        for wy, offset_y, rows in _spans(first_y, down, self.world.height):
+            for wx, offset_x, columns in _spans(first_x, across, self.world.width):
+                for ky in range(wy // chunk, (wy + rows - 1) // chunk + 1):
+                    sy = shift_y + (offset_y + ky * chunk - wy) * cell
+                    for kx in range(wx // chunk, (wx + columns - 1) // chunk + 1):
+                        visible.append(((kx, ky), shift_x + (offset_x + kx * chunk - wx) * cell, sy))
+        return visible
+
+    def draw(self, win, follow=None):
+        """Draw the view onto win at (0, 0), moving the camera towards the
+        cell to follow first"""
+        if follow is not None:
+            self.camera.follow(follow)
+        world, cell, chunk = self.world, self.cell, self.chunk
+        segments = world.segments
+        food = world.food_index
+        rect = pygame.draw.rect
+        clip = win.get_clip()
+        win.set_clip((0, 0, self.width, self.height))
+        visible = 0
+        for key, sx, sy in self._visible_chunks():
+            win.blit(self.cache.get(key), (sx, sy))
+            x0, y0 = key[0] * chunk, key[1] * chunk
+            for (x, y) in food.in_chunk(key):
+                rect(win, FOOD_COLOR, (sx + (x - x0) * cell, sy + (y - y0) * cell, cell, cell))
+                visible += 1
+            for (x, y), player in segments.in_chunk(key).items():
+                color = HEAD_COLOR if player.snake.body[0] == (x, y) else player.color
+                rect(win, color, (sx + (x - x0) * cell + 1, sy + (y - y0) * cell + 1, cell - 2, cell - 2))
+                visible += 1
+        win.set_clip(clip)
+        self.visible = visible
+
+def _lay_snake(world, player, length):
+    """Stretch a player's snake to about length cells, rows of 200 from its
+    head (skipping taken cells), keeping the world's grid and indexes in step"""
+    hx, hy = player.snake.body[0]
+    for cell in player.snake.body:
+        world.occupancy.remove(cell)
+        world.segments.remove(cell)
+    body = []
+    for i in range(length):
+        cell = ((hx - i % 200) % world.width, (hy + i // 200) % world.height)
+        if world.occupancy.is_occupied(cell):
+            continue
+        world.occupancy.add(cell)
+        world.segments.add(cell, player)
+        body.append(cell)
+    player.snake.body = body
+
+def benchmark(sizes=(100, 1000, 10000), lengths=(10, 10000), frames=300, width=800, height=600):
+    """Frame time of the view for several world sizes and snake lengths"""
+    from multiplayer import build_world
+    pygame.display.init()
+    win = pygame.Surface((width, height))
+    results = []
+    for size in sizes:
+        for length in lengths:
+            world, _ = build_world(8, size, seed=0, verbose=False, chunk=16, food=size * size // 400,
+                                   obstacles=size * size // 100)
+            player = world.players[0]
+            _lay_snake(world, player, min(length, size * size // 4))
+            view = WorldView(world, width, height)
+            hx, hy = player.snake.body[0]
+            start = time.perf_counter()
+            for i in range(frames):
+                # Sweep back and forth over the snake so chunks come and go
+                view.camera.center_on(((hx - i % 160) % world.width, hy + 15))
+                view.draw(win)
+            elapsed = (time.perf_counter() - start) / frames
+            results.append((size, len(player.snake.body), elapsed))
+            print(f"{size:>6}x{size:<6} snake {len(player.snake.body):>6}: {elapsed * 1000:6.2f} ms/frame, "
+                  f"{view.visible} drawn, chunk cache {view.cache.hits} hits {view.cache.misses} misses")
+    pygame.display.quit()
+    return results
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Frame time of the chunked world view without a window")
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma separated world sizes in cells")
+    parser.add_argument("--lengths", default="10,10000", help="comma separated snake lengths")
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    lengths = [int(length) for length in args.lengths.split(",")]
+    benchmark(sizes, lengths, args.frames)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))